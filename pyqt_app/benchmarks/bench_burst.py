@@ -0,0 +1,56 @@
+"""突发策略验证：替身服务器记录每个请求的到达时刻
+
+依次用各策略运行一个真实的 ExchangeTask，打印计划偏移与实际到达偏移（相对目标时刻）；
+tests/test_burst.py 用同一流程检查偏移、请求数与到达分布。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_burst [--count 6] [--window-ms 100]
+"""
+import argparse
+import asyncio
+import json
+from datetime import timedelta
+from benchmarks.common import NtpStandIn, StandInServer, bench_clock, sale_handler, bench_task_config
+from core.clock_service import ClockService
+from core.exchange import ExchangeTask
+
+async def run_strategy(server: StandInServer, clock: ClockService, burst: dict, count: int) -> dict:
+    server.requests.clear()
+    target = clock.now() + timedelta(seconds=2)
+    config = bench_task_config(burst["strategy"], target, server.base_url, count=count, burst=burst,
+                               warmup_lead=1, fire_lead_ms=0)
+    task = ExchangeTask(config)
+    deadline_ns = clock.mono_ns_for(target)
+    await task.run()
+    arrivals = sorted((r.arrived_ns - deadline_ns) / 1e6 for r in server.requests if r.method == "POST")
+    return {
+        "burst": burst,
+        "planned_ms": [round(o, 3) for o in task.result["offsets_ms"]],
+        "arrival_ms": [round(a, 3) for a in arrivals],
+        "fire_error_ms": [round(e, 3) for e in task.result["shot_errors_ms"]],
+    }
+
+async def main(count: int, window_ms: float):
+    ntp = await NtpStandIn().start()
+    clock = bench_clock([ntp.address])
+    await clock.sync.sync()
+    strategies = [
+        {"strategy": "simultaneous"},
+        {"strategy": "uniform", "window_ms": window_ms},
+        {"strategy": "front_loaded", "window_ms": window_ms},
+        {"strategy": "explicit", "offsets_ms": [-30, 0, 20, 80]},
+    ]
+    results = []
+    async with StandInServer(handler=sale_handler()) as server:
+        for burst in strategies:
+            results.append(await run_strategy(server, clock, burst, count))
+    clock.stop()
+    await ntp.stop()
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=6)
+    parser.add_argument("--window-ms", type=float, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.window_ms))
@@ -0,0 +1,51 @@
+"""时钟同步精度：单样本 NTP vs 多服务器筛选估计
+
+启动若干本地 NTP 替身（统一偏差 skew，其中部分应答被非对称延迟），
+比较旧实现（取一个样本直接覆盖偏移）与 ClockSync 的估计误差。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_clock_sync [--skew 1.5] [--rounds 10]
+"""
+import argparse
+import asyncio
+import json
+import ntplib
+from benchmarks.common import NtpStandIn, summarize
+from core.clock_sync import ClockSync
+
+async def main(skew: float, rounds: int):
+    servers = [
+        await NtpStandIn(skew=skew).start(),
+        await NtpStandIn(skew=skew, slow_ratio=0.5, slow_delay=0.08).start(),
+        await NtpStandIn(skew=skew, slow_ratio=0.8, slow_delay=0.2).start(),
+    ]
+    clock = ClockSync([s.address for s in servers])
+    naive_errors, filtered_errors = [], []
+    try:
+        for i in range(rounds):
+            # 旧实现：ntplib 单次请求，偏移直接取该样本
+            target = servers[(i % 2) + 1]
+            stats = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: ntplib.NTPClient().request(target.host, port=target.port, timeout=2)
+            )
+            naive_errors.append(abs(stats.offset - skew) * 1000)
+
+            await clock.sync()
+            filtered_errors.append(abs(clock.offset_to_system() - skew) * 1000)
+            await asyncio.sleep(0.05)
+    finally:
+        for s in servers:
+            await s.stop()
+
+    result = {"skew_s": skew, "rounds": rounds,
+              "single_sample_error_ms": summarize(naive_errors),
+              "clock_sync_error_ms": summarize(filtered_errors),
+              "clock_sync_error_bound_ms": clock.error_bound * 1000}
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skew", type=float, default=1.5)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.skew, args.rounds))
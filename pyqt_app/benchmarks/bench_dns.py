@@ -0,0 +1,120 @@
+"""DNS 固定验证：假解析器 + 多个回环地址上的替身服务器
+
+假解析器把 mall.test 解析到若干回环地址（其中一个没有监听），验证：
+1. refresh 剔除不可连接的地址并按连接耗时排序；
+2. 连接池（httpx）、末字节发送、HttpClient（requests）都连接到固定的地址；
+3. 固定地址失效后自动换用下一个地址；
+并对比经由慢解析器每次解析与使用固定地址时的新建连接耗时。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_dns [--resolver-delay-ms 30] [--rounds 20]
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+from benchmarks.common import StandInServer, summarize
+from core.pool import ConnectionPool
+from core.raw_sender import RawSender, build_http_request
+from utils import dns_resolver
+from utils.dns_resolver import DnsPinner
+from utils.http_client import HttpClient
+
+HOST = "mall.test"
+LISTENERS = ["127.0.0.2", "127.0.0.3", "127.0.0.4"]
+DEAD = "127.0.0.9"
+
+class FakeResolver:
+    """固定结果的解析器，delay 模拟慢速 DNS"""
+
+    def __init__(self, records: Dict[str, List[str]], delay: float = 0.0):
+        self.records = records
+        self.delay = delay
+        self.queries = 0
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        self.queries += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if host not in self.records:
+            raise OSError(f"NXDOMAIN {host}")
+        return list(self.records[host])
+
+def served_by(servers: Dict[str, StandInServer]) -> Dict[str, int]:
+    counts = {addr: len(s.requests) for addr, s in servers.items()}
+    for s in servers.values():
+        s.requests.clear()
+    return counts
+
+async def cold_connect_ms(pinner: DnsPinner, resolver: FakeResolver, port: int, pinned: bool) -> float:
+    """新建一条 TCP 连接的耗时：固定时直接连接，否则先经解析器解析，再按记录顺序逐个尝试"""
+    start = time.perf_counter_ns()
+    addresses = pinner.candidates(HOST) if pinned else await resolver.resolve(HOST, port)
+    for address in addresses:
+        try:
+            _, writer = await asyncio.open_connection(address, port)
+            break
+        except OSError:
+            continue
+    elapsed = (time.perf_counter_ns() - start) / 1e6
+    writer.close()
+    await writer.wait_closed()
+    return elapsed
+
+async def main(resolver_delay_ms: float, rounds: int):
+    first = await StandInServer(tls=True, host=LISTENERS[0]).start()
+    servers = {LISTENERS[0]: first}
+    for addr in LISTENERS[1:]:
+        servers[addr] = await StandInServer(tls=True, host=addr, port=first.port).start()
+    port = first.port
+    resolver = FakeResolver({HOST: [DEAD] + LISTENERS}, delay=resolver_delay_ms / 1000)
+    pinner = DnsPinner(resolver=resolver)
+    dns_resolver._dns_pinner = pinner
+    base_url = f"https://{HOST}:{port}"
+    report = {}
+
+    pin = await pinner.refresh(HOST, port)
+    report["pinned"] = {"addresses": list(pin.addresses), "connect_ms": pin.connect_ms, "dead_excluded": DEAD not in pin.addresses}
+
+    pool = ConnectionPool(base_url, verify=False)
+    await pool.warm_up(3)
+    report["httpx_pool"] = served_by(servers)
+
+    sender = RawSender(base_url + "/exchange", verify=False)
+    await sender.prime(2, build_http_request(base_url + "/exchange", b"{}", {}))
+    await asyncio.gather(sender.send(), sender.send())
+    report["raw_sender"] = served_by(servers)
+
+    client = HttpClient()
+    client.session.verify = False
+    client.session.trust_env = False  # 避免环境变量中的 CA 配置覆盖 verify
+    import urllib3
+    urllib3.disable_warnings()
+    await asyncio.to_thread(client.get, base_url + "/point")
+    client.session.close()
+    report["requests_client"] = served_by(servers)
+
+    # 固定地址失效：关闭其监听，新连接应换用下一个地址
+    best = pin.addresses[0]
+    await pool.close()
+    await servers[best].stop()
+    await pool.warm_up(1)
+    report["fallback"] = {"stopped": best, "now_pinned": pinner.pinned(HOST), "served": served_by(servers)}
+    await pool.close()
+
+    report["cold_connect_ms"] = {
+        "via_resolver": summarize([await cold_connect_ms(pinner, resolver, port, False) for _ in range(rounds)]),
+        "pinned": summarize([await cold_connect_ms(pinner, resolver, port, True) for _ in range(rounds)]),
+    }
+    for addr, server in servers.items():
+        if addr != best:
+            await server.stop()
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resolver-delay-ms", type=float, default=30)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.resolver_delay_ms, args.rounds))
@@ -0,0 +1,82 @@
+"""引擎负载测试：大量定时任务共享一个运行时
+
+在本地替身服务器上调度 N 个任务（目标时间分散在一段窗口内），
+记录提交过程中的线程数与内存占用，以及全部完成后的请求数与触发误差。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_engine_load [--tasks 500] [--count 2] [--window 10]
+"""
+import argparse
+import asyncio
+import json
+import resource
+import threading
+import time
+from datetime import timedelta
+from benchmarks.common import NtpStandIn, StandInServer, bench_clock, bench_task_config, sale_handler, summarize
+from core.engine import get_engine
+from core.exchange import ExchangeTask
+
+def rss_mb() -> float:
+    """当前常驻内存（MB）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+async def main(n_tasks: int, count: int, window: float):
+    server = await StandInServer(handler=sale_handler()).start()
+    ntp = await NtpStandIn().start()
+    clock = bench_clock([ntp.address])
+    clock.start()
+    await clock.wait_synced()
+
+    engine = get_engine()
+    engine.start()
+    lead = 6  # 留出提交时间，确保所有任务都在等待中
+    base = clock.now() + timedelta(seconds=lead)
+    tasks = []
+    steps = []
+    checkpoints = sorted({0, n_tasks // 5, n_tasks // 2, n_tasks})
+    for i in range(n_tasks + 1):
+        if i in checkpoints:
+            steps.append({"tasks": i, "threads": threading.active_count(), "rss_mb": round(rss_mb(), 1)})
+        if i == n_tasks:
+            break
+        target = base + timedelta(seconds=window * i / n_tasks)
+        task = ExchangeTask(bench_task_config(f"load-{i}", target, server.base_url, count=count))
+        tasks.append(task)
+        engine.submit(task)
+
+    deadline = time.perf_counter() + lead + window + 30
+    while engine.running_tasks() and time.perf_counter() < deadline:
+        await asyncio.sleep(0.2)
+    steps.append({"tasks": "done", "threads": threading.active_count(), "rss_mb": round(rss_mb(), 1)})
+
+    errors = [t.result["fire_error_ms"] for t in tasks if "fire_error_ms" in t.result]
+    exchanges = [r for r in server.requests if r.method == "POST"]
+    result = {
+        "tasks": n_tasks, "count": count, "window_s": window,
+        "completed": len(errors), "exchange_requests": len(exchanges),
+        "expected_requests": n_tasks * count,
+        "connections": server.connections,
+        "resources": steps,
+        "fire_error_ms": summarize(errors),
+    }
+    engine.shutdown()
+    clock.stop()
+    await server.stop()
+    await ntp.stop()
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--count", type=int, default=2)
+    parser.add_argument("--window", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.count, args.window))
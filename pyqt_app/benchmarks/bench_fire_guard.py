@@ -0,0 +1,79 @@
+"""触发保护基准：有垃圾回收压力和其他线程争抢 GIL 时，FireGuard 开启前后的触发误差
+
+进程内保留一大堆容器对象（让完整回收耗时可观），后台线程不停做纯 Python 计算并产生垃圾
+（模拟界面重绘、日志等其他线程），每次请求在发送路径上也分配一些对象。
+两种模式交替进行，每轮用 FireScheduler 按突发偏移表发出一组请求，统计每次请求的触发误差。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_fire_guard [--trials 100] [--shots 8] [--window-ms 20] [--heap 300000] [--cpu N]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import random
+import threading
+from benchmarks.common import summarize
+from core.burst import burst_offsets
+from core.fire_guard import FireGuard
+from core.scheduler import FireScheduler
+
+def background_load(stop: threading.Event):
+    """与引擎线程争抢 GIL 的后台线程"""
+    while not stop.is_set():
+        garbage = [{"k": [i]} for i in range(200)]
+        garbage.append(garbage)  # 循环引用，只能由垃圾回收释放
+        sum(range(2000))
+
+async def shot(index: int):
+    """发送路径上的典型分配（构造请求、解析响应）"""
+    garbage = [[j, {"j": j}] for j in range(300)]
+    garbage.append(garbage)
+    await asyncio.sleep(0)
+
+async def trial(scheduler: FireScheduler, offsets) -> list:
+    deadline_ns = FireScheduler.deadline_after(random.uniform(0.01, 0.03))
+    errors, launched = await scheduler.fire_burst(deadline_ns, offsets, shot)
+    await asyncio.gather(*launched)
+    return [e / 1e6 for e in errors]
+
+async def main(args):
+    heap = [{"i": i, "l": [i]} for i in range(args.heap)]  # noqa: F841  常驻对象
+    stop = threading.Event()
+    worker = threading.Thread(target=background_load, args=(stop,), daemon=True)
+    worker.start()
+    scheduler = FireScheduler(lead=0, spin_window=args.spin_ms / 1000)
+    offsets = burst_offsets({"strategy": "uniform", "window_ms": args.window_ms}, args.shots)
+    plain, guarded = [], []
+    applied = []
+    try:
+        for _ in range(args.trials):
+            plain += await trial(scheduler, offsets)
+            with FireGuard(cpu=args.cpu, priority=not args.no_priority):
+                applied = FireGuard.applied
+                guarded += await trial(scheduler, offsets)
+    finally:
+        stop.set()
+        worker.join()
+
+    before, after = summarize(plain), summarize(guarded)
+    result = {
+        "trials": args.trials, "shots": args.shots, "heap_objects": args.heap, "gc_counts": gc.get_count(),
+        "guard": applied,
+        "unguarded_error_ms": {k: round(v, 3) for k, v in before.items()},
+        "guarded_error_ms": {k: round(v, 3) for k, v in after.items()},
+        "p99_improvement": round(before["p99"] / after["p99"], 2) if after["p99"] else None,
+        "max_improvement": round(before["max"] / after["max"], 2) if after["max"] else None,
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trials", type=int, default=100)
+    parser.add_argument("--shots", type=int, default=8)
+    parser.add_argument("--window-ms", type=float, default=20)
+    parser.add_argument("--spin-ms", type=float, default=2)
+    parser.add_argument("--heap", type=int, default=300000, help="常驻容器对象数")
+    parser.add_argument("--cpu", type=int, default=None, help="保护期间绑定的 CPU")
+    parser.add_argument("--no-priority", action="store_true", help="不尝试提高调度优先级")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,37 @@
+"""触发抖动基准：asyncio.sleep 直接等待 vs FireScheduler 睡眠+忙等
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_fire_jitter [--shots 200] [--spin-ms 2]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from benchmarks.common import summarize
+from core.scheduler import FireScheduler
+
+async def naive_wait(deadline_ns: int) -> int:
+    """旧实现：单次 asyncio.sleep"""
+    await asyncio.sleep(max(0, deadline_ns - time.perf_counter_ns()) / 1e9)
+    return time.perf_counter_ns() - deadline_ns
+
+async def main(shots: int, spin_ms: float):
+    scheduler = FireScheduler(lead=0, spin_window=spin_ms / 1000)
+    naive, precise = [], []
+    for _ in range(shots):
+        # 随机目标，避免与定时器节拍对齐
+        naive.append((await naive_wait(FireScheduler.deadline_after(random.uniform(0.005, 0.03)))) / 1e6)
+        precise.append((await scheduler.wait_until(FireScheduler.deadline_after(random.uniform(0.005, 0.03)))) / 1e6)
+
+    result = {"shots": shots, "spin_ms": spin_ms,
+              "asyncio_sleep_error_ms": summarize(naive),
+              "fire_scheduler_error_ms": summarize(precise)}
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shots", type=int, default=200)
+    parser.add_argument("--spin-ms", type=float, default=2)
+    args = parser.parse_args()
+    asyncio.run(main(args.shots, args.spin_ms))
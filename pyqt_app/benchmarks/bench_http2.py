@@ -0,0 +1,88 @@
+"""发送模式对比：HTTP/1.1 多连接 vs HTTP/2 单连接多路复用 vs 末字节同步
+
+本地替身服务器（TLS + ALPN h2/http1.1）运行在独立线程，按不同突发规模
+统计同一轮内的到达离散程度（最晚 - 最早）、单次请求延迟 p50/p99，
+以及客户端线程发出并收齐一轮突发所消耗的 CPU 时间。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_http2 [--counts 1,5,10,25,50,100,200] [--rounds 10] [--latency-ms 0]
+"""
+import argparse
+import asyncio
+import json
+import time
+from benchmarks.common import ServerThread, StandInServer, percentile
+from core.pool import ConnectionPool
+from core.raw_sender import RawSender, build_http_request
+from utils.helpers import build_exchange_headers
+
+PAYLOAD = {"app_id": 1, "point_sn": "myb", "goods_id": "1", "exchange_num": 1,
+           "uid": "1", "region": "cn_gf01", "game_biz": "hk4e"}
+MODES = ("pooled", "http2", "last_byte")
+
+async def timed(coro, fired_ns: int, latencies):
+    await coro
+    latencies.append((time.perf_counter_ns() - fired_ns) / 1e6)
+
+async def burst(mode, server, pool, url, headers, body, count):
+    """执行一轮突发，返回 (到达时刻列表, 延迟列表, CPU 毫秒)"""
+    if mode == "last_byte":
+        sender = RawSender(url, verify=False)
+        await sender.prime(count, build_http_request(url, body, headers))
+        send = sender.send
+    else:
+        await pool.warm_up(count)
+        send = lambda: pool.post(url, content=body, headers=headers)
+    server.requests.clear()
+    latencies = []
+    cpu = time.thread_time()
+    fired = time.perf_counter_ns()
+    await asyncio.gather(*(timed(send(), fired, latencies) for _ in range(count)))
+    cpu = (time.thread_time() - cpu) * 1000
+    arrived = [r.arrived_ns for r in list(server.requests) if r.method == "POST"]
+    return arrived, latencies, cpu
+
+async def run(server, counts, rounds):
+    headers = build_exchange_headers("account_id=1", "bench")
+    body = json.dumps(PAYLOAD).encode()
+    url = server.base_url + "/mall/v1/web/goods/exchange"
+    pools = {"pooled": ConnectionPool(server.base_url, verify=False),
+             "http2": ConnectionPool(server.base_url, verify=False, http2=True)}
+    results = []
+    for count in counts:
+        row = {"count": count}
+        for mode in MODES:
+            spreads, latencies, cpus = [], [], []
+            connections = server.connections
+            for _ in range(rounds):
+                arrived, lat, cpu = await burst(mode, server, pools.get(mode), url, headers, body, count)
+                spreads.append((max(arrived) - min(arrived)) / 1e6)
+                latencies += lat
+                cpus.append(cpu)
+            row[mode] = {
+                "spread_ms_p50": round(percentile(spreads, 50), 3),
+                "spread_ms_max": round(max(spreads), 3),
+                "latency_ms_p50": round(percentile(latencies, 50), 3),
+                "latency_ms_p99": round(percentile(latencies, 99), 3),
+                "cpu_ms_per_burst": round(percentile(cpus, 50), 3),
+                "new_connections": server.connections - connections,
+            }
+        results.append(row)
+    for pool in pools.values():
+        await pool.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", default="1,5,10,25,50,100,200")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="替身服务器模拟的往返时延")
+    args = parser.parse_args()
+    counts = [int(c) for c in args.counts.split(",")]
+    server = StandInServer(http2=True, latency=args.latency_ms / 1000)
+    with ServerThread(server):
+        results = asyncio.run(run(server, counts, args.rounds))
+    print(json.dumps({"rounds": args.rounds, "latency_ms": args.latency_ms, "results": results}, indent=2))
+
+if __name__ == '__main__':
+    main()
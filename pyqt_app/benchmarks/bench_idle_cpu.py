@@ -0,0 +1,69 @@
+"""空闲 CPU 基准：1000 个等待中的任务
+
+对比旧实现（每个任务每秒醒来检查一次并发消息）与定时器堆调度
+在同样的观察窗口内消耗的 CPU 时间和唤醒次数。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_idle_cpu [--tasks 1000] [--seconds 10]
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import timedelta
+from benchmarks.common import NtpStandIn, bench_clock, bench_task_config
+from core.clock_service import ClockService
+from core.exchange import ExchangeTask
+from core.scheduler import get_timer_heap
+
+async def legacy_task(clock: ClockService, target, counter: list, messages: list):
+    """旧实现的等待方式：每秒醒来一次计算剩余时间并发出消息"""
+    while True:
+        delay = (target - clock.now()).total_seconds()
+        messages.append(f"还剩 {delay:.1f} 秒")
+        counter[0] += 1
+        await asyncio.sleep(1)
+
+async def measure(coros, seconds: float) -> float:
+    """运行一组协程 seconds 秒，返回本进程消耗的 CPU 秒数"""
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    await asyncio.sleep(1)  # 跳过启动阶段
+    cpu = time.process_time()
+    await asyncio.sleep(seconds)
+    used = time.process_time() - cpu
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return used
+
+async def main(n_tasks: int, seconds: float):
+    ntp = await NtpStandIn().start()
+    clock = bench_clock([ntp.address])
+    await clock.sync.sync()
+    target = clock.now() + timedelta(hours=2)
+
+    counter, messages = [0], []
+    legacy_cpu = await measure((legacy_task(clock, target, counter, messages) for _ in range(n_tasks)), seconds)
+
+    tasks = []
+    for i in range(n_tasks):
+        tasks.append(ExchangeTask(bench_task_config(f"idle-{i}", target)))
+    heap = get_timer_heap()
+    wakeups = heap.wakeups
+    heap_cpu = await measure((t.run() for t in tasks), seconds)
+
+    clock.stop()
+    await ntp.stop()
+    result = {
+        "tasks": n_tasks, "window_s": seconds,
+        "legacy_poll": {"cpu_s": round(legacy_cpu, 4), "wakeups": counter[0]},
+        "timer_heap": {"cpu_s": round(heap_cpu, 4), "wakeups": heap.wakeups - wakeups},
+    }
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.seconds))
@@ -0,0 +1,40 @@
+"""时延补偿验证：替身服务器模拟往返时延，比较补偿前后请求的到达偏移
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_latency [--rtt-ms 40]
+"""
+import argparse
+import asyncio
+import json
+from datetime import timedelta
+from benchmarks.common import NtpStandIn, StandInServer, bench_clock, sale_handler, bench_task_config, summarize
+from core.clock_service import ClockService
+from core.exchange import ExchangeTask
+
+async def run_once(server: StandInServer, clock: ClockService, compensate: bool) -> dict:
+    server.requests.clear()
+    target = clock.now() + timedelta(seconds=5)
+    config = bench_task_config(f"latency-{compensate}", target, server.base_url, count=3, warmup_lead=2,
+                               probe_window=4, fire_lead_ms=0, latency_compensation=compensate)
+    task = ExchangeTask(config)
+    deadline_ns = clock.mono_ns_for(target)
+    await task.run()
+    arrivals = [(r.arrived_ns - deadline_ns) / 1e6 for r in server.requests if r.method == "POST"]
+    return {"compensate": compensate, "lead_ms": round(task.result["lead_ms"], 3),
+            "latency": task.result["latency"], "arrival_ms": summarize(arrivals)}
+
+async def main(rtt_ms: float):
+    ntp = await NtpStandIn().start()
+    clock = bench_clock([ntp.address])
+    await clock.sync.sync()
+    async with StandInServer(handler=sale_handler(), latency=rtt_ms / 1000) as server:
+        results = [await run_once(server, clock, False), await run_once(server, clock, True)]
+    clock.stop()
+    await ntp.stop()
+    print(json.dumps({"rtt_ms": rtt_ms, "runs": results}, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rtt-ms", type=float, default=40)
+    args = parser.parse_args()
+    asyncio.run(main(args.rtt_ms))
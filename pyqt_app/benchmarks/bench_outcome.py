@@ -0,0 +1,79 @@
+"""提前终止验证：替身服务器按到达顺序返回预设的 retcode
+
+每个场景用均匀分布的突发运行一个任务，统计服务器实际收到的兑换请求数、
+被跳过 / 取消的请求数以及最终结果类别（tests/test_outcome.py 按同样的场景断言这些数字）。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_outcome [--count 10] [--window-ms 200]
+"""
+import argparse
+import asyncio
+import json
+from typing import Dict
+from datetime import timedelta
+from benchmarks.common import NtpStandIn, StandInServer, bench_clock, bench_task_config
+from core.clock_service import ClockService
+from core.exchange import ExchangeTask
+
+def body(retcode: int, message: str) -> bytes:
+    return json.dumps({"retcode": retcode, "message": message, "data": None}, ensure_ascii=False).encode()
+
+NOT_STARTED = (200, body(1028, "活动尚未开始"))
+SLOW_NOT_STARTED = (200, body(1028, "活动尚未开始"), 1.0)
+
+# 场景：按请求到达顺序依次返回的 (HTTP 状态, 响应体[, 额外延迟秒数])，用完后重复最后一个
+SCENARIOS = {
+    "success_on_3rd": [NOT_STARTED, NOT_STARTED, (200, body(0, "OK"))],
+    "sold_out_on_2nd": [NOT_STARTED, (200, body(-2101, "商品库存不足"))],
+    "auth_error": [(200, body(-100, "登录失效，请重新登录"))],
+    "rate_limited": [(429, b"Too Many Requests")],
+    "all_retryable": [NOT_STARTED],
+    # 前两个请求迟迟不返回，第 3 个成功时它们仍在进行中，应被取消
+    "success_with_2_in_flight": [SLOW_NOT_STARTED, SLOW_NOT_STARTED, (200, body(0, "OK"))],
+}
+
+def scripted_handler(script):
+    state = {"n": 0}
+    def handler(request):
+        if request.method != "POST":
+            return 200, {"Content-Type": "application/json"}, body(0, "OK")
+        status, payload, *delay = script[min(state["n"], len(script) - 1)]
+        state["n"] += 1
+        response = status, {"Content-Type": "application/json"}, payload
+        if delay:
+            return delayed(response, delay[0])
+        return response
+    return handler
+
+async def delayed(response, seconds: float):
+    await asyncio.sleep(seconds)
+    return response
+
+async def run_scenario(name: str, script, clock: ClockService, count: int, window_ms: float) -> Dict:
+    async with StandInServer(handler=scripted_handler(script), latency=0.01) as server:
+        target = clock.now() + timedelta(seconds=1.5)
+        config = bench_task_config(name, target, server.base_url, count=count,
+                                   burst={"strategy": "uniform", "window_ms": window_ms},
+                                   warmup_lead=1, latency_compensation=False, clock_source="ntp")
+        task = ExchangeTask(config)
+        await task.run()
+        received = sum(1 for r in server.requests if r.method == "POST")
+    return {"scenario": name, "outcome": task.result["outcome"], "server_received": received,
+            "skipped": task.result["skipped_shots"], "cancelled_in_flight": task.result.get("cancelled_shots", 0),
+            "shot_outcomes": [s["outcome"] for s in task.result.get("shots", [])]}
+
+async def main(count: int, window_ms: float):
+    ntp = await NtpStandIn().start()
+    clock = bench_clock([ntp.address])
+    await clock.sync.sync()
+    results = [await run_scenario(n, s, clock, count, window_ms) for n, s in SCENARIOS.items()]
+    clock.stop()
+    await ntp.stop()
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--window-ms", type=float, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.window_ms))
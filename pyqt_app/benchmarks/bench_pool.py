@@ -0,0 +1,55 @@
+"""冷连接 vs 预热连接的首字节延迟对比
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_pool [--count 5] [--rounds 20]
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from benchmarks.common import StandInServer, summarize
+from core.pool import ConnectionPool
+
+async def first_byte_ms(client: httpx.AsyncClient, url: str) -> float:
+    """发送请求，返回收到响应头（首字节）所用毫秒数"""
+    start = time.perf_counter()
+    async with client.stream("POST", url, content=b"{}") as response:
+        elapsed = (time.perf_counter() - start) * 1000
+        await response.aread()
+    return elapsed
+
+async def cold_burst(url: str, count: int):
+    """旧实现：每次请求新建一个客户端"""
+    async def one():
+        async with httpx.AsyncClient(verify=False) as client:
+            return await first_byte_ms(client, url)
+    return await asyncio.gather(*(one() for _ in range(count)))
+
+async def warm_burst(pool: ConnectionPool, url: str, count: int):
+    """新实现：开抢前预热，突发时复用"""
+    await pool.warm_up(count)
+    return await asyncio.gather(*(first_byte_ms(pool.client, url) for _ in range(count)))
+
+async def main(count: int, rounds: int):
+    async with StandInServer(tls=True) as server:
+        url = server.base_url + "/mall/v1/web/goods/exchange"
+        cold, warm = [], []
+        for _ in range(rounds):
+            cold += await cold_burst(url, count)
+        pool = ConnectionPool(server.base_url, verify=False)
+        pool.reserve(count)
+        for _ in range(rounds):
+            warm += await warm_burst(pool, url, count)
+        await pool.close()
+
+    result = {"count": count, "rounds": rounds,
+              "cold_ms": summarize(cold), "warm_ms": summarize(warm)}
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.rounds))
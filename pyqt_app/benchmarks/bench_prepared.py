@@ -0,0 +1,61 @@
+"""单次请求 CPU 开销对比：每次序列化 vs 预编译请求
+
+用 httpx.MockTransport 代替网络，只测量客户端在触发路径上为每次请求花费的 CPU：
+before 为每次 json.dumps + client.post(headers=dict)，
+after 为 PreparedExchange 预构造的请求直接 client.send。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_prepared [--shots 2000] [--fresh-fp]
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from benchmarks.common import summarize
+from core.request_template import PreparedExchange
+from utils.helpers import build_exchange_headers
+
+URL = "https://api-takumi.miyoushe.com/mall/v1/web/goods/exchange"
+PAYLOAD = {"app_id": 1, "point_sn": "myb", "goods_id": "2024101812345", "exchange_num": 1,
+           "uid": "100000001", "region": "cn_gf01", "game_biz": "hk4e", "address_id": "123456"}
+
+def mock_handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"retcode": 0, "message": "OK"})
+
+async def measure(shot, shots: int):
+    """逐次执行 shot，返回每次的 CPU 微秒"""
+    costs = []
+    for _ in range(shots):
+        start = time.thread_time_ns()
+        await shot()
+        costs.append((time.thread_time_ns() - start) / 1e3)
+    return costs
+
+async def main(shots: int, fresh_fp: bool):
+    headers = build_exchange_headers("account_id=1; cookie_token=" + "x" * 64, "a" * 36)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(mock_handler)) as client:
+        async def before():
+            await client.post(URL, content=json.dumps(PAYLOAD), headers=headers, timeout=10)
+
+        prepared = PreparedExchange(URL, PAYLOAD, headers, fresh_fp=fresh_fp)
+        prepared.prepare(client, shots)
+
+        async def after():
+            await client.send(prepared.next_request(client))
+
+        # 两种方式各预跑一轮，排除首次导入与缓存的影响
+        await measure(before, 100)
+        await measure(after, 100)
+        prepared.prepare(client, shots)
+        results = {"before_us": summarize(await measure(before, shots)),
+                   "after_us": summarize(await measure(after, shots))}
+    results["p50_saving_pct"] = round(100 * (1 - results["after_us"]["p50"] / results["before_us"]["p50"]), 1)
+    print(json.dumps({"shots": shots, "fresh_fp": fresh_fp, **results}, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shots", type=int, default=2000)
+    parser.add_argument("--fresh-fp", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.shots, args.fresh_fp))
@@ -0,0 +1,65 @@
+"""发送路径对比：连接池 httpx 发送 vs 末字节同步发送
+
+本地 TLS 替身记录每个请求完整到达的时刻，比较同一轮突发内到达时间的离散程度
+（最晚 - 最早）以及相对触发时刻的延迟。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_raw_send [--count 10] [--rounds 20]
+"""
+import argparse
+import asyncio
+import json
+import time
+from benchmarks.common import StandInServer, summarize
+from core.pool import ConnectionPool
+from core.raw_sender import RawSender, build_http_request
+from utils.helpers import build_exchange_headers
+
+PAYLOAD = {"app_id": 1, "point_sn": "myb", "goods_id": "1", "exchange_num": 1,
+           "uid": "1", "region": "cn_gf01", "game_biz": "hk4e"}
+
+def arrivals(server: StandInServer, fired_ns: int):
+    posts = [(r.arrived_ns - fired_ns) / 1e6 for r in server.requests if r.method == "POST"]
+    server.requests.clear()
+    return posts
+
+async def pooled_round(server, pool, url, headers, count):
+    await pool.warm_up(count)
+    server.requests.clear()
+    fired = time.perf_counter_ns()
+    await asyncio.gather(*(pool.post(url, content=json.dumps(PAYLOAD), headers=headers) for _ in range(count)))
+    return arrivals(server, fired)
+
+async def raw_round(server, url, headers, count):
+    sender = RawSender(url, verify=False)
+    await sender.prime(count, build_http_request(url, json.dumps(PAYLOAD).encode(), headers))
+    server.requests.clear()
+    fired = time.perf_counter_ns()
+    await asyncio.gather(*(sender.send() for _ in range(count)))
+    return arrivals(server, fired)
+
+async def main(count: int, rounds: int):
+    headers = build_exchange_headers("account_id=1", "bench")
+    results = {}
+    async with StandInServer(tls=True) as server:
+        url = server.base_url + "/mall/v1/web/goods/exchange"
+        pool = ConnectionPool(server.base_url, verify=False)
+        for mode in ("pooled", "last_byte"):
+            spreads, delays = [], []
+            for _ in range(rounds):
+                if mode == "pooled":
+                    arr = await pooled_round(server, pool, url, headers, count)
+                else:
+                    arr = await raw_round(server, url, headers, count)
+                spreads.append(max(arr) - min(arr))
+                delays += arr
+            results[mode] = {"spread_ms": summarize(spreads), "arrival_after_fire_ms": summarize(delays)}
+        await pool.close()
+    print(json.dumps({"count": count, "rounds": rounds, **results}, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.rounds))
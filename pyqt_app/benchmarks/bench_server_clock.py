@@ -0,0 +1,46 @@
+"""服务器时钟校准验证：替身服务器的时钟被故意拨偏
+
+NTP 替身给出准确时间，商城替身的 Date 头偏差 skew 秒。
+分别用 clock_source=ntp、auto 和 server 运行任务，按商城替身自己的时钟计算请求到达偏移。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_server_clock [--skew 0.7] [--probe-window 10]
+"""
+import argparse
+import asyncio
+import json
+from datetime import timedelta
+from benchmarks.common import NtpStandIn, StandInServer, bench_clock, sale_handler, bench_task_config, summarize
+from core.clock_service import ClockService
+from core.clock_sync import BEIJING_TZ
+from core.exchange import ExchangeTask
+
+async def run_once(server: StandInServer, clock: ClockService, source: str, probe_window: float) -> dict:
+    server.requests.clear()
+    target = clock.now() + timedelta(seconds=probe_window + 2)
+    config = bench_task_config(f"server-clock-{source}", target, server.base_url, count=3, warmup_lead=1,
+                               probe_window=probe_window, clock_source=source)
+    task = ExchangeTask(config)
+    await task.run()
+    target_unix = target.replace(tzinfo=BEIJING_TZ).timestamp()
+    arrivals = [(server.server_time(r.arrived_ns) - target_unix) * 1000
+                for r in server.requests if r.method == "POST"]
+    return {"clock_source": source, "clock": task.result["clock"],
+            "arrival_vs_server_clock_ms": summarize(arrivals)}
+
+async def main(skew: float, probe_window: float):
+    ntp = await NtpStandIn().start()
+    clock = bench_clock([ntp.address])
+    await clock.sync.sync()
+    async with StandInServer(handler=sale_handler(), latency=0.02, clock_skew=skew) as server:
+        results = [await run_once(server, clock, source, probe_window) for source in ("ntp", "auto", "server")]
+    clock.stop()
+    await ntp.stop()
+    print(json.dumps({"server_skew_s": skew, "runs": results}, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skew", type=float, default=0.7)
+    parser.add_argument("--probe-window", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.skew, args.probe_window))
@@ -0,0 +1,65 @@
+"""多进程分片基准：同一秒开抢的大量任务分别由 1/2/4/8 个工作进程运行时的到达离散度
+
+替身服务器与 NTP 替身运行在协调进程中，记录每个兑换请求的到达时刻（单调时钟在各进程间一致）；
+打印各工作进程数下请求到达相对目标时刻的分布、离散度（最晚 - 最早）与触发误差。
+机器的核数少于工作进程数时，多进程只会增加调度开销，结果仅供对照。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_sharding [--tasks 64] [--count 2] [--workers 1 2 4 8] [--lead 12]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import timedelta
+from benchmarks.common import (NtpStandIn, StandInServer, MemoryClockState, bench_task_config, sale_handler,
+                               summarize)
+from core.sharding import ShardCoordinator
+
+def _round(stats: dict) -> dict:
+    return {k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()}
+
+async def run(server: StandInServer, ntp: NtpStandIn, workers: int, n_tasks: int, count: int, lead: float) -> dict:
+    server.requests.clear()
+    coordinator = ShardCoordinator(workers, servers=[ntp.address], storage=MemoryClockState())
+    await coordinator.clock.sync.sync()
+    target = coordinator.clock.now().replace(microsecond=0) + timedelta(seconds=lead)
+    configs = [bench_task_config(f"shard-{i}", target, server.base_url, count=count, warmup_lead=3,
+                                 fire_lead_ms=0, latency_compensation=False, clock_source="ntp")
+               for i in range(n_tasks)]
+
+    start = time.perf_counter()
+    coordinator.start(configs)
+    await asyncio.to_thread(coordinator.wait, lead + 30)
+    deadline_ns = coordinator.clock.mono_ns_for(target)
+    coordinator.shutdown()
+
+    arrivals = [(r.arrived_ns - deadline_ns) / 1e6 for r in server.requests if r.method == "POST"]
+    errors = [e for result in coordinator.results.values() for e in result.get("shot_errors_ms", [])]
+    return {
+        "workers": workers,
+        "completed": sum(1 for r in coordinator.results.values() if "fire_error_ms" in r),
+        "exchange_requests": len(arrivals),
+        "arrival_ms": _round(summarize(arrivals)),
+        "arrival_spread_ms": round(max(arrivals) - min(arrivals), 3) if arrivals else None,
+        "fire_error_ms": _round(summarize(errors)),
+        "elapsed_s": round(time.perf_counter() - start, 2),
+    }
+
+async def main(args):
+    ntp = await NtpStandIn().start()
+    results = []
+    async with StandInServer(handler=sale_handler()) as server:
+        for workers in args.workers:
+            results.append(await run(server, ntp, workers, args.tasks, args.count, args.lead))
+    await ntp.stop()
+    print(json.dumps({"cpus": os.cpu_count(), "tasks": args.tasks, "count": args.count, "runs": results}, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=64)
+    parser.add_argument("--count", type=int, default=2)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--lead", type=float, default=12, help="开抢时刻距启动的秒数（须留出工作进程启动时间）")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+"""虚拟时间仿真：数小时后的兑换任务在虚拟时钟上跑完整个倒计时、校准与触发
+
+商城替身与 ExchangeTask 运行在同一个虚拟时间事件循环中，替身的时延同样按虚拟时间计；
+NTP 应答由 VirtualTimebase 按给定的时钟偏差生成。打印真实耗时、虚拟耗时、触发误差和各阶段的校准间隔。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.bench_virtual_time [--hours 3] [--count 5] [--ntp-offset-ms 250] [--latency-ms 30]
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from datetime import timedelta
+from benchmarks.common import bench_clock, bench_task_config
+from benchmarks.mock_mall import MockMall
+from core.timebase import VirtualTimebase, set_timebase
+
+async def simulate(tb: VirtualTimebase, hours: float, count: int, latency: float) -> dict:
+    from core.exchange import ExchangeTask
+    clock = bench_clock(["ntp-a", "ntp-b", "ntp-c"], timebase=tb)
+    clock.start()
+    await clock.wait_synced()
+    # 开售时刻与任务目标时刻一致（按校准后的时间）
+    mall = MockMall(sale_time=clock.unix_time() + hours * 3600)
+    server = mall.make_server(latency=latency, clock_skew=tb.ntp_offset)  # 替身按真实时间（NTP 时间）计时
+    await server.start()
+    try:
+        target = clock.now() + timedelta(hours=hours)
+        task = ExchangeTask(bench_task_config("virtual", target, server.base_url, count=count, clock_source="ntp"))
+        messages = []
+        task.message_signal.connect(messages.append)
+        start_ns = tb.mono_ns()
+        await task.run()
+        clock.stop()
+        deadline_ns = clock.mono_ns_for(task.target_time)
+        return {
+            "virtual_elapsed_s": round((tb.mono_ns() - start_ns) / 1e9, 3),
+            "fire_error_ms": task.result.get("shot_errors_ms"),
+            "lead_ms": task.result.get("lead_ms"),
+            "outcome": task.result.get("outcome"),
+            "shot_outcomes": [s["outcome"] for s in task.result.get("shots", [])],
+            "clock_error_ms": round((clock.offset_at(deadline_ns) + deadline_ns / 1e9
+                                     - (tb.start_time + deadline_ns / 1e9 + tb.ntp_offset)) * 1000, 3),
+            "messages": len(messages),
+        }
+    finally:
+        await server.stop()
+
+def calibration_cadence(tb: VirtualTimebase) -> dict:
+    """按校准发生时刻统计间隔分布（同一轮向多个服务器查询只计一次）"""
+    rounds = sorted(set(tb.ntp_queries))
+    rounds = [t for i, t in enumerate(rounds) if i == 0 or t - rounds[i - 1] > 1e8]
+    gaps = Counter(round((b - a) / 1e9) for a, b in zip(rounds, rounds[1:]))
+    return {"rounds": len(rounds), "interval_s": dict(sorted(gaps.items()))}
+
+def main(args):
+    tb = VirtualTimebase(ntp_offset=args.ntp_offset_ms / 1000)
+    set_timebase(tb)
+    start = time.perf_counter()
+    result = tb.run(simulate(tb, args.hours, args.count, args.latency_ms / 1000))
+    result["real_elapsed_s"] = round(time.perf_counter() - start, 3)
+    result["calibration"] = calibration_cadence(tb)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=3)
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--ntp-offset-ms", type=float, default=250)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    main(parser.parse_args())
@@ -0,0 +1,366 @@
+"""基准测试公共工具 - 本地 TLS 替身服务器、统计函数与任务 / 时钟的公共配置"""
+import asyncio
+import os
+import random
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import formatdate
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import ntplib
+from core.clock_service import ClockService, set_clock_service
+from core.timebase import Timebase, get_timebase
+from utils.helpers import build_task_config
+
+EXCHANGE_PATH = "/mall/v1/web/goods/exchange"
+
+@dataclass
+class Request:
+    """替身服务器收到的请求"""
+    method: str
+    path: str
+    headers: Dict[str, str]
+    body: bytes
+    arrived_ns: int  # 请求完整到达时的单调时钟读数（纳秒，取自时间源）
+    conn_id: int
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+def default_handler(request: Request) -> Response:
+    """默认处理函数：返回一个 retcode=0 的 JSON"""
+    return 200, {"Content-Type": "application/json"}, b'{"retcode":0,"message":"OK","data":{}}'
+
+NOT_STARTED_BODY = '{"retcode":1028,"message":"活动尚未开始","data":null}'.encode()
+
+def sale_handler(sale_ns: Optional[int] = None) -> Callable[[Request], Response]:
+    """兑换请求在开售前（单调时刻 sale_ns，None 表示始终未开售）返回 1028“活动尚未开始”
+
+    1028 属于可重试结果，不会触发提前终止，突发中的每个请求都会到达替身；
+    开售后的兑换请求与其他请求（预热、探测）按 default_handler 处理
+    """
+    def handler(request: Request) -> Response:
+        if request.method == "POST" and (sale_ns is None or request.arrived_ns < sale_ns):
+            return 200, {"Content-Type": "application/json"}, NOT_STARTED_BODY
+        return default_handler(request)
+    return handler
+
+def make_self_signed_cert(directory: str) -> Tuple[str, str]:
+    """用 openssl 生成自签名证书，返回 (cert_path, key_path)"""
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+class StandInServer:
+    """极简的 HTTP/1.1 keep-alive 替身服务器（可选 TLS）
+
+    http2=True 时通过 ALPN 同时提供 h2 与 http/1.1（需要 TLS 和 h2 库）
+    """
+
+    def __init__(self, handler: Callable[[Request], Response] = default_handler,
+                 tls: bool = False, host: str = "127.0.0.1", latency: float = 0.0,
+                 clock_skew: float = 0.0, http2: bool = False, port: int = 0, jitter: float = 0.0):
+        self.handler = handler
+        self.latency = latency  # 模拟的往返时延（秒），上下行各占一半
+        self.jitter = jitter  # 往返时延的随机增量上限（秒），上下行各自随机
+        self._random = random.Random(0)
+        self.clock_skew = clock_skew  # 服务器时钟相对本机系统时间的偏差（秒），体现在 Date 头上
+        self.tls = tls or http2
+        self.http2 = http2
+        self.host = host
+        self.port = port  # 0 表示随机端口
+        self.requests: List[Request] = []
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: set = set()  # 仍在服务的连接
+        self._tmpdir = None
+
+    @property
+    def base_url(self) -> str:
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://{self.host}:{self.port}"
+
+    def server_time(self, mono_ns: Optional[int] = None) -> float:
+        """替身服务器自己的时钟（Unix 时间）；传入单调时刻时换算该时刻的服务器时间"""
+        if mono_ns is None:
+            return get_timebase().wall_time() + self.clock_skew
+        timebase = get_timebase()
+        return mono_ns / 1e9 + (timebase.wall_time() - timebase.mono_ns() / 1e9) + self.clock_skew
+
+    async def start(self):
+        ssl_ctx = None
+        if self.tls:
+            self._tmpdir = tempfile.TemporaryDirectory()
+            cert, key = make_self_signed_cert(self._tmpdir.name)
+            ssl_ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ssl_ctx.load_cert_chain(cert, key)
+            ssl_ctx.set_alpn_protocols(["h2", "http/1.1"] if self.http2 else ["http/1.1"])
+        self._server = await asyncio.start_server(self._serve, self.host, self.port, ssl=ssl_ctx, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for handler in list(self._handlers):
+                handler.cancel()
+            if self._handlers:
+                await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _leg(self):
+        """模拟单程时延"""
+        delay = self.latency / 2
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter / 2)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _respond(self, request: Request) -> Response:
+        """记录请求并调用处理函数，按模拟时延挂起"""
+        self.requests.append(request)
+        result = self.handler(request)
+        if asyncio.iscoroutine(result):
+            result = await result
+        await self._leg()  # 下行
+        return result
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        conn_id = self.connections
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            await self._serve_connection(reader, writer, conn_id)
+        except asyncio.CancelledError:
+            pass  # 停止服务器时仍挂起的连接，连接已在内层关闭
+        finally:
+            self._handlers.discard(handler)
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, conn_id: int):
+        ssl_object = writer.get_extra_info("ssl_object")
+        if ssl_object is not None and ssl_object.selected_alpn_protocol() == "h2":
+            await self._serve_h2(reader, writer, conn_id)
+            return
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, path, _ = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+                await self._leg()  # 上行
+                request = Request(method, path, headers, body, get_timebase().mono_ns(), conn_id)
+                status, resp_headers, resp_body = await self._respond(request)
+                out = [f"HTTP/1.1 {status} OK", f"Content-Length: {len(resp_body)}"]
+                if "Date" not in resp_headers:
+                    out.append(f"Date: {formatdate(self.server_time(), usegmt=True)}")
+                out += [f"{k}: {v}" for k, v in resp_headers.items()]
+                writer.write(("\r\n".join(out) + "\r\n\r\n").encode("latin-1") + (b"" if method == "HEAD" else resp_body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_h2(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, conn_id: int):
+        """HTTP/2 连接：每个流结束时记录到达时刻，并发处理各个流"""
+        import h2.config
+        import h2.connection
+        import h2.events
+        import h2.settings
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        conn.initiate_connection()
+        conn.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: 1000})
+        writer.write(conn.data_to_send())
+        streams: Dict[int, Tuple[Dict[str, str], bytearray]] = {}
+        pending = set()
+
+        async def handle(stream_id: int, headers: Dict[str, str], body: bytes):
+            await self._leg()  # 上行
+            request = Request(headers.get(":method", ""), headers.get(":path", ""),
+                              headers, body, get_timebase().mono_ns(), conn_id)
+            status, resp_headers, resp_body = await self._respond(request)
+            out = [(":status", str(status)), ("content-length", str(len(resp_body)))]
+            if "Date" not in resp_headers:
+                out.append(("date", formatdate(self.server_time(), usegmt=True)))
+            out += [(k.lower(), v) for k, v in resp_headers.items()]
+            body = b"" if request.method == "HEAD" else resp_body
+            conn.send_headers(stream_id, out, end_stream=not body)
+            if body:
+                conn.send_data(stream_id, body, end_stream=True)
+            writer.write(conn.data_to_send())
+
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        streams[event.stream_id] = (dict(event.headers), bytearray())
+                    elif isinstance(event, h2.events.DataReceived):
+                        streams[event.stream_id][1].extend(event.data)
+                        conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded):
+                        headers, body = streams.pop(event.stream_id)
+                        task = asyncio.ensure_future(handle(event.stream_id, headers, bytes(body)))
+                        pending.add(task)
+                        task.add_done_callback(pending.discard)
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+                writer.write(conn.data_to_send())
+        except (ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+
+class ServerThread:
+    """在独立线程的事件循环中运行替身服务器，使客户端线程的 CPU 计时不含服务器开销"""
+
+    def __init__(self, server: StandInServer):
+        self.server = server
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="stand-in", daemon=True)
+
+    def __enter__(self) -> StandInServer:
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result()
+        return self.server
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算百分位数（线性插值）"""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """输出 min/p50/p90/p99/max"""
+    return {
+        "n": len(values),
+        "min": min(values) if values else float("nan"),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else float("nan"),
+    }
+
+class NtpStandIn(asyncio.DatagramProtocol):
+    """本地 UDP NTP 替身服务器
+
+    skew: 服务器时钟相对本机系统时间的偏差（秒）
+    slow_ratio / slow_delay: 以一定比例在打好发送时间戳后再延迟回包，
+        模拟非对称的慢应答（会让单样本偏移产生 -slow_delay/2 的误差）
+    """
+
+    def __init__(self, skew: float = 0.0, slow_ratio: float = 0.0, slow_delay: float = 0.05,
+                 host: str = "127.0.0.1"):
+        self.skew = skew
+        self.slow_ratio = slow_ratio
+        self.slow_delay = slow_delay
+        self.host = host
+        self.port = 0
+        self.queries = 0
+        self._random = random.Random(0)
+        self._transport = None
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(lambda: self, local_addr=(self.host, 0))
+        self.port = self._transport.get_extra_info("sockname")[1]
+        return self
+
+    async def stop(self):
+        if self._transport is not None:
+            self._transport.close()
+
+    def datagram_received(self, data: bytes, addr):
+        self.queries += 1
+        recv = ntplib.system_to_ntp_time(time.time() + self.skew)
+        request = ntplib.NTPPacket()
+        request.from_data(data)
+        reply = ntplib.NTPPacket(version=3, mode=4)
+        reply.stratum = 2
+        reply.orig_timestamp = request.tx_timestamp
+        reply.recv_timestamp = recv
+        reply.ref_timestamp = recv
+        reply.tx_timestamp = ntplib.system_to_ntp_time(time.time() + self.skew)
+        payload = reply.to_data()
+        if self._random.random() < self.slow_ratio:
+            asyncio.get_running_loop().call_later(self.slow_delay, self._transport.sendto, payload, addr)
+        else:
+            self._transport.sendto(payload, addr)
+
+class MemoryClockState:
+    """只在内存中保存时钟状态，避免基准测试改写 data/clock.json"""
+
+    def __init__(self):
+        self.state = {}
+
+    def get_ntp_servers(self):
+        return []
+
+    def get_clock_state(self):
+        return self.state
+
+    def save_clock_state(self, state):
+        self.state = state
+
+def bench_clock(servers: Sequence, timebase: Optional[Timebase] = None) -> ClockService:
+    """创建状态只存内存的时钟服务，并设为进程内共享的时钟服务（任务通过 get_clock_service 读取）"""
+    clock = ClockService(servers, storage=MemoryClockState(), timebase=timebase)
+    set_clock_service(clock)
+    return clock
+
+def bench_task_config(name: str, target: datetime, base_url: Optional[str] = None, count: int = 5,
+                      burst: Optional[Dict] = None, **options) -> Dict:
+    """基准测试用的任务配置
+
+    兑换地址指向 base_url 上的替身；不做就绪检查、不导出时间线、不写兑换历史，
+    基准测试不会改动 data/。options 为其余任务选项（如 warmup_lead、clock_source）。
+    """
+    config = build_task_config(
+        name=name, goods_id="1", uid="1", game_biz="hk4e", address_id="",
+        device_id="bench", cookie="account_id=1", time=target.isoformat(sep=" "), count=count, burst=burst,
+    )
+    if base_url is not None:
+        config["url"] = base_url + EXCHANGE_PATH
+    config.update(readiness_check=False, export_timelines=False, record_history=False)
+    config.update(options)
+    return config
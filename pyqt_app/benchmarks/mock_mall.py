@@ -0,0 +1,254 @@
+"""本地商城替身 - 按录制的响应格式模拟商品列表、兑换、米游币、地址与扫码登录接口
+
+所有接口按路径匹配、不区分域名，一个端口即可替代全部商城域名。
+可配置时延、抖动、时钟偏差、库存、开售时间、限流（429）与按顺序指定的 retcode 场景。
+
+单独运行（在 pyqt_app 目录下）：
+    python -m benchmarks.mock_mall [--port 8650] [--latency-ms 20] [--jitter-ms 5] [--skew-ms 0]
+                                   [--stock 10] [--sale-in 60] [--rate-limit 0] [--goods 40]
+然后把输出的 api_overrides 写入 data/config.json，应用即改为访问本地替身。
+"""
+import argparse
+import asyncio
+import copy
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from urllib.parse import parse_qs, urlsplit
+from benchmarks.common import Request, Response, StandInServer
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# 替身可替代的商城域名（写入 api_overrides）
+MALL_HOSTS = (
+    "https://api-takumi.miyoushe.com",
+    "https://api-takumi.mihoyogift.com",
+    "https://passport-api.miyoushe.com",
+)
+
+class Fixtures:
+    """录制的响应（benchmarks/fixtures/*.json），每次取用返回深拷贝"""
+
+    def __init__(self, directory: Path = FIXTURES_DIR):
+        self.directory = Path(directory)
+        self._cache: Dict[str, Dict] = {}
+
+    def get(self, name: str) -> Dict:
+        if name not in self._cache:
+            with open(self.directory / f"{name}.json", "r", encoding="utf-8") as f:
+                self._cache[name] = json.load(f)
+        return copy.deepcopy(self._cache[name])
+
+    def save(self, name: str, data: Dict):
+        """保存（录制）一份响应"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        self._cache.pop(name, None)
+
+def _json(data: Dict, status: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    out = {"Content-Type": "application/json; charset=utf-8"}
+    out.update(headers or {})
+    return status, out, json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+class MockMall:
+    """商城替身
+
+    stock: 库存（None 为不限）
+    sale_time: 开售时刻（服务器时钟的 Unix 时间），之前的兑换返回“未开始”
+    rate_limit / rate_window: 每个窗口内最多处理多少个兑换请求，超出返回 HTTP 429
+    script: 按兑换请求到达顺序指定的响应，元素为 exchange.json 中的场景名、
+        {"status": 429} 或 {"retcode": ..., "message": ...}；用完后按库存逻辑处理
+    goods_count: 商品列表总数（按录制的商品轮换生成），用于分页测试
+    qr_polls: 扫码登录在第几次查询时确认
+    """
+
+    def __init__(self, fixtures: Optional[Fixtures] = None, stock: Optional[int] = None,
+                 sale_time: Optional[float] = None, rate_limit: int = 0, rate_window: float = 1.0,
+                 script: Optional[List[Union[str, Dict]]] = None, goods_count: Optional[int] = None,
+                 qr_polls: int = 2, points: Optional[int] = None):
+        self.fixtures = fixtures or Fixtures()
+        self.stock = stock
+        self.sale_time = sale_time
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.script = list(script or [])
+        self.goods_count = goods_count
+        self.qr_polls = qr_polls
+        self.points = points
+        self.server: Optional[StandInServer] = None
+        self.exchanges: List[Dict] = []  # 每个兑换请求的处理结果
+        self._exchanged = set()  # 已兑换成功的 (uid, goods_id)
+        self._window: List[float] = []
+        self._qr: Dict[str, int] = {}
+        self._routes = {
+            ("GET", "/mall/v1/web/goods/list"): self.goods_list,
+            ("POST", "/mall/v1/web/goods/exchange"): self.exchange,
+            ("GET", "/common/homutreasure/v1/web/user/point"): self.user_point,
+            ("GET", "/account/address/list"): self.address_list,
+            ("POST", "/account/ma-cn-passport/web/createQRLogin"): self.qr_create,
+            ("POST", "/account/ma-cn-passport/web/queryQRLoginStatus"): self.qr_status,
+        }
+
+    def make_server(self, **kwargs) -> StandInServer:
+        """创建承载本替身的服务器（参数同 StandInServer）"""
+        self.server = StandInServer(handler=self.handle, **kwargs)
+        return self.server
+
+    def overrides(self) -> Dict[str, str]:
+        """把全部商城域名指向本替身的 api_overrides 配置"""
+        return {host: self.server.base_url for host in MALL_HOSTS}
+
+    def handle(self, request: Request) -> Response:
+        parts = urlsplit(request.path)
+        route = self._routes.get((request.method, parts.path))
+        if route is None:
+            if request.method == "HEAD":
+                return 200, {}, b""
+            return _json({"retcode": -1, "message": "not found", "data": None}, status=404)
+        return route(request, {k: v[0] for k, v in parse_qs(parts.query).items()})
+
+    @staticmethod
+    def _cookie(request: Request) -> Dict[str, str]:
+        cookie = {}
+        for part in request.headers.get("cookie", "").replace(";", "; ").split("; "):
+            if "=" in part:
+                k, v = part.strip().split("=", 1)
+                cookie[k] = v
+        return cookie
+
+    def _server_time(self, request: Request) -> float:
+        return self.server.server_time(request.arrived_ns) if self.server else time.time()
+
+    # 商品
+    def goods_list(self, request: Request, query: Dict) -> Response:
+        data = self.fixtures.get("goods_list")
+        items = data["data"]["list"]
+        if self.goods_count is not None:
+            base = int(items[0]["goods_id"])
+            items = [dict(items[i % len(items)], goods_id=str(base + i), goods_name=f"{items[i % len(items)]['goods_name']} #{i + 1}")
+                     for i in range(self.goods_count)]
+        game = query.get("game", "")
+        if game:
+            items = [g for g in items if g.get("game") == game] or items
+        page, size = int(query.get("page", 1)), int(query.get("page_size", 20))
+        data["data"]["list"] = items[(page - 1) * size:page * size]
+        data["data"]["total"] = len(items)
+        return _json(data)
+
+    # 兑换
+    def exchange(self, request: Request, query: Dict) -> Response:
+        scenarios = self.fixtures.get("exchange")
+        now = self._server_time(request)
+        try:
+            payload = json.loads(request.body or b"{}")
+        except ValueError:
+            payload = {}
+        uid = self._cookie(request).get("account_id") or payload.get("uid")
+
+        if self.script:
+            step = self.script.pop(0)
+            name = step if isinstance(step, str) else None
+            if isinstance(step, dict) and "retcode" not in step:
+                return self._record(request, step.get("status", 429), None, _json({}, status=step.get("status", 429)))
+            body = scenarios[name] if name else {"data": None, **step}
+            return self._record(request, 200, body.get("retcode"), _json(body))
+
+        if self.rate_limit:
+            self._window = [t for t in self._window if now - t < self.rate_window]
+            if len(self._window) >= self.rate_limit:
+                return self._record(request, 429, None, _json({}, status=429))
+            self._window.append(now)
+
+        if not uid:
+            body = scenarios["not_logged_in"]
+        elif self.sale_time is not None and now < self.sale_time:
+            body = scenarios["not_started"]
+        elif (uid, payload.get("goods_id")) in self._exchanged:
+            body = scenarios["already_exchanged"]
+        elif self.stock is not None and self.stock <= 0:
+            body = scenarios["sold_out"]
+        else:
+            if self.stock is not None:
+                self.stock -= 1
+            self._exchanged.add((uid, payload.get("goods_id")))
+            body = scenarios["success"]
+            body["data"]["order_sn"] = f"{int(now * 1000)}{len(self._exchanged):04d}"
+        return self._record(request, 200, body["retcode"], _json(body))
+
+    def _record(self, request: Request, status: int, retcode: Optional[int], response: Response) -> Response:
+        self.exchanges.append({"arrived_ns": request.arrived_ns, "server_time": self._server_time(request),
+                               "status": status, "retcode": retcode})
+        return response
+
+    # 账号
+    def user_point(self, request: Request, query: Dict) -> Response:
+        if "account_id" not in self._cookie(request) and "ltuid" not in self._cookie(request):
+            return _json(self.fixtures.get("exchange")["not_logged_in"])
+        data = self.fixtures.get("user_point")
+        if self.points is not None:
+            data["data"]["points"] = self.points
+        return _json(data)
+
+    def address_list(self, request: Request, query: Dict) -> Response:
+        if "account_id" not in self._cookie(request) and "ltuid" not in self._cookie(request):
+            return _json(self.fixtures.get("exchange")["not_logged_in"])
+        return _json(self.fixtures.get("address_list"))
+
+    # 扫码登录
+    def qr_create(self, request: Request, query: Dict) -> Response:
+        data = self.fixtures.get("qr_login")["create"]
+        ticket = uuid.uuid4().hex
+        data["data"]["ticket"] = ticket
+        data["data"]["url"] += ticket
+        self._qr[ticket] = 0
+        return _json(data)
+
+    def qr_status(self, request: Request, query: Dict) -> Response:
+        fixture = self.fixtures.get("qr_login")
+        try:
+            ticket = json.loads(request.body or b"{}").get("ticket")
+        except ValueError:
+            ticket = None
+        if ticket not in self._qr:
+            return _json(fixture["expired"])
+        self._qr[ticket] += 1
+        if self._qr[ticket] < self.qr_polls:
+            return _json(fixture["created"])
+        del self._qr[ticket]
+        return _json(fixture["confirmed"], headers={"Set-Cookie": fixture["set_cookie"]})
+
+async def main(args):
+    mall = MockMall(
+        stock=args.stock,
+        sale_time=time.time() + args.skew_ms / 1000 + args.sale_in if args.sale_in is not None else None,
+        rate_limit=args.rate_limit,
+        goods_count=args.goods,
+    )
+    server = mall.make_server(host=args.host, port=args.port, latency=args.latency_ms / 1000,
+                              jitter=args.jitter_ms / 1000, clock_skew=args.skew_ms / 1000)
+    await server.start()
+    print(f"商城替身已启动: {server.base_url}")
+    print(json.dumps({"api_overrides": mall.overrides()}, ensure_ascii=False, indent=4))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8650)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--skew-ms", type=float, default=0.0, help="替身时钟相对本机的偏差")
+    parser.add_argument("--stock", type=int, default=None)
+    parser.add_argument("--sale-in", type=float, default=None, help="多少秒后开售（不设置则立即可兑换）")
+    parser.add_argument("--rate-limit", type=int, default=0, help="每秒最多处理的兑换请求数（0 为不限）")
+    parser.add_argument("--goods", type=int, default=None, help="商品列表总数")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
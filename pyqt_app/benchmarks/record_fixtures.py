@@ -0,0 +1,62 @@
+"""录制商城响应 - 调用线上只读接口，把脱敏后的响应保存为商城替身的回放数据
+
+只录制商品列表、米游币与地址列表；兑换与扫码登录有副作用，其回放数据按抓包格式手工维护。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.record_fixtures --cookie "account_id=...; cookie_token=..." [--game hk4e]
+"""
+import argparse
+import json
+from benchmarks.mock_mall import Fixtures
+from utils.http_client import get_http_client
+
+GOODS_URL = "https://api-takumi.mihoyogift.com/mall/v1/web/goods/list"
+POINT_URL = "https://api-takumi.miyoushe.com/common/homutreasure/v1/web/user/point"
+ADDRESS_URL = "https://api-takumi.mihoyogift.com/account/address/list"
+
+# 地址中需要脱敏的字段
+ADDRESS_FIELDS = ('connect_name', 'connect_mobile', 'connect_areacode', 'province_name', 'city_name',
+                  'county_name', 'addr_ext')
+
+def redact_address(address: dict) -> dict:
+    out = dict(address)
+    for key in ADDRESS_FIELDS:
+        if out.get(key):
+            out[key] = "*" * 4
+    out['id'] = "100001"
+    return out
+
+def main(args):
+    client = get_http_client()
+    fixtures = Fixtures()
+    headers = {"Cookie": args.cookie}
+
+    goods = client.get(GOODS_URL, params={"app_id": 1, "point_sn": "myb", "page_size": 20, "page": 1,
+                                          "game": args.game})
+    if goods and goods.get('retcode') == 0:
+        fixtures.save("goods_list", goods)
+        print(f"商品列表: {len(goods['data'].get('list', []))} 件")
+    else:
+        print(f"商品列表录制失败: {goods}")
+
+    point = client.get(POINT_URL, params={"app_id": 1, "point_sn": "myb"}, headers=headers)
+    if point and point.get('retcode') == 0:
+        point['data']['points'] = 12345
+        fixtures.save("user_point", point)
+        print("米游币: 已录制")
+    else:
+        print(f"米游币录制失败: {point}")
+
+    address = client.get(ADDRESS_URL, headers=headers)
+    if address and address.get('retcode') == 0:
+        address['data']['list'] = [redact_address(a) for a in address['data'].get('list', [])[:1]]
+        fixtures.save("address_list", address)
+        print("地址列表: 已录制")
+    else:
+        print(f"地址列表录制失败: {json.dumps(address, ensure_ascii=False)}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cookie", required=True)
+    parser.add_argument("--game", default="")
+    main(parser.parse_args())
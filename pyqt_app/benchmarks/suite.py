@@ -0,0 +1,265 @@
+"""基准测试套件：触发精度、突发吞吐、商品列表分页、存储读写与启动时间，并与基线比较
+
+全部离线运行：兑换与商品接口由本地商城替身提供，数据写入临时目录，不影响 data/。
+结果以 JSON 输出；指定基线时逐项比较，超出容差的指标记为回退，退出码为 1。
+
+用法（在 pyqt_app 目录下）：
+    python -m benchmarks.suite [--only fire,burst,goods,storage,startup] [--output result.json]
+                               [--baseline benchmarks/baseline.json] [--save-baseline] [--tolerance 0.3]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+from benchmarks.common import NtpStandIn, ServerThread, bench_clock, bench_task_config, percentile
+from benchmarks.mock_mall import MockMall
+from core.clock_service import ClockService
+from utils import storage as storage_module
+from utils.storage import Storage
+
+APP_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+# 指标的绝对容差下限：过小的数值（如亚毫秒级误差）按比例比较没有意义
+ABS_FLOOR = {"ms": 1.0, "per_s": 0.0, "kb": 0.0}
+
+def metric(value: float, unit: str, better: str = "lower") -> Dict:
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+# 触发精度与突发吞吐
+def _exchange_config(mall: MockMall, clock: ClockService, name: str, count: int, seconds: float = 2.0) -> Dict:
+    target = clock.now() + timedelta(seconds=seconds)
+    return bench_task_config(name, target, mall.server.base_url, count=count, warmup_lead=1, fire_lead_ms=0)
+
+async def _run_exchange(mall: MockMall, clock: ClockService, name: str, count: int) -> Dict:
+    from core.exchange import ExchangeTask
+    config = _exchange_config(mall, clock, name, count)
+    task = ExchangeTask(config)
+    start = len(mall.exchanges)
+    await task.run()
+    arrivals = [e["arrived_ns"] for e in mall.exchanges[start:]]
+    shots = task.result.get("shots", [])
+    fired = [s["timeline_ns"]["fired"] for s in shots if s["timeline_ns"].get("fired") is not None]
+    completed = [s["timeline_ns"]["completed"] for s in shots if s["timeline_ns"].get("completed") is not None]
+    return {
+        "errors_ms": [abs(e) for e in task.result.get("shot_errors_ms", [])],
+        "spread_ms": (max(arrivals) - min(arrivals)) / 1e6 if arrivals else 0.0,
+        "burst_s": (max(completed) - min(fired)) / 1e9 if fired and completed else None,
+        "completed": len(completed),
+    }
+
+async def _with_mall(body: Callable):
+    """在商城替身上运行；兑换始终返回“未开始”（非终止结果），每次运行都发完全部请求"""
+    ntp = await NtpStandIn().start()
+    clock = bench_clock([ntp.address])
+    await clock.sync.sync()
+    mall = MockMall(sale_time=time.time() + 86400)
+    server = mall.make_server(latency=0.005)
+    await server.start()
+    try:
+        return await body(mall, clock)
+    finally:
+        await server.stop()
+        clock.stop()
+        await ntp.stop()
+
+def bench_fire(runs: int = 5, count: int = 5) -> Dict:
+    """ExchangeTask 触发误差与到达离散度"""
+    async def body(mall, clock):
+        errors, spreads = [], []
+        for i in range(runs):
+            r = await _run_exchange(mall, clock, f"fire-{i}", count)
+            errors.extend(r["errors_ms"])
+            spreads.append(r["spread_ms"])
+        return {
+            "fire_error_p50": metric(percentile(errors, 50), "ms"),
+            "fire_error_p90": metric(percentile(errors, 90), "ms"),
+            "arrival_spread_p50": metric(percentile(spreads, 50), "ms"),
+        }
+    return asyncio.run(_with_mall(body))
+
+def bench_burst(counts: List[int] = (1, 10, 50), runs: int = 3) -> Dict:
+    """不同请求次数下的突发吞吐（首个请求发出到最后一个响应完成，取多次运行的中位数）"""
+    async def body(mall, clock):
+        results = {}
+        for count in counts:
+            durations = []
+            for i in range(runs):
+                r = await _run_exchange(mall, clock, f"burst-{count}-{i}", count)
+                if r["burst_s"] and r["completed"] == count:
+                    durations.append(r["burst_s"])
+            if durations:
+                median = statistics.median(durations)
+                results[f"throughput_count_{count}"] = metric(count / median, "per_s", "higher")
+                results[f"burst_duration_count_{count}"] = metric(median * 1000, "ms")
+        return results
+    return asyncio.run(_with_mall(body))
+
+# 商品列表
+def bench_goods(goods: int = 1000, repeats: int = 3) -> Dict:
+    """GoodsService.get_goods_list 翻页拉取整个商品列表"""
+    from core.goods import GoodsService
+    mall = MockMall(goods_count=goods)
+    server = mall.make_server(latency=0.002)
+    with tempfile.TemporaryDirectory() as tmp, ServerThread(server):
+        store = Storage(Path(tmp))
+        store.save_config({'cookies': {}, 'device_id': '', 'api_overrides': mall.overrides()})
+        previous, storage_module._storage = storage_module._storage, store
+        try:
+            service = GoodsService()
+            durations = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                items = service.get_goods_list('')
+                durations.append(time.perf_counter() - start)
+            assert items is not None and len(items) == goods, f"商品数量不符: {len(items or [])}"
+        finally:
+            storage_module._storage = previous
+    pages = -(-goods // 20)
+    median = statistics.median(durations)
+    return {
+        "goods_list_total": metric(median * 1000, "ms"),
+        "goods_list_per_page": metric(median * 1000 / pages, "ms"),
+    }
+
+# 存储
+def bench_storage(items: int = 5000, repeats: int = 5) -> Dict:
+    """大任务列表与心愿单下 Storage 的读写耗时"""
+    task = {
+        "name": "任务", "time": "2026-01-01 10:00:00", "count": 5, "url": "https://example.invalid/exchange",
+        "payload": {"app_id": 1, "point_sn": "myb", "goods_id": "2026010100001", "exchange_num": 1,
+                    "uid": "100000001", "region": "cn_gf01", "game_biz": "hk4e_cn", "address_id": "100001"},
+        "headers": {"Cookie": "account_id=100000001; cookie_token=" + "x" * 40, "x-rpc-device_id": "d" * 32},
+    }
+    wish = {"id": "2026010100001", "name": "商品", "price": 100, "time": "2026-01-01 10:00:00",
+            "icon": "https://example.invalid/icon.png", "type": 2}
+    tasks = [dict(task, name=f"任务{i}") for i in range(items)]
+    wishlist = [dict(wish, id=str(i)) for i in range(items)]
+    timings: Dict[str, List[float]] = {"save_tasks": [], "get_tasks": [], "add_task": [],
+                                       "save_wishlist": [], "get_wishlist": [], "add_to_wishlist": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Storage(Path(tmp))
+        for _ in range(repeats):
+            for name, call in (
+                ("save_tasks", lambda: store.save_tasks(tasks)),
+                ("get_tasks", store.get_tasks),
+                ("add_task", lambda: store.add_task(dict(task, name="新任务"))),
+                ("save_wishlist", lambda: store.save_wishlist(wishlist)),
+                ("get_wishlist", store.get_wishlist),
+                ("add_to_wishlist", lambda: store.add_to_wishlist(wish)),
+            ):
+                start = time.perf_counter()
+                call()
+                timings[name].append(time.perf_counter() - start)
+        size_kb = store.tasks_file.stat().st_size / 1024
+    results = {f"storage_{name}": metric(statistics.median(values) * 1000, "ms") for name, values in timings.items()}
+    results["storage_tasks_file_kb"] = metric(size_kb, "kb")
+    return results
+
+# 启动时间
+STARTUP_PROBE = """
+import sys, time
+from pathlib import Path
+start = time.perf_counter()
+from utils import storage
+storage._storage = storage.Storage(Path(sys.argv[1]))
+import main
+from PyQt6.QtWidgets import QApplication
+from ui.main_window import MainWindow
+imported = time.perf_counter()
+app = QApplication(sys.argv)
+window = MainWindow()
+window.show()
+app.processEvents()
+print(imported - start, time.perf_counter() - start, flush=True)
+"""
+
+def bench_startup(repeats: int = 3) -> Dict:
+    """main.py 启动时间（导入模块、创建主窗口并显示，离屏渲染）"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    totals, imports, windows = [], [], []
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as tmp:
+            spawn = time.perf_counter()
+            proc = subprocess.Popen([sys.executable, "-c", STARTUP_PROBE, tmp], cwd=APP_DIR, env=env,
+                                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            line = proc.stdout.readline()
+            totals.append(time.perf_counter() - spawn)
+            proc.kill()
+            proc.wait()
+        imported, shown = (float(v) for v in line.split())
+        imports.append(imported)
+        windows.append(shown)
+    return {
+        "startup_total": metric(statistics.median(totals) * 1000, "ms"),
+        "startup_imports": metric(statistics.median(imports) * 1000, "ms"),
+        "startup_window": metric(statistics.median(windows) * 1000, "ms"),
+    }
+
+BENCHMARKS = {
+    "fire": bench_fire,
+    "burst": bench_burst,
+    "goods": bench_goods,
+    "storage": bench_storage,
+    "startup": bench_startup,
+}
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """逐项与基线比较，返回每个指标的比较结果"""
+    rows = []
+    for group, metrics in results.items():
+        for name, current in metrics.items():
+            base = baseline.get(group, {}).get(name)
+            if base is None:
+                continue
+            old, new = base["value"], current["value"]
+            allowed = max(abs(old) * tolerance, ABS_FLOOR.get(current["unit"], 0.0))
+            delta = new - old if current["better"] == "lower" else old - new
+            rows.append({
+                "metric": f"{group}.{name}", "baseline": old, "current": new, "unit": current["unit"],
+                "change": round((new - old) / old, 4) if old else None,
+                "regressed": delta > allowed,
+            })
+    return rows
+
+def main(args):
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        storage_module._storage = Storage(Path(tmp))  # 运行期间的数据写入临时目录
+        for name in selected:
+            print(f"运行 {name} ...", file=sys.stderr)
+            results[name] = BENCHMARKS[name]()
+
+    report = {"python": sys.version.split()[0], "platform": sys.platform, "results": results}
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"基线已保存: {baseline_path}", file=sys.stderr)
+    elif baseline_path.exists():
+        rows = compare(results, json.loads(baseline_path.read_text(encoding="utf-8")), args.tolerance)
+        report["comparison"] = rows
+        report["regressions"] = [r["metric"] for r in rows if r["regressed"]]
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    print(text)
+    return 1 if report.get("regressions") else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", default="", help="只运行指定项（逗号分隔）：" + ",".join(BENCHMARKS))
+    parser.add_argument("--output", default="", help="结果另存为 JSON 文件")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="相对基线允许的变差比例")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,51 @@
+"""突发策略模块 - 决定每次请求相对目标时刻的发送偏移"""
+from typing import Callable, Dict, List, Optional
+
+def _simultaneous(count: int, options: Dict) -> List[float]:
+    """全部在目标时刻同时发出"""
+    return [0.0] * count
+
+def _uniform(count: int, options: Dict) -> List[float]:
+    """在 [start, start + window] 内均匀分布"""
+    start = options.get('start_ms', 0) / 1000
+    window = options.get('window_ms', 100) / 1000
+    if count == 1:
+        return [start]
+    return [start + window * i / (count - 1) for i in range(count)]
+
+def _front_loaded(count: int, options: Dict) -> List[float]:
+    """前密后疏：偏移按 (i / (n - 1)) ** power 分布，大部分请求集中在窗口前段"""
+    start = options.get('start_ms', 0) / 1000
+    window = options.get('window_ms', 100) / 1000
+    power = options.get('power', 2)
+    if count == 1:
+        return [start]
+    return [start + window * (i / (count - 1)) ** power for i in range(count)]
+
+def _explicit(count: int, options: Dict) -> List[float]:
+    """显式给出每次请求的偏移（毫秒），请求次数以列表长度为准"""
+    offsets = options.get('offsets_ms') or [0]
+    return [float(ms) / 1000 for ms in offsets]
+
+# 策略表：名称 -> (请求次数, 选项) -> 偏移列表（秒），可按需注册新策略
+BURST_STRATEGIES: Dict[str, Callable[[int, Dict], List[float]]] = {
+    'simultaneous': _simultaneous,
+    'uniform': _uniform,
+    'front_loaded': _front_loaded,
+    'explicit': _explicit,
+}
+
+BURST_STRATEGY_NAMES = {
+    'simultaneous': '同时发出',
+    'uniform': '均匀分布',
+    'front_loaded': '前置密集',
+    'explicit': '自定义偏移',
+}
+
+def burst_offsets(burst: Optional[Dict], count: int) -> List[float]:
+    """按任务配置中的 burst 字段计算各次请求的发送偏移（秒，已排序）"""
+    burst = burst or {}
+    strategy = burst.get('strategy', 'simultaneous')
+    if strategy not in BURST_STRATEGIES:
+        raise ValueError(f"未知的突发策略: {strategy}")
+    return sorted(BURST_STRATEGIES[strategy](count, burst))
@@ -0,0 +1,195 @@
+"""时钟服务模块 - 进程内唯一的后台校时守护线程"""
+import asyncio
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from core.clock_sync import ClockSync, ClockEstimate
+from core.timebase import Timebase, get_timebase
+from utils.storage import get_storage
+from utils.logger import get_logger
+
+logger = get_logger()
+
+class ClockService:
+    """进程级时钟服务
+
+    后台线程持续校准同一个 ClockSync，所有任务订阅并共享这份估计；
+    任务读取校正时间只做内存计算，不发起任何网络请求。
+    最近一次的有效估计保存在 data/clock.json，重启后可立即使用。
+    """
+
+    NEAR_WINDOW = 300  # 有任务在 5 分钟内触发时加密校准
+    NEAR_INTERVAL = 5  # 临近触发时的校准间隔（秒）
+    FAR_INTERVAL = 30  # 有订阅但尚早时的校准间隔（秒）
+    IDLE_INTERVAL = 300  # 无订阅时的校准间隔（秒）
+    STATE_MAX_AGE = 6 * 3600  # 保存的估计最长可用多久（秒）
+    STATE_DRIFT_BOUND = 50e-6  # 离线期间按 50 ppm 放大误差
+
+    def __init__(self, servers=None, storage=None, timebase: Optional[Timebase] = None,
+                 sync: Optional[ClockSync] = None):
+        self.storage = storage or get_storage()
+        self.timebase = timebase or get_timebase()
+        # sync 可传入自定义的同步器（如多进程模式下估计存放在共享内存中的 SharedClockSync）
+        self.sync = sync or ClockSync(servers or self.storage.get_ntp_servers() or None, timebase=self.timebase)
+        self._targets: Dict[int, datetime] = {}
+        self._next_token = 0
+        self._lock = threading.Lock()
+        self._thread = None  # 后台线程（虚拟时间下为同一事件循环上的任务）
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._load_state()
+
+    # 订阅管理
+    def subscribe(self, target: datetime) -> int:
+        """登记一个目标时刻，返回订阅凭据"""
+        with self._lock:
+            self._next_token += 1
+            token = self._next_token
+            self._targets[token] = target
+        self.start()
+        self._wake_up()
+        return token
+
+    def unsubscribe(self, token: int):
+        """取消订阅"""
+        with self._lock:
+            self._targets.pop(token, None)
+
+    @property
+    def subscribers(self) -> int:
+        """当前订阅数"""
+        return len(self._targets)
+
+    # 生命周期
+    def start(self):
+        """启动后台校时线程（已启动则忽略）"""
+        with self._lock:
+            if self._thread is not None and self._alive():
+                return
+            self._stopping = False
+            self._thread = self.timebase.start_background(self._main, name="clock-service")
+
+    def _alive(self) -> bool:
+        if isinstance(self._thread, threading.Thread):
+            return self._thread.is_alive()
+        return not self._thread.done()
+
+    def stop(self):
+        """停止后台校时线程"""
+        self._stopping = True
+        self._wake_up()
+
+    def _wake_up(self):
+        """唤醒后台线程立即重新评估校准节奏"""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass
+
+    async def _main(self):
+        """后台循环：校准 -> 保存 -> 按最近的目标时刻决定下次校准间隔"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        try:
+            while not self._stopping:
+                if await self.sync.sync():
+                    self._save_state()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self._interval())
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+        finally:
+            self._loop = None
+            self._wake = None
+
+    def _interval(self) -> float:
+        """按最近的目标时刻计算校准间隔"""
+        with self._lock:
+            targets = list(self._targets.values())
+        if not targets:
+            return self.IDLE_INTERVAL
+        now = self.now()
+        nearest = min((t - now).total_seconds() for t in targets)
+        return self.NEAR_INTERVAL if nearest <= self.NEAR_WINDOW else self.FAR_INTERVAL
+
+    # 持久化
+    def _save_state(self):
+        """保存当前估计（以相对系统时间的偏移表示，单调时钟跨进程无意义）"""
+        self.storage.save_clock_state({
+            "offset": self.sync.offset_to_system(),
+            "error": self.sync.error_bound,
+            "saved_at": self.timebase.wall_time(),
+        })
+
+    def _load_state(self):
+        """载入上次保存的估计，误差按离线时长放大"""
+        state = self.storage.get_clock_state()
+        try:
+            age = self.timebase.wall_time() - float(state["saved_at"])
+            offset = float(state["offset"])
+            error = float(state["error"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if not 0 <= age <= self.STATE_MAX_AGE:
+            return
+        ref_ns = self.timebase.mono_ns()
+        self.sync.estimate = ClockEstimate(
+            offset=self.timebase.wall_time() + offset - ref_ns / 1e9,
+            ref_ns=ref_ns,
+            drift=0.0,
+            error=error + age * self.STATE_DRIFT_BOUND,
+        )
+        logger.info(f"已载入保存的时钟偏移: {offset:.3f} 秒（{age:.0f} 秒前）")
+
+    # 读取接口（纯内存计算）
+    @property
+    def synced(self) -> bool:
+        return self.sync.synced
+
+    @property
+    def error_bound(self) -> float:
+        return self.sync.error_bound
+
+    async def wait_synced(self, timeout: float = 10) -> bool:
+        """等待首次得到可用估计"""
+        deadline = self.timebase.mono_ns() + int(timeout * 1e9)
+        while not self.sync.synced and self.timebase.mono_ns() < deadline:
+            await asyncio.sleep(0.05)
+        return self.sync.synced
+
+    def now(self) -> datetime:
+        return self.sync.now()
+
+    def unix_time(self, mono_ns: Optional[int] = None) -> float:
+        return self.sync.unix_time(mono_ns)
+
+    def mono_ns_for(self, target: datetime) -> int:
+        return self.sync.mono_ns_for(target)
+
+    def offset_at(self, mono_ns: Optional[int] = None) -> float:
+        return self.sync.offset_at(mono_ns)
+
+    def offset_to_system(self) -> float:
+        return self.sync.offset_to_system()
+
+# 全局单例
+_clock_service = None
+
+def get_clock_service() -> ClockService:
+    """获取时钟服务实例"""
+    global _clock_service
+    if _clock_service is None:
+        _clock_service = ClockService()
+    return _clock_service
+
+def set_clock_service(service: Optional[ClockService]):
+    """替换进程内共享的时钟服务（如工作进程中的共享内存时钟、基准测试中的独立实例）
+
+    None 表示下次 get_clock_service() 时按默认配置重新创建；被替换的实例由调用方负责停止
+    """
+    global _clock_service
+    _clock_service = service
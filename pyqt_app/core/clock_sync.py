@@ -0,0 +1,192 @@
+"""时钟同步模块 - 多服务器 NTP 采样、样本筛选与漂移预测"""
+import asyncio
+import statistics
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Deque, List, Optional, Sequence, Tuple
+import ntplib
+from core.timebase import Timebase, get_timebase
+from utils.logger import get_logger
+
+logger = get_logger()
+
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+@dataclass
+class ClockSample:
+    """一次 NTP 往返的测量结果
+
+    offset 表示“服务器 Unix 时间 - 本机单调时钟”，单位秒；
+    mono_ns 为该样本对应的单调时钟时刻（发送与接收的中点）。
+    """
+    server: str
+    mono_ns: int
+    offset: float
+    delay: float  # 往返时延（秒），已扣除服务器处理时间
+
+@dataclass(frozen=True)
+class ClockEstimate:
+    """偏移估计快照（不可变，整体替换，可跨线程读取）"""
+    offset: float  # ref_ns 时刻的偏移（秒）
+    ref_ns: int  # 参考单调时刻
+    drift: float  # 漂移率（秒/秒）
+    error: float  # 偏移误差估计（秒）
+
+class ClockSync:
+    """时钟同步器
+
+    同时向多个服务器取样，保留最近 window 个样本，只用时延最小的 best 个
+    估计偏移（时延越小，中点假设的误差越小）。样本跨度足够时拟合线性漂移，
+    把偏移外推到任意单调时刻（如触发瞬间）。
+    """
+
+    DEFAULT_SERVERS = ("ntp.aliyun.com", "ntp.tencent.com", "cn.pool.ntp.org")
+    MAX_DRIFT = 500e-6  # 漂移率上限（500 ppm，与 NTP 一致）
+    MIN_DRIFT_SPAN = 30  # 拟合漂移所需的最短样本跨度（秒）
+    NEAR_DELAY = 0.001  # 不拟合漂移时，时延不超过最小时延两倍加此值的样本才参与估计（秒）
+
+    def __init__(self, servers: Optional[Sequence] = None, window: int = 32,
+                 best: int = 8, timeout: float = 2, timebase: Optional[Timebase] = None):
+        # 服务器可写成 "host" 或 "host:port"
+        self.servers = [self._parse_server(s) for s in (servers or self.DEFAULT_SERVERS)]
+        self.samples: Deque[ClockSample] = deque(maxlen=window)
+        self.best = best
+        self.timeout = timeout
+        self.estimate: Optional[ClockEstimate] = None
+        self.timebase = timebase or get_timebase()  # 单调时钟、系统时间与 NTP 往返的来源
+
+    @staticmethod
+    def _parse_server(server) -> Tuple[str, int]:
+        if isinstance(server, (tuple, list)):
+            return server[0], int(server[1])
+        host, sep, port = str(server).rpartition(":")
+        if sep and port.isdigit() and ":" not in host:
+            return host, int(port)
+        return str(server), 123
+
+    @property
+    def synced(self) -> bool:
+        """是否已有可用的估计"""
+        return self.estimate is not None
+
+    @property
+    def drift(self) -> float:
+        """估计的漂移率（秒/秒）"""
+        return self.estimate.drift if self.estimate else 0.0
+
+    @property
+    def error_bound(self) -> float:
+        """当前偏移估计的误差上界（秒），未同步时为 inf"""
+        return self.estimate.error if self.estimate else float("inf")
+
+    async def query(self, host: str, port: int = 123) -> Optional[ClockSample]:
+        """向单个服务器发起一次 NTP 请求"""
+        try:
+            cookie = ntplib.system_to_ntp_time(self.timebase.wall_time())
+            packet = ntplib.NTPPacket(mode=3, version=3, tx_timestamp=cookie)
+            data, t1, t4 = await self.timebase.ntp_roundtrip(host, port, packet.to_data(), self.timeout)
+
+            stats = ntplib.NTPStats()
+            stats.from_data(data)
+            if abs(stats.orig_timestamp - cookie) > 1e-6:
+                raise ntplib.NTPException("应答与请求不匹配")
+            if stats.stratum == 0 or stats.leap == 3:
+                raise ntplib.NTPException("服务器未同步")
+
+            t2 = ntplib.ntp_to_system_time(stats.recv_timestamp)
+            t3 = ntplib.ntp_to_system_time(stats.tx_timestamp)
+            offset = ((t2 - t1 / 1e9) + (t3 - t4 / 1e9)) / 2
+            delay = (t4 - t1) / 1e9 - (t3 - t2)
+            return ClockSample(f"{host}:{port}", (t1 + t4) // 2, offset, max(delay, 0.0))
+        except (OSError, asyncio.TimeoutError, ntplib.NTPException) as e:
+            logger.warning(f"NTP 请求失败 {host}:{port}: {e}")
+            return None
+
+    async def sync(self) -> int:
+        """并发向所有服务器取样并更新估计，返回本轮有效样本数"""
+        results = await asyncio.gather(*(self.query(h, p) for h, p in self.servers))
+        fresh = [s for s in results if s is not None]
+        for sample in fresh:
+            self.add_sample(sample)
+        if fresh:
+            logger.info(
+                f"NTP 时间校准成功，有效样本 {len(fresh)}/{len(self.servers)}，"
+                f"偏移: {self.offset_to_system():.3f} 秒，误差: ±{self.error_bound * 1000:.1f} ms"
+            )
+        else:
+            logger.error("获取 NTP 时间失败：所有服务器均无应答")
+        return len(fresh)
+
+    def add_sample(self, sample: ClockSample):
+        """加入一个样本并重新估计"""
+        self.samples.append(sample)
+        self._estimate()
+
+    def _filtered(self) -> List[ClockSample]:
+        """挑出时延最小的若干样本"""
+        return sorted(self.samples, key=lambda s: s.delay)[:self.best]
+
+    def _estimate(self):
+        """用筛选后的样本估计偏移与漂移"""
+        chosen = self._filtered()
+        if not chosen:
+            return
+        newest = max(s.mono_ns for s in self.samples)
+        span = (max(s.mono_ns for s in chosen) - min(s.mono_ns for s in chosen)) / 1e9
+
+        drift = 0.0
+        used = chosen
+        if len(chosen) >= 3 and span >= self.MIN_DRIFT_SPAN:
+            # 以时延倒数为权重的线性回归：offset = a + b * (t - ref)
+            weights = [1 / max(s.delay, 1e-4) for s in chosen]
+            xs = [(s.mono_ns - newest) / 1e9 for s in chosen]
+            total = sum(weights)
+            mx = sum(w * x for w, x in zip(weights, xs)) / total
+            my = sum(w * s.offset for w, s in zip(weights, chosen)) / total
+            sxx = sum(w * (x - mx) ** 2 for w, x in zip(weights, xs))
+            sxy = sum(w * (x - mx) * (s.offset - my) for w, x, s in zip(weights, xs, chosen))
+            if sxx > 0:
+                drift = max(-self.MAX_DRIFT, min(self.MAX_DRIFT, sxy / sxx))
+            offset = my - drift * mx
+        else:
+            # 样本不足时只信任时延接近最小值的样本（时延大的样本中点假设误差大，不能参与平均）
+            limit = chosen[0].delay * 2 + self.NEAR_DELAY
+            used = [s for s in chosen[:3] if s.delay <= limit]
+            offset = statistics.median(s.offset for s in used)
+
+        residuals = [abs(s.offset - (offset + drift * (s.mono_ns - newest) / 1e9)) for s in used]
+        # 误差上界：最小半往返时延 + 残差中位数
+        error = chosen[0].delay / 2 + statistics.median(residuals)
+        self.estimate = ClockEstimate(offset, newest, drift, error)
+
+    def offset_at(self, mono_ns: Optional[int] = None) -> float:
+        """外推到指定单调时刻的偏移（服务器 Unix 时间 - 单调时钟，秒）"""
+        if mono_ns is None:
+            mono_ns = self.timebase.mono_ns()
+        estimate = self.estimate
+        if estimate is None:
+            # 未同步时退化为系统时间
+            return self.timebase.wall_time() - self.timebase.mono_ns() / 1e9
+        return estimate.offset + estimate.drift * (mono_ns - estimate.ref_ns) / 1e9
+
+    def unix_time(self, mono_ns: Optional[int] = None) -> float:
+        """校正后的 Unix 时间"""
+        if mono_ns is None:
+            mono_ns = self.timebase.mono_ns()
+        return mono_ns / 1e9 + self.offset_at(mono_ns)
+
+    def offset_to_system(self) -> float:
+        """校正时间与本机系统时间之差（秒），仅用于展示"""
+        return self.unix_time() - self.timebase.wall_time()
+
+    def now(self) -> datetime:
+        """校正后的北京时间（naive datetime，与任务时间格式一致）"""
+        return datetime.fromtimestamp(self.unix_time(), BEIJING_TZ).replace(tzinfo=None)
+
+    def mono_ns_for(self, target: datetime) -> int:
+        """把北京时间的目标时刻换算为单调时钟时刻（按该时刻的漂移外推）"""
+        target_unix = target.replace(tzinfo=BEIJING_TZ).timestamp()
+        mono_ns = int((target_unix - self.offset_at()) * 1e9)
+        # 再用目标时刻处的偏移修正一次
+        return int((target_unix - self.offset_at(mono_ns)) * 1e9)
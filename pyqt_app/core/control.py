@@ -0,0 +1,303 @@
+"""控制接口模块 - 在本机 HTTP 端口上管理常驻引擎的任务并导出指标
+
+    GET    /tasks          列出任务（运行中与本进程内已结束的）
+    POST   /tasks          添加任务，请求体为 build_task_config 的参数或完整任务配置
+    GET    /tasks/<name>   查看任务详情与最近一次运行结果
+    DELETE /tasks/<name>   取消任务
+    GET    /metrics        Prometheus 指标
+    GET    /healthz        存活检查
+
+只监听回环地址，不做鉴权；请勿绑定到公网地址。
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+from core.engine import ExchangeEngine, get_engine
+from core.events import Signal
+from core.exchange import ExchangeTask
+from core.fanout import create_task
+from core.clock_service import get_clock_service
+from core.metrics import Metrics, get_metrics
+from core.pool import pool_stats
+from utils.helpers import build_task_config
+from utils.storage import get_storage
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# build_task_config 的参数；请求体中的其余字段作为任务选项（send_mode、burst 以外的高级配置等）并入配置
+TASK_FIELDS = ('name', 'goods_id', 'uid', 'game_biz', 'address_id', 'device_id', 'cookie', 'time', 'count', 'burst',
+               'accounts')
+
+class ControlError(Exception):
+    """控制请求错误，携带返回的 HTTP 状态码"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+class TaskRegistry:
+    """控制接口可见的任务：引擎中运行的任务与本进程内运行过的任务（保留最近一次的结果）
+
+    常驻进程会不断添加任务，已结束的任务只保留最近 MAX_FINISHED 个（连同结果、时间线与异常信息）。
+    """
+
+    MAX_FINISHED = 100
+    task_added = Signal(object)  # 通过控制接口添加并已成功提交的任务
+
+    def __init__(self, engine: Optional[ExchangeEngine] = None):
+        self.engine = engine or get_engine()
+        self._tasks: Dict[str, ExchangeTask] = {}
+        self._submitted_at: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def track(self, task: ExchangeTask):
+        """登记已提交的任务（同名任务替换旧的记录），并清理超出保留数的已结束任务"""
+        with self._lock:
+            if self._tasks.get(task.name) is not task:
+                task.error_signal.connect(lambda name, error, task=task: self._on_error(task, error))
+            self._tasks[task.name] = task
+            self._submitted_at[task.name] = time.time()
+            self._errors.pop(task.name, None)
+            finished = sorted((name for name in self._tasks if self.engine.status(name) != 'running'),
+                              key=self._submitted_at.get)
+            for name in finished[:max(0, len(finished) - self.MAX_FINISHED)]:
+                del self._tasks[name], self._submitted_at[name]
+                self._errors.pop(name, None)
+
+    def _on_error(self, task: ExchangeTask, error: str):
+        with self._lock:
+            if self._tasks.get(task.name) is task:
+                self._errors[task.name] = error
+
+    def tasks(self) -> List[ExchangeTask]:
+        """当前登记的任务"""
+        with self._lock:
+            return list(self._tasks.values())
+
+    def errors(self) -> Dict[str, str]:
+        """登记的任务中异常退出的 {任务名: 异常信息}"""
+        with self._lock:
+            return dict(self._errors)
+
+    def build_config(self, body: Dict) -> Dict:
+        """把请求体转换为任务配置
+
+        含 payload 与 headers 时视为完整任务配置（与 tasks.json 中的条目相同）；
+        否则按 build_task_config 的参数构建，uid / cookie / device_id 缺省时取已登录账号
+        """
+        if not isinstance(body, dict):
+            raise ControlError(HTTPStatus.BAD_REQUEST, "请求体应为 JSON 对象")
+        if 'payload' in body and 'headers' in body:
+            return dict(body)
+        storage = get_storage()
+        cookies = storage.get_cookies()
+        args = {
+            'address_id': '',
+            'uid': cookies.get('account_id', ''),
+            'device_id': storage.get_device_id(),
+            'cookie': ';'.join(f"{k}={v}" for k, v in cookies.items()),
+        }
+        args.update({k: body[k] for k in TASK_FIELDS if k in body})
+        missing = [k for k in ('name', 'goods_id', 'game_biz', 'time') if not args.get(k)]
+        if missing:
+            raise ControlError(HTTPStatus.BAD_REQUEST, f"缺少字段: {', '.join(missing)}")
+        config = build_task_config(**args)
+        config.update({k: v for k, v in body.items() if k not in TASK_FIELDS and k != 'save'})
+        return config
+
+    def add(self, body: Dict) -> Dict:
+        """添加并提交任务；save 为真时同时写入 data/tasks.json"""
+        config = self.build_config(body)
+        try:
+            task = create_task(config)
+        except (KeyError, ValueError, TypeError) as e:
+            raise ControlError(HTTPStatus.BAD_REQUEST, f"任务配置无效: {e}")
+        if not self.engine.submit(task):
+            raise ControlError(HTTPStatus.CONFLICT, f"任务 {task.name} 正在运行")
+        self.track(task)
+        self.task_added.emit(task)
+        if body.get('save'):
+            storage = get_storage()
+            storage.remove_task(task.name)
+            storage.add_task(config)
+        logger.info(f"控制接口添加任务: {task.name}，目标时间 {task.target_time}")
+        return self.describe(task.name)
+
+    def cancel(self, name: str) -> Dict:
+        if not self.engine.cancel(name):
+            raise ControlError(HTTPStatus.NOT_FOUND, f"任务 {name} 未在运行")
+        logger.info(f"控制接口取消任务: {name}")
+        return {"name": name, "status": "cancelled"}
+
+    def _get(self, name: str) -> ExchangeTask:
+        with self._lock:
+            task = self._tasks.get(name)
+        if task is None:
+            raise ControlError(HTTPStatus.NOT_FOUND, f"没有任务 {name}")
+        return task
+
+    def summary(self, task: ExchangeTask) -> Dict:
+        status = self.engine.status(task.name)
+        if status == 'idle':
+            status = 'finished' if task.result.get('outcome') else 'stopped'
+        return {
+            "name": task.name,
+            "status": status,
+            "target_time": task.target_time.isoformat(sep=' '),
+            "seconds_left": round((task.target_time - get_clock_service().now()).total_seconds(), 3),
+            "count": task.count,
+            "send_mode": task.send_mode,
+            "outcome": task.result.get('outcome'),
+            "submitted_at": self._submitted_at.get(task.name),
+        }
+
+    def list(self) -> Dict:
+        tasks = self.tasks()
+        known = {t.name for t in tasks}
+        rows = [self.summary(t) for t in tasks]
+        # 其他途径提交但未登记的任务（如界面）只有名称与状态
+        rows += [{"name": name, "status": "running"} for name in self.engine.running_tasks() if name not in known]
+        return {"tasks": rows}
+
+    def describe(self, name: str) -> Dict:
+        """任务详情：概要、配置（不含请求头）与最近一次运行结果"""
+        task = self._get(name)
+        config = {k: v for k, v in task.config.items() if k != 'headers'}
+        return {**self.summary(task), "config": config, "result": task.result}
+
+    def pending(self) -> int:
+        """尚未触发的任务数"""
+        return sum(1 for t in self.tasks() if self.engine.status(t.name) == 'running' and 'fire_error_ms' not in t.result)
+
+def runtime_collector(registry: TaskRegistry):
+    """抓取时现场读取的指标：待运行任务、时钟偏移与置信度、连接池预热状态"""
+
+    def collect() -> Iterable[Tuple[str, str, str, Dict[str, str], float]]:
+        clock = get_clock_service()
+        yield ("mys_engine_running_tasks", "gauge", "引擎中正在运行的任务数", {}, len(registry.engine.running_tasks()))
+        yield ("mys_engine_pending_tasks", "gauge", "已提交但尚未触发的任务数", {}, registry.pending())
+        yield ("mys_clock_synced", "gauge", "时钟服务是否已有可用估计", {}, int(clock.synced))
+        if clock.synced:
+            yield ("mys_clock_offset_seconds", "gauge", "校准时间相对本机系统时间的偏移", {}, clock.offset_to_system())
+            yield ("mys_clock_error_bound_seconds", "gauge", "时钟估计的误差上界（越小置信度越高）", {},
+                   clock.error_bound)
+        yield ("mys_clock_subscribers", "gauge", "订阅时钟服务的任务数", {}, clock.subscribers)
+        for pool in pool_stats():
+            labels = {"base_url": pool["base_url"], "http2": str(pool["http2"]).lower()}
+            if pool["partition"]:
+                labels["account"] = pool["partition"]
+            yield ("mys_pool_reserved_connections", "gauge", "各任务为突发预留的连接数之和", labels, pool["reserved"])
+            yield ("mys_pool_warm_connections", "gauge", "最近一次预热成功建立的连接数", labels, pool["warm"])
+            yield ("mys_pool_in_flight_requests", "gauge", "连接池上进行中的请求数", labels, pool["in_flight"])
+            if pool["warmed_age_s"] is not None:
+                yield ("mys_pool_warmed_age_seconds", "gauge", "距最近一次预热完成的时间", labels,
+                       pool["warmed_age_s"])
+
+    return collect
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MysExchangeControl/1.0"
+    registry: TaskRegistry
+    metrics: Metrics
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: HTTPStatus, data: Dict):
+        body = json.dumps(data, ensure_ascii=False, default=self._json_default).encode('utf-8')
+        self._send(status, body, "application/json; charset=utf-8")
+
+    @staticmethod
+    def _json_default(value):
+        if isinstance(value, datetime):
+            return value.isoformat(sep=' ')
+        return str(value)
+
+    def _route(self) -> Tuple[str, Optional[str]]:
+        path = urlsplit(self.path).path.rstrip('/')
+        if path.startswith('/tasks/'):
+            return '/tasks/<name>', unquote(path[len('/tasks/'):])
+        return path, None
+
+    def _dispatch(self, method: str):
+        route, name = self._route()
+        try:
+            if method == 'GET' and route == '/metrics':
+                self._send(HTTPStatus.OK, self.metrics.render().encode('utf-8'),
+                           "text/plain; version=0.0.4; charset=utf-8")
+            elif method == 'GET' and route == '/healthz':
+                self._send_json(HTTPStatus.OK, {"ok": True})
+            elif method == 'GET' and route == '/tasks':
+                self._send_json(HTTPStatus.OK, self.registry.list())
+            elif method == 'POST' and route == '/tasks':
+                self._send_json(HTTPStatus.CREATED, self.registry.add(self._read_json()))
+            elif method == 'GET' and route == '/tasks/<name>':
+                self._send_json(HTTPStatus.OK, self.registry.describe(name))
+            elif method == 'DELETE' and route == '/tasks/<name>':
+                self._send_json(HTTPStatus.OK, self.registry.cancel(name))
+            else:
+                raise ControlError(HTTPStatus.NOT_FOUND, f"未知接口: {method} {self.path}")
+        except ControlError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"控制接口处理 {method} {self.path} 出错: {e}")
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            raise ControlError(HTTPStatus.BAD_REQUEST, f"请求体不是有效的 JSON: {e}")
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def log_message(self, format, *args):
+        logger.debug(f"控制接口 {self.address_string()} {format % args}")
+
+class ControlServer:
+    """控制接口服务（独立线程，不占用引擎事件循环）"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8660,
+                 registry: Optional[TaskRegistry] = None, metrics: Optional[Metrics] = None):
+        self.registry = registry or TaskRegistry()
+        self.metrics = metrics or get_metrics()
+        self.metrics.add_collector(runtime_collector(self.registry))
+        handler = type('ControlHandler', (_Handler,), {"registry": self.registry, "metrics": self.metrics})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="control-api", daemon=True)
+        self._thread.start()
+        logger.info(f"控制接口已启动: {self.address}")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -0,0 +1,139 @@
+"""兑换引擎模块 - 所有任务共享的单线程异步运行时"""
+import asyncio
+import threading
+import concurrent.futures
+from typing import Dict, List, Optional
+from core.timebase import get_timebase
+from utils.logger import get_logger
+
+logger = get_logger()
+
+class ExchangeEngine:
+    """兑换引擎
+
+    一个常驻线程承载唯一的事件循环，所有任务都作为该循环上的协程运行，
+    线程数和内存不随任务数增长。submit / cancel / status 可在任意线程（如 Qt 主线程）调用。
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._futures: Dict[str, concurrent.futures.Future] = {}
+
+    def start(self):
+        """启动引擎线程（已启动则忽略）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run_loop, name="exchange-engine", daemon=True)
+            self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        """引擎线程主函数"""
+        loop = get_timebase().new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+            self._loop = None
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """引擎事件循环"""
+        return self._loop
+
+    def submit(self, task) -> bool:
+        """提交任务，同名任务仍在运行时返回 False"""
+        self.start()
+        with self._lock:
+            if task.name in self._futures:
+                return False
+            future = asyncio.run_coroutine_threadsafe(task.run(), self._loop)
+            self._futures[task.name] = future
+        future.add_done_callback(lambda f, t=task: self._on_done(t, f))
+        return True
+
+    def _on_done(self, task, future: concurrent.futures.Future):
+        """任务结束回调（在引擎线程中执行）"""
+        with self._lock:
+            if self._futures.get(task.name) is future:
+                del self._futures[task.name]
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"任务 {task.name} 异常退出: {error}")
+            task.error_signal.emit(task.name, str(error))
+
+    def cancel(self, name: str) -> bool:
+        """取消任务，取消会立即打断任务当前的等待"""
+        with self._lock:
+            future = self._futures.get(name)
+        if future is None:
+            return False
+        future.cancel()
+        logger.info(f"任务 {name} 已停止")
+        return True
+
+    def status(self, name: str) -> str:
+        """任务状态：running / idle"""
+        with self._lock:
+            return "running" if name in self._futures else "idle"
+
+    def running_tasks(self) -> List[str]:
+        """正在运行的任务名"""
+        with self._lock:
+            return list(self._futures)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """阻塞等待当前所有任务结束（无头模式使用），返回是否全部结束"""
+        with self._lock:
+            futures = list(self._futures.values())
+        _, not_done = concurrent.futures.wait(futures, timeout)
+        return not not_done
+
+    def cancel_all(self):
+        """取消所有任务"""
+        for name in self.running_tasks():
+            self.cancel(name)
+
+    def shutdown(self):
+        """取消所有任务，等它们完成清理后停止引擎线程"""
+        loop = self._loop
+        if loop is None:
+            return
+        self.cancel_all()
+        try:
+            asyncio.run_coroutine_threadsafe(self._drain(), loop).result(timeout=5)
+        except (concurrent.futures.TimeoutError, RuntimeError) as e:
+            logger.warning(f"等待任务清理超时: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    @staticmethod
+    async def _drain():
+        """等待循环上其余协程结束"""
+        current = asyncio.current_task()
+        pending = [t for t in asyncio.all_tasks() if t is not current]
+        for t in pending:
+            t.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+# 全局单例
+_engine = None
+
+def get_engine() -> ExchangeEngine:
+    """获取兑换引擎实例"""
+    global _engine
+    if _engine is None:
+        _engine = ExchangeEngine()
+    return _engine
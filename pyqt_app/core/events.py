@@ -0,0 +1,59 @@
+"""事件模块 - 不依赖 Qt 的信号/回调接口，供引擎在界面与无头模式间共用"""
+import threading
+from typing import Callable, List
+from utils.logger import get_logger
+
+logger = get_logger()
+
+class BoundSignal:
+    """绑定到某个对象的信号实例
+
+    回调在 emit 的线程中同步执行（引擎线程），回调抛出的异常只记录日志，不影响任务。
+    界面需要在主线程处理时，由界面侧自行转发（见 ui/task_widget.py 的 TaskSignalBridge）。
+    """
+
+    __slots__ = ('name', '_callbacks', '_lock')
+
+    def __init__(self, name: str):
+        self.name = name
+        self._callbacks: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def connect(self, callback: Callable):
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def disconnect(self, callback: Callable = None):
+        """断开指定回调，不传则断开全部"""
+        with self._lock:
+            if callback is None:
+                self._callbacks.clear()
+            elif callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def emit(self, *args):
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"事件 {self.name} 的回调出错: {e}")
+
+class Signal:
+    """类属性形式声明的信号（用法同 pyqtSignal），访问时为每个实例创建各自的 BoundSignal"""
+
+    def __init__(self, *types):
+        self.types = types
+        self.name = ''
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        bound = instance.__dict__.get(self.name)
+        if bound is None:
+            bound = instance.__dict__.setdefault(self.name, BoundSignal(self.name))
+        return bound
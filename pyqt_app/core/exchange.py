@@ -1,75 +1,167 @@
 """兑换任务模块"""
 import asyncio
+import contextlib
+from datetime import datetime
+from typing import Dict, List, Tuple
 import httpx
-import json
-import ntplib
-from datetime import datetime, timedelta
-from typing import Dict
-from PyQt6.QtCore import QObject, pyqtSignal, QThread
 from utils.logger import get_logger
-from utils.helpers import generate_random_fp
+from utils.storage import get_storage
+from utils.history import get_history_store
+from utils.http_client import override_url
+from core.pool import get_connection_pool
+from core.scheduler import FireScheduler, get_timer_heap
+from core.clock_service import ClockService, get_clock_service
+from core.engine import get_engine
+from core.burst import burst_offsets
+from core.latency import LatencyModel, probe_latency
+from core.server_clock import ServerClock, choose_clock
+from core.clock_sync import BEIJING_TZ
+from core.raw_sender import RawSender
+from core.request_template import PreparedExchange
+from core.readiness import ReadinessCheck, format_report
+from core.timeline import ShotTimeline
+from core.timebase import get_timebase
+from core.events import Signal
+from core.fire_guard import FireGuard
+from core.metrics import get_metrics
+from core.outcome import (classify, parse_overrides, summarize_outcomes,
+                          OUTCOME_NAMES, TERMINAL_OUTCOMES)
 
 logger = get_logger()
 
-class ExchangeTask(QObject):
-    """兑换任务"""
+EXCHANGE_URL = "https://api-takumi.miyoushe.com/mall/v1/web/goods/exchange"
+
+class ExchangeTask:
+    """兑换任务
+
+    不依赖 Qt：进度通过下列信号以普通回调发出（在引擎线程中调用），界面与无头模式各自订阅。
+    """
+    
+    COUNTDOWN_POINTS = (3600, 600, 300, 60, 30, 10)  # 倒计时提示点（秒）
+    PROBE_STOP = 1  # 触发前多少秒停止时延探测，避免与突发请求争抢连接
+    WAIT_SLICE = ClockService.FAR_INTERVAL  # 倒计时单次挂起的上限（秒），与时钟服务的远期校准间隔一致
     
     # 信号
-    message_signal = pyqtSignal(str)  # 任务消息
-    completed_signal = pyqtSignal(str)  # 任务完成
-    error_signal = pyqtSignal(str, str)  # 任务名, 错误信息
+    message_signal = Signal(str)  # 任务消息
+    completed_signal = Signal(str)  # 任务完成
+    error_signal = Signal(str, str)  # 任务名, 错误信息
+    timeline_signal = Signal(str, list)  # 任务名, 各次请求的时间线
     
     def __init__(self, task_config: Dict):
-        super().__init__()
         self.name = task_config['name']
         self.payload = task_config['payload']
         self.headers = task_config['headers']
         self.target_time = datetime.fromisoformat(task_config['time'])
-        self.count = task_config.get('count', 5)
+        # 各次请求相对目标时刻的偏移，请求次数以偏移表为准（显式偏移时可能与 count 不同）
+        self.offsets = burst_offsets(task_config.get('burst'), task_config.get('count', 5))
+        self.count = len(self.offsets)
+        self.url = override_url(task_config.get('url', EXCHANGE_URL))
+        self.pool = None  # 运行时获取的共享连接池
+        self.verify = task_config.get('verify', True)  # 是否校验 TLS 证书
+        # 发送模式：pooled 每次请求一条 HTTP/1.1 连接；http2 整个突发复用一条 HTTP/2 连接；
+        # last_byte 预写请求、触发时只补发末字节
+        self.send_mode = task_config.get('send_mode', 'pooled')
+        self.raw_sender = RawSender(self.url, verify=self.verify) if self.send_mode == 'last_byte' else None
+        # 请求在预热时预编译；fresh_device_fp 为真时每次请求使用新的设备指纹
+        self.prepared = PreparedExchange(self.url, self.payload, self.headers,
+                                         fresh_fp=task_config.get('fresh_device_fp', False))
+        self.warmup_lead = task_config.get('warmup_lead', 5)  # 提前多少秒预热连接
+        # 提前触发量：开启时延补偿时按探测到的单向时延提前，探测失败则用 fire_lead_ms（默认 50 ms）
+        self.fallback_lead = task_config.get('fire_lead_ms', 50) / 1000
+        self.timebase = get_timebase()  # 时间源（测试与仿真时可换成虚拟时间）
+        self.fire_scheduler = FireScheduler(
+            lead=self.fallback_lead,
+            spin_window=task_config.get('spin_window_ms', 2) / 1000,
+            timebase=self.timebase,
+        )
+        self.latency_compensation = task_config.get('latency_compensation', True)
+        self.probe_window = task_config.get('probe_window', 60)  # 提前多少秒开始探测时延
+        self.latency = LatencyModel()
+        # 就绪检查：触发前 readiness_lead 秒并行检查 DNS、连接、Cookie、地址和时钟
+        self.readiness_check = task_config.get('readiness_check', True)
+        self.readiness_lead = task_config.get('readiness_lead', 60)
+        self.max_clock_error = task_config.get('max_clock_error_ms', 50) / 1000
+        # 多账号任务拆出的子任务所属的账号，各账号使用各自的连接池
+        self.account = task_config.get('account', '')
+        # 触发保护：最后几秒冻结 GC、拉长 GIL 切换间隔，可选绑核（fire_cpu）与提高优先级
+        self.fire_guard = task_config.get('fire_guard', True)
+        self.fire_cpu = task_config.get('fire_cpu')
+        self.fire_priority = task_config.get('fire_priority', True)
+        # 时间基准：ntp / server / auto（按置信度在两者间选择）
+        self.clock_source = task_config.get('clock_source', 'auto')
+        self.server_clock = ServerClock()
+        # 自定义 retcode 分类，如 {"1028": "retryable"}
+        self.retcode_overrides = parse_overrides(task_config.get('retcode_outcomes'))
+        self._inflight = set()  # 正在进行的兑换请求
+        self._decided = False  # 结果是否已确定（成功 / 售罄 / 登录失效）
+        self._deadline_ns = 0  # 目标时刻（单调时钟），时间线以此为零点
+        self.timelines: List[ShotTimeline] = []  # 本次运行各次请求的时间线
+        self.export_timelines = task_config.get('export_timelines', True)  # 是否导出到 data/timelines
+        self.record_history = task_config.get('record_history', True)  # 是否写入 data/history.db
+        self.config = task_config
+        self.result = {}  # 本次运行的结果记录
         self.running = False
-        self.time_offset = 0  # 本地时间与 NTP 时间的偏移（秒）
-    
-    async def get_ntp_time(self) -> datetime:
-        """获取 NTP 时间"""
-        try:
-            client = ntplib.NTPClient()
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: client.request('ntp.aliyun.com', timeout=5)
-            )
-            # 转换为北京时间
-            ntp_time = datetime.utcfromtimestamp(response.tx_time) + timedelta(hours=8)
-            # 计算时间偏移
-            local_time = datetime.now()
-            self.time_offset = (ntp_time - local_time).total_seconds()
-            logger.info(f"NTP 时间校准成功，偏移: {self.time_offset:.3f} 秒")
-            return ntp_time
-        except Exception as e:
-            logger.error(f"获取 NTP 时间失败: {e}")
-            return datetime.now()
+        self.clock = get_clock_service()  # 进程内共享的时钟服务
     
     def get_corrected_time(self) -> datetime:
-        """获取校正后的本地时间（使用缓存的偏移量）"""
-        return datetime.now() + timedelta(seconds=self.time_offset)
+        """获取校正后的北京时间（读取共享时钟服务的估计，不发起网络请求）"""
+        return self.clock.now()
     
-    async def exchange_goods(self):
-        """执行兑换"""
-        url = "https://api-takumi.miyoushe.com/mall/v1/web/goods/exchange"
-        
-        async with httpx.AsyncClient() as client:
+    async def exchange_goods(self, index: int = 0) -> str:
+        """执行第 index 次兑换（复用连接池中已预热的连接，发送预编译的请求），返回结果类别
+
+        同时记录这次请求的时间线；结果一旦确定（成功 / 售罄 / 登录失效），立即取消其余进行中的请求
+        """
+        shot = asyncio.current_task()
+        self._inflight.add(shot)
+        scheduled_ns = self._deadline_ns + int(self.offsets[index] * 1e9) - self.fire_scheduler.lead_ns
+        timeline = ShotTimeline(index, self._deadline_ns, scheduled_ns)
+        timeline.mark('fired')
+        self.timelines.append(timeline)
+        try:
             try:
-                response = await client.post(
-                    url,
-                    data=json.dumps(self.payload),
-                    headers=self.headers,
-                    timeout=10
-                )
-                result = response.text
-                self.message_signal.emit(f"[{self.name}] {result}")
-                logger.info(f"任务 {self.name} 返回: {result}")
+                if self.raw_sender is not None:
+                    status, _, body = await self.raw_sender.send(timeline)
+                    result = body.decode('utf-8', errors='replace')
+                else:
+                    request = self.prepared.next_request(self.pool.client)
+                    request.extensions['trace'] = timeline.trace
+                    response = await self.pool.send(request)
+                    status, result = response.status_code, response.text
             except Exception as e:
-                error_msg = f"兑换失败: {e}"
-                self.message_signal.emit(f"[{self.name}] {error_msg}")
-                logger.error(f"任务 {self.name} {error_msg}")
+                status, result = None, f"兑换失败: {e}"
+            timeline.mark('completed')
+            
+            outcome, retcode, message = classify(status, result, self.retcode_overrides)
+            timeline.status, timeline.retcode, timeline.outcome, timeline.message = status, retcode, outcome, message
+            self.result.setdefault('shots', []).append(timeline.to_dict())
+            self.message_signal.emit(f"[{self.name}] [{OUTCOME_NAMES[outcome]}] {result}")
+            rel = timeline.relative_ns()
+            logger.info(
+                f"任务 {self.name} 第 {index + 1} 次返回（{outcome}，HTTP {status}，retcode {retcode}，"
+                f"发送 {self._fmt_ms(rel['fired'])}，首字节 {self._fmt_ms(rel['first_byte'])}）: {result}"
+            )
+            
+            if outcome in TERMINAL_OUTCOMES and not self._decided:
+                self._decided = True
+                self._cancel_inflight(shot)
+            return outcome
+        finally:
+            if timeline.outcome is None:
+                timeline.message = '已取消'
+            self._inflight.discard(shot)
+    
+    @staticmethod
+    def _fmt_ms(ns) -> str:
+        """相对目标时刻的纳秒偏移格式化为毫秒"""
+        return '-' if ns is None else f"{ns / 1e6:+.3f} ms"
+    
+    def _cancel_inflight(self, current: asyncio.Task):
+        """取消除当前请求外所有进行中的请求"""
+        others = [t for t in self._inflight if t is not current and not t.done()]
+        for t in others:
+            t.cancel()
+        self.result['cancelled_shots'] = self.result.get('cancelled_shots', 0) + len(others)
     
     async def run(self):
         """运行任务"""
@@ -77,77 +169,270 @@ class ExchangeTask(QObject):
         logger.info(f"任务 {self.name} 已启动，目标时间: {self.target_time}")
         self.message_signal.emit(f"[{self.name}] 任务已启动，目标时间: {self.target_time}")
         
-        # 首次获取 NTP 时间并计算偏移
-        await self.get_ntp_time()
+        clock_token = self.open()
+        try:
+            await self._run_loop()
+        finally:
+            self.running = False
+            await self.close(clock_token)
+    
+    # 运行阶段：run 依次调用 open → prepare → (guard 内) plan_fire 与发出突发 → finish → close；
+    # 多账号任务（core/fanout.py）按同样的顺序调用各子任务的这些阶段，由自己合并发出突发
+    def open(self) -> int:
+        """清空上次运行的结果，取得共享连接池并预留连接、启动历史写入线程、订阅时钟服务，返回订阅凭据"""
+        self.result = {}
+        self.timelines = []
+        self._decided = False
+        # 同一 host（多账号任务中同一账号）的任务共享连接池，按本任务的突发规模预留连接
+        self.pool = get_connection_pool(self.url, verify=self.verify, http2=self.send_mode == 'http2',
+                                        partition=self.account)
+        self.pool.reserve(self.count)
+        if self.record_history:
+            # 提前启动历史存储的写入线程并在其中建库，finish 时只需入队
+            get_history_store().start()
+        # 订阅时钟服务，由它按目标时刻决定校准节奏
+        return self.clock.subscribe(self.target_time)
+    
+    async def close(self, clock_token: int):
+        """释放 open 取得的资源"""
+        self.clock.unsubscribe(clock_token)
+        if self.raw_sender is not None:
+            await self.raw_sender.close()
+        self.pool.release(self.count)
+        if self.pool.size == 0:
+            await self.pool.close()
+    
+    async def _wait_until_before(self, seconds: float):
+        """挂起到目标时刻前 seconds 秒
+
+        每次最多挂起 WAIT_SLICE 秒，醒来后按最新的时钟估计重新换算：校准结果更新、
+        系统休眠（休眠期间单调时钟不走）后的偏移修正都能在下一次唤醒时生效，空闲时也只是每 30 秒唤醒一次。
+        """
+        heap = get_timer_heap()
+        while True:
+            when_ns = self.clock.mono_ns_for(self.target_time) - int(seconds * 1e9)
+            now_ns = self.timebase.mono_ns()
+            if now_ns >= when_ns:
+                return
+            await heap.sleep_until(min(when_ns, now_ns + int(self.WAIT_SLICE * 1e9)))
+    
+    async def _probe(self):
+        """从触发前 probe_window 秒开始探测往返时延，持续到触发前 PROBE_STOP 秒"""
+        await self._wait_until_before(self.probe_window)
+        stop_ns = self.clock.mono_ns_for(self.target_time) - int(self.PROBE_STOP * 1e9)
+        on_response = self.server_clock.observe if self.clock_source != 'ntp' else None
+        await probe_latency(self.pool.client, self.pool.base_url + "/", self.latency, stop_ns,
+                            on_response=on_response)
+    
+    async def _check_readiness(self):
+        """在触发前 readiness_lead 秒执行就绪检查并报告各阶段结果"""
+        await self._wait_until_before(self.readiness_lead)
+        check = ReadinessCheck(
+            self.url, self.pool, self.count if self.raw_sender is None else 1,
+            cookie=self.headers.get('Cookie', ''), address_id=self.payload.get('address_id', ''),
+            clock=self.clock, max_clock_error=self.max_clock_error,
+        )
+        results = await check.run()
+        self.result['readiness'] = [r.to_dict() for r in results]
+        failed = [r for r in results if not r.ok]
+        status = f"{len(failed)} 项未通过" if failed else "全部通过"
+        self.message_signal.emit(f"[{self.name}] 就绪检查{status}: {format_report(results)}")
+    
+    def _apply_latency_lead(self):
+        """按时延模型设置提前发送量，让请求在目标时刻到达"""
+        lead = self.latency.lead(self.fallback_lead) if self.latency_compensation else self.fallback_lead
+        self.fire_scheduler.set_lead(lead)
+        self.result['lead_ms'] = lead * 1000
+        self.result['latency'] = self.latency.to_dict()
+        self.message_signal.emit(
+            f"[{self.name}] 提前量 {lead * 1000:.1f} ms（RTT 中位数 {self.result['latency']['rtt_ms']} ms，"
+            f"抖动 {self.result['latency']['jitter_ms']} ms）"
+        )
+    
+    def _fire_deadline(self) -> int:
+        """确定触发时刻（单调时钟），按配置在 NTP 与服务器时间之间选择
+
+        'ntp' 只用 NTP；'server' 有服务器估计时一律采用；'auto' 由 choose_clock 比较两者后决定。
+        """
+        mono_ns = self.timebase.mono_ns()
+        decision = choose_clock(self.clock.offset_at(mono_ns), self.clock.error_bound, self.server_clock.estimate())
+        if self.clock_source == 'ntp':
+            decision.update(source='ntp', offset=decision['ntp_offset'])
+        elif self.clock_source == 'server' and decision['server_offset'] is not None:
+            decision.update(source='server', offset=decision['server_offset'])
+        self.result['clock'] = {k: v for k, v in decision.items() if k not in ('offset', 'ntp_offset', 'server_offset')}
+        # 采用的时钟相对本机系统时间的偏移
+        system_offset = self.timebase.wall_time() - self.timebase.mono_ns() / 1e9
+        self.result['clock_offset_ms'] = round((decision['offset'] - system_offset) * 1000, 3)
+        if decision['source'] == 'server':
+            target_unix = self.target_time.replace(tzinfo=BEIJING_TZ).timestamp()
+            self.message_signal.emit(
+                f"[{self.name}] 采用服务器时间，与 NTP 相差 {decision['server_vs_ntp_ms']:.1f} ms"
+                f"（置信度 {decision['confidence']:.2f}）"
+            )
+            return int((target_unix - decision['offset']) * 1e9)
+        return self.clock.mono_ns_for(self.target_time)
+    
+    async def _run_loop(self):
+        """等待并执行兑换"""
+        await self.prepare()
+        with self.guard():
+            errors_ns, shots = await self._fire()
+        await self.finish(errors_ns, len(shots))
+    
+    @property
+    def decided(self) -> bool:
+        """本次运行的结果是否已确定（成功 / 售罄 / 登录失效），确定后不再发出其余请求"""
+        return self._decided
+    
+    async def prepare(self):
+        """倒计时、时延探测、就绪检查、连接预热并空走一遍发送路径，返回时只差换算触发时刻与发出请求"""
+        await self._wait_and_warm_up()
+        await self._pretouch()
+    
+    def plan_fire(self) -> Tuple[int, float]:
+        """换算触发时刻（单调时钟）并按时延模型设置提前量，返回 (触发时刻, 提前量秒)"""
+        deadline_ns = self._fire_deadline()
+        self._apply_latency_lead()
+        self._deadline_ns = deadline_ns
+        return deadline_ns, self.fire_scheduler.lead
+    
+    def set_fire_plan(self, deadline_ns: int, lead: float):
+        """改用指定的触发时刻与提前量（多账号任务统一各账号的触发计划）"""
+        self.fire_scheduler.set_lead(lead)
+        self.result['lead_ms'] = lead * 1000
+        self._deadline_ns = deadline_ns
+    
+    async def _wait_and_warm_up(self):
+        """倒计时、时延探测、就绪检查与连接预热"""
+        # 等待时钟服务给出首个估计（有保存的估计时立即返回）
+        if not await self.clock.wait_synced():
+            self.message_signal.emit(f"[{self.name}] NTP 校准失败，暂用本机时间")
+        
+        current_time = self.get_corrected_time()
+        delay = (self.target_time - current_time).total_seconds()
+        self.message_signal.emit(f"[{self.name}] 当前时间: {current_time.strftime('%H:%M:%S')}, 还剩 {delay:.0f} 秒")
         
-        while self.running:
-            # 使用校正后的本地时间，避免频繁请求 NTP
-            current_time = self.get_corrected_time()
-            delay = (self.target_time - current_time).total_seconds()
+        # 只在倒计时提示点唤醒，其余时间不占用 CPU；校准由时钟服务在后台完成
+        need_probe = self.latency_compensation or self.clock_source != 'ntp'
+        probe = asyncio.ensure_future(self._probe()) if need_probe else None
+        readiness = asyncio.ensure_future(self._check_readiness()) if self.readiness_check else None
+        try:
+            for seconds in self.COUNTDOWN_POINTS:
+                if seconds < delay and seconds > self.warmup_lead:
+                    await self._wait_until_before(seconds)
+                    self.message_signal.emit(f"[{self.name}] 还剩 {seconds} 秒")
             
-            if delay <= 5:
-                # 距离目标时间不到 5 秒，进入精确等待模式
-                if delay > 0:
-                    self.message_signal.emit(f"[{self.name}] 还剩 {delay:.3f} 秒，准备执行...")
-                    precise_delay = max(0, delay - 0.05)
-                    await asyncio.sleep(precise_delay)
-                
-                # 并发执行多次兑换
-                logger.info(f"任务 {self.name} 开始执行兑换，实际时间: {datetime.now()}")
-                tasks = [self.exchange_goods() for _ in range(self.count)]
-                await asyncio.gather(*tasks)
-                
-                self.message_signal.emit(f"[{self.name}] 任务执行完成")
-                logger.info(f"任务 {self.name} 执行完成")
-                self.completed_signal.emit(self.name)
-                self.running = False
-                break
-            elif delay <= 60:
-                # 距离目标时间 5-60 秒，每秒更新一次
-                self.message_signal.emit(f"[{self.name}] 还剩 {delay:.1f} 秒")
-                await asyncio.sleep(1)
-            elif delay <= 300:
-                # 距离目标时间 1-5 分钟，每 5 秒校准一次 NTP
-                self.message_signal.emit(f"[{self.name}] 还剩 {delay:.0f} 秒")
-                await self.get_ntp_time()  # 重新校准
-                for _ in range(5):
-                    if not self.running:
-                        break
-                    await asyncio.sleep(1)
+            # 预热阶段：提前建立连接
+            await self._wait_until_before(self.warmup_lead)
+            # 末字节模式下连接池只用于时延探测；HTTP/2 模式由连接池自行只预热一条
+            await self.pool.warm_up(self.count if self.raw_sender is None else 1)
+            if self.send_mode == 'http2' and self.pool.http_version != 'HTTP/2':
+                self.message_signal.emit(f"[{self.name}] 服务器未协商 HTTP/2（{self.pool.http_version}），突发将使用多条连接")
+            if self.raw_sender is not None:
+                await self.raw_sender.prime(self.count, self.prepared.raw_bytes)
             else:
-                # 距离目标时间较远，每 30 秒校准一次 NTP
-                self.message_signal.emit(f"[{self.name}] 当前时间: {current_time.strftime('%H:%M:%S')}, 还剩 {delay:.0f} 秒")
-                await self.get_ntp_time()  # 重新校准
-                sleep_time = min(30, delay - 60)
-                for _ in range(int(sleep_time)):
-                    if not self.running:
-                        break
-                    await asyncio.sleep(1)
-    
-    def stop(self):
-        """停止任务"""
+                # 多备一个请求，供 _pretouch 空取一次
+                self.prepared.prepare(self.pool.client, self.count + 1)
+            
+            if probe is not None:
+                await probe
+        finally:
+            if probe is not None:
+                probe.cancel()
+            # 就绪检查只负责报告，到触发时仍未完成的不再等待
+            if readiness is not None and not readiness.done():
+                readiness.cancel()
+                self.message_signal.emit(f"[{self.name}] 就绪检查未在预热前完成")
+    
+    async def finish(self, errors_ns: List[int], sent: int):
+        """整理本次运行的结果：触发误差、结果类别、时间线与历史记录"""
+        self.result['offsets_ms'] = [o * 1000 for o in self.offsets]
+        if errors_ns:
+            self.result['fire_error_ms'] = errors_ns[0] / 1e6
+            self.result['shot_errors_ms'] = [e / 1e6 for e in errors_ns]
+            worst = max(abs(e) for e in errors_ns) / 1e6
+            logger.info(f"任务 {self.name} 触发误差: 首发 {errors_ns[0] / 1e6:.3f} ms，最大 {worst:.3f} ms")
+            self.message_signal.emit(f"[{self.name}] 触发误差: 首发 {errors_ns[0] / 1e6:.3f} ms，最大 {worst:.3f} ms")
+        
+        outcome = summarize_outcomes(s['outcome'] for s in self.result.get('shots', []))
+        self.result['outcome'] = outcome
+        self.result['skipped_shots'] = self.count - sent
+        await self._publish_timelines()
+        if self.record_history:
+            # 只是放进队列，由历史存储的后台线程攒批写入
+            get_history_store().record_run(self.name, self.config, self.result)
+        get_metrics().record_run(self.result, self.send_mode)
+        self.message_signal.emit(
+            f"[{self.name}] 结果: {OUTCOME_NAMES[outcome]}（已发 {sent}/{self.count}，"
+            f"取消进行中 {self.result.get('cancelled_shots', 0)}）"
+        )
+        
+        self.message_signal.emit(f"[{self.name}] 任务执行完成")
+        logger.info(f"任务 {self.name} 执行完成")
+        self.completed_signal.emit(self.name)
         self.running = False
-        logger.info(f"任务 {self.name} 已停止")
-
+    
+    @contextlib.contextmanager
+    def guard(self):
+        """触发保护（fire_guard 关闭时为空操作）"""
+        if not self.fire_guard:
+            yield
+            return
+        with FireGuard(cpu=self.fire_cpu, priority=self.fire_priority):
+            self.message_signal.emit(f"[{self.name}] 触发保护: {'，'.join(FireGuard.applied)}")
+            yield
+    
+    async def _pretouch(self):
+        """首发前把发送与结果处理路径空走一遍，首发时不再有首次调用的开销
 
-class ExchangeWorker(QThread):
-    """兑换任务工作线程"""
+        httpx 模式下取出一个预构造的请求（prepare 时多备了一个）后丢弃，再经 pool.send 在已预热的连接上
+        发一个带时间线 trace 的 HEAD；末字节模式的连接已写入除末字节外的全部请求，无法空发，只走结果处理路径。
+        """
+        timeline = ShotTimeline(-1, 0, 0)
+        timeline.mark('fired')
+        if self.raw_sender is None:
+            client = self.pool.client
+            self.prepared.next_request(client)
+            request = client.build_request("HEAD", self.pool.base_url + "/")
+            request.extensions['trace'] = timeline.trace
+            try:
+                await self.pool.send(request)
+            except httpx.HTTPError:
+                pass  # 空发失败不影响触发，真实请求会各自报告错误
+        timeline.mark('completed')
+        timeline.to_dict()
+        classify(200, '{"retcode":0,"message":"OK","data":{}}', self.retcode_overrides)
+        classify(None, '', self.retcode_overrides)
+        self._fmt_ms(0)
+        self.fire_scheduler.timebase.spin_until(self.timebase.mono_ns())
     
-    def __init__(self, task: ExchangeTask):
-        super().__init__()
-        self.task = task
+    async def _fire(self):
+        """换算触发时刻并按突发策略发出全部请求，等待它们返回"""
+        # 目标时刻换算到单调时钟上，之后不再受系统时间跳变影响
+        deadline_ns, _ = self.plan_fire()
+        delay = (deadline_ns - self.timebase.mono_ns()) / 1e9
+        if delay > 0:
+            self.message_signal.emit(f"[{self.name}] 还剩 {delay:.3f} 秒，准备执行...")
+        
+        # 按突发策略逐个发出兑换请求（日志放在发送之后，避免拖慢触发）
+        errors_ns, shots = await self.fire_scheduler.fire_burst(
+            deadline_ns, self.offsets, self.exchange_goods, should_stop=lambda: self._decided
+        )
+        await asyncio.gather(*shots, return_exceptions=True)
+        return errors_ns, shots
     
-    def run(self):
-        """运行任务"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            loop.run_until_complete(self.task.run())
-        finally:
-            loop.close()
+    async def _publish_timelines(self):
+        """把本次运行的时间线发给界面，并导出为 JSONL（在线程池中写文件，不阻塞事件循环）"""
+        self.timelines.sort(key=lambda t: t.index)
+        records = [t.to_dict() for t in self.timelines]
+        self.timeline_signal.emit(self.name, records)
+        if self.export_timelines and records:
+            header = {"task": self.name, "target_time": self.target_time.isoformat(sep=' '),
+                      "send_mode": self.send_mode, "lead_ms": self.result.get('lead_ms')}
+            await asyncio.to_thread(get_storage().append_timelines, self.name,
+                                    [{**header, **r} for r in records])
     
-    def stop(self):
-        """停止任务"""
-        self.task.stop()
-        # 不要 wait()，让线程自己退出
-        self.quit()
+    def stop(self) -> bool:
+        """停止任务：通过引擎取消正在运行的 run()，任务未在引擎中运行时返回 False"""
+        return get_engine().cancel(self.name)
@@ -0,0 +1,207 @@
+"""多账号任务模块 - 一个任务定义按账号拆成多个子任务，由同一个调度器统一触发
+
+每个账号的子任务使用各自的 cookie、uid 与设备 ID，并各自预热一组连接（连接池按账号分区）；
+触发时所有账号的请求按偏移合并成一次突发，由同一个 FireScheduler 发出，结果汇总为一份。
+"""
+import asyncio
+import copy
+import statistics
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+from core.engine import get_engine
+from core.exchange import ExchangeTask
+from core.events import Signal
+from core.outcome import OUTCOME_NAMES, summarize_outcomes
+from utils.helpers import build_exchange_headers
+from utils.storage import get_storage
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# 按账号替换的请求头（其余请求头沿用任务配置）
+ACCOUNT_HEADERS = ('Cookie', 'x-rpc-device_id', 'x-rpc-device_fp')
+# 为没有设备 ID 的账号派生设备 ID 的命名空间
+DEVICE_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'https://github.com/mxyooR/Mys_Goods_Gui')
+
+def expand_accounts(task_config: Dict, storage=None) -> List[Dict]:
+    """把多账号任务配置拆成各账号的子任务配置
+
+    子任务名称为 "<任务名>@<账号名>"；uid 取账号 cookie 中的 account_id；
+    账号没有设备 ID 时由账号名派生一个固定的（每次运行都相同），拆分过程只读取存储、不写回。
+    收货地址属于账号，可用 account_addresses（{账号名: 地址 ID}）为各账号分别指定，缺省时沿用任务的地址。
+    """
+    storage = storage or get_storage()
+    addresses = task_config.get('account_addresses', {})
+    configs = []
+    for name in task_config['accounts']:
+        account = storage.get_account(name)
+        if account is None:
+            raise ValueError(f"账号 {name} 不存在")
+        cookies = account.get('cookies', {})
+        device_id = account.get('device_id') or uuid.uuid5(DEVICE_ID_NAMESPACE, name).hex
+        headers = build_exchange_headers(';'.join(f"{k}={v}" for k, v in cookies.items()), device_id)
+        payload = dict(task_config['payload'], uid=str(cookies.get('account_id', '')))
+        if name in addresses:
+            payload['address_id'] = addresses[name]
+        config = {k: copy.deepcopy(v) for k, v in task_config.items()
+                  if k not in ('accounts', 'account_addresses')}
+        config.update(
+            name=f"{task_config['name']}@{name}",
+            account=name,
+            payload=payload,
+            headers={**task_config['headers'], **{k: headers[k] for k in ACCOUNT_HEADERS}},
+        )
+        configs.append(config)
+    return configs
+
+class FanOutTask:
+    """多账号任务
+
+    接口与 ExchangeTask 相同（引擎、界面与无头模式不区分两者）。子任务的消息原样转发；
+    子任务各自记录历史、指标与时间线文件，本任务只发出汇总后的结果与时间线。
+    """
+
+    message_signal = Signal(str)
+    completed_signal = Signal(str)
+    error_signal = Signal(str, str)
+    timeline_signal = Signal(str, list)
+
+    def __init__(self, task_config: Dict, storage=None):
+        self.name = task_config['name']
+        self.config = task_config
+        self.target_time = datetime.fromisoformat(task_config['time'])
+        self.children = [ExchangeTask(config) for config in expand_accounts(task_config, storage)]
+        if not self.children:
+            raise ValueError("未选择账号")
+        self.count = sum(child.count for child in self.children)
+        self.send_mode = self.children[0].send_mode
+        self.result = {}
+        self.running = False
+        self._plan: List[Tuple[float, int, int]] = []  # 合并后的突发 [(偏移, 子任务序号, 子任务内请求序号)]
+        self._sent: List[int] = []  # 实际发出的请求在 _plan 中的位置
+        for child in self.children:
+            child.message_signal.connect(self.message_signal.emit)
+
+    async def run(self):
+        """运行任务：各账号并行准备，统一触发，分别整理结果后汇总"""
+        self.running = True
+        self.result = {}
+        accounts = '、'.join(child.account for child in self.children)
+        logger.info(f"多账号任务 {self.name} 已启动（{accounts}），目标时间: {self.target_time}")
+        self.message_signal.emit(f"[{self.name}] 多账号任务已启动（{accounts}），目标时间: {self.target_time}")
+
+        tokens = []
+        try:
+            for child in self.children:
+                tokens.append((child, child.open()))
+                child.running = True
+            await self._prepare()
+            # 所有账号在同一个引擎线程中触发，保护窗口只需进入一次
+            with self.children[0].guard():
+                errors_ns = await self._fire()
+            for i, child in enumerate(self.children):
+                child_errors = [errors_ns[k] for k in self._sent if self._plan[k][1] == i]
+                await child.finish(child_errors, len(child.timelines))
+            self._aggregate(errors_ns)
+        finally:
+            self.running = False
+            for child, token in tokens:
+                child.running = False
+                await child.close(token)
+
+    async def _prepare(self):
+        """并行执行各账号的倒计时、探测、就绪检查与预热；任一失败时取消其余"""
+        pending = [asyncio.ensure_future(child.prepare()) for child in self.children]
+        try:
+            await asyncio.gather(*pending)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            raise
+
+    async def _fire(self) -> List[int]:
+        """按统一的触发时刻与提前量，把各账号的请求合并成一次突发发出，返回每次触发的误差"""
+        plans = [child.plan_fire() for child in self.children]
+        # 各账号探测的是同一 host，取中位数作为共同的触发时刻与提前量
+        deadline_ns = statistics.median_low(deadline for deadline, _ in plans)
+        lead = statistics.median(lead for _, lead in plans)
+        for child in self.children:
+            child.set_fire_plan(deadline_ns, lead)
+        scheduler = self.children[0].fire_scheduler
+        delay = (deadline_ns - scheduler.timebase.mono_ns()) / 1e9
+        if delay > 0:
+            self.message_signal.emit(
+                f"[{self.name}] 还剩 {delay:.3f} 秒，{len(self.children)} 个账号共 {self.count} 次请求，"
+                f"提前量 {lead * 1000:.1f} ms"
+            )
+
+        self._plan = sorted((offset, i, index) for i, child in enumerate(self.children)
+                            for index, offset in enumerate(child.offsets))
+        self._sent = []
+        errors_ns, shots = await scheduler.fire_burst(
+            deadline_ns, [offset for offset, _, _ in self._plan], self._shot,
+            should_stop=lambda: all(child.decided for child in self.children),
+        )
+        await asyncio.gather(*shots, return_exceptions=True)
+        self._sent.sort()
+        return errors_ns
+
+    async def _shot(self, k: int) -> Optional[str]:
+        """发出合并突发中的第 k 次请求；该账号结果已确定时跳过"""
+        _, i, index = self._plan[k]
+        child = self.children[i]
+        if child.decided:
+            return None
+        self._sent.append(k)
+        return await child.exchange_goods(index)
+
+    def _aggregate(self, errors_ns: List[int]):
+        """汇总各账号的结果：任一账号成功即为成功，时间线与请求记录标注账号"""
+        sent_errors = [errors_ns[k] for k in self._sent]
+        self.result = {
+            'outcome': summarize_outcomes(child.result.get('outcome') for child in self.children),
+            'skipped_shots': sum(child.result.get('skipped_shots', 0) for child in self.children),
+            'lead_ms': self.children[0].result.get('lead_ms'),
+            'accounts': [self._account_row(child) for child in self.children],
+            'shots': [{**shot, 'account': child.account}
+                      for child in self.children for shot in child.result.get('shots', [])],
+        }
+        if sent_errors:
+            self.result['fire_error_ms'] = sent_errors[0] / 1e6
+            self.result['shot_errors_ms'] = [e / 1e6 for e in sent_errors]
+
+        records = [{**timeline.to_dict(), 'account': child.account}
+                   for child in self.children for timeline in child.timelines]
+        self.timeline_signal.emit(self.name, records)
+        self.message_signal.emit(f"[{self.name}] 汇总: " + "；".join(
+            f"{row['account']} {OUTCOME_NAMES[row['outcome']]}（已发 {row['sent']}/{row['count']}）"
+            for row in self.result['accounts']
+        ))
+        self.message_signal.emit(f"[{self.name}] 结果: {OUTCOME_NAMES[self.result['outcome']]}")
+        logger.info(f"多账号任务 {self.name} 执行完成")
+        self.completed_signal.emit(self.name)
+        self.running = False
+
+    @staticmethod
+    def _account_row(child: ExchangeTask) -> Dict:
+        result = child.result
+        return {
+            'account': child.account,
+            'task': child.name,
+            'outcome': result.get('outcome'),
+            'fire_error_ms': result.get('fire_error_ms'),
+            'sent': child.count - result.get('skipped_shots', child.count),
+            'count': child.count,
+        }
+
+    def stop(self) -> bool:
+        """停止任务：通过引擎取消 run()，各账号的子任务随之取消"""
+        return get_engine().cancel(self.name)
+
+def create_task(task_config: Dict) -> Union[ExchangeTask, FanOutTask]:
+    """按配置创建任务：含 accounts 时为多账号任务，否则为单账号的 ExchangeTask"""
+    if task_config.get('accounts'):
+        return FanOutTask(task_config)
+    return ExchangeTask(task_config)
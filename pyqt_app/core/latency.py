@@ -0,0 +1,93 @@
+"""时延估计模块 - 倒计时阶段探测往返时延，用于计算提前发送量"""
+import statistics
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+import httpx
+from core.scheduler import get_timer_heap
+from core.timebase import get_timebase
+from utils.logger import get_logger
+
+logger = get_logger()
+
+class LatencyModel:
+    """往返时延的滚动估计
+
+    单向时延按 RTT 中位数的一半估计（假设上下行对称）；
+    抖动取窗口内 RTT 的四分位距，用于判断估计是否可信。
+    """
+
+    MAX_LEAD = 0.5  # 提前量上限（秒），防止异常样本把请求发得过早
+
+    def __init__(self, window: int = 20):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.failures = 0
+
+    def add(self, rtt: float):
+        """加入一个 RTT 样本（秒）"""
+        self.samples.append(rtt)
+
+    @property
+    def ready(self) -> bool:
+        return len(self.samples) >= 3
+
+    @property
+    def rtt(self) -> Optional[float]:
+        """RTT 中位数（秒）"""
+        return statistics.median(self.samples) if self.samples else None
+
+    @property
+    def min_rtt(self) -> Optional[float]:
+        return min(self.samples) if self.samples else None
+
+    @property
+    def jitter(self) -> Optional[float]:
+        """RTT 四分位距（秒）"""
+        if len(self.samples) < 4:
+            return None
+        q = statistics.quantiles(self.samples, n=4)
+        return q[2] - q[0]
+
+    def one_way(self) -> Optional[float]:
+        """单向时延估计（秒）"""
+        return self.rtt / 2 if self.samples else None
+
+    def lead(self, fallback: float) -> float:
+        """发送提前量：样本足够时取单向时延，否则用 fallback"""
+        if not self.ready:
+            return fallback
+        return min(self.one_way(), self.MAX_LEAD)
+
+    def to_dict(self) -> Dict:
+        """导出当前模型，写入任务结果"""
+        def ms(v):
+            return round(v * 1000, 3) if v is not None else None
+        return {
+            "samples": len(self.samples),
+            "failures": self.failures,
+            "rtt_ms": ms(self.rtt),
+            "min_rtt_ms": ms(self.min_rtt),
+            "jitter_ms": ms(self.jitter),
+            "one_way_ms": ms(self.one_way()),
+        }
+
+async def probe_latency(client: httpx.AsyncClient, url: str, model: LatencyModel, stop_ns: int,
+                        interval: float = 0.618,
+                        on_response: Optional[Callable[[httpx.Response, int, int], None]] = None):
+    """在 stop_ns（单调时钟）之前周期性发送 HEAD 请求，把 RTT 写入 model
+
+    间隔取 0.618 秒而非整秒，让探测落在服务器秒边界的不同相位上，
+    on_response 可借此从 Date 头推算服务器时钟。
+    """
+    timebase = get_timebase()
+    while timebase.mono_ns() < stop_ns:
+        start = timebase.mono_ns()
+        try:
+            response = await client.head(url)
+            end = timebase.mono_ns()
+            model.add((end - start) / 1e9)
+            if on_response is not None:
+                on_response(response, start, end)
+        except httpx.HTTPError as e:
+            model.failures += 1
+            logger.warning(f"时延探测失败 {url}: {e}")
+        await get_timer_heap().sleep_until(min(start + int(interval * 1e9), stop_ns))
@@ -0,0 +1,135 @@
+"""运行指标模块 - 以 Prometheus 文本格式导出引擎、时钟、连接池与兑换结果的指标
+
+不依赖 prometheus_client：计数器与直方图在任务结束时累加，
+所有指标都不带任务标签（常驻运行时任务名无穷无尽，时间序列会随之无限增长），
+计数器只按结果类别与发送模式这类取值有限的标签区分；单个任务的结果见控制接口 /tasks/<名称>。
+待运行任务数、时钟偏移、连接池预热状态等在每次抓取时现场读取。
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from core.outcome import OUTCOME_NAMES
+
+# 单次请求耗时（发送 -> 完成）的直方图分桶（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5)
+# 触发误差绝对值的直方图分桶（秒）
+FIRE_ERROR_BUCKETS = (0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.05)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """按标签分组的累积直方图"""
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float]):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List] = {}  # {labels: [各桶计数, 总和, 总数]}
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            for bound, n in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {n}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+class Metrics:
+    """进程内的指标登记表
+
+    record_run 在引擎线程中由任务调用，render 在控制接口线程中调用，二者以锁隔离。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._runs: Dict[Labels, int] = {}  # {(outcome, send_mode): 次数}
+        self._shots: Dict[Labels, int] = {}  # {(outcome, send_mode): 请求数}
+        self.shot_latency = Histogram(
+            "mys_exchange_shot_latency_seconds", "单次兑换请求从发送到完成的耗时（全部任务合计）",
+            LATENCY_BUCKETS)
+        self.fire_error = Histogram(
+            "mys_exchange_fire_error_seconds", "请求实际发送时刻与计划时刻之差的绝对值（全部任务合计）", FIRE_ERROR_BUCKETS)
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]):
+        """登记抓取时现场读取的指标，collector 返回 (名称, 类型, 说明, 标签, 值) 序列"""
+        self._collectors.append(collector)
+
+    def record_run(self, result: Dict, send_mode: str = 'pooled'):
+        """登记一次任务运行的结果（各请求结果计数、请求耗时与触发误差）"""
+        with self._lock:
+            key = (('outcome', result.get('outcome') or 'unknown'), ('send_mode', send_mode))
+            self._runs[key] = self._runs.get(key, 0) + 1
+            for shot in result.get('shots', []):
+                outcome = shot.get('outcome') or 'cancelled'
+                key = (('outcome', outcome), ('send_mode', send_mode))
+                self._shots[key] = self._shots.get(key, 0) + 1
+                rel = shot.get('timeline_ns') or {}
+                if rel.get('fired') is not None and rel.get('completed') is not None:
+                    self.shot_latency.observe((rel['completed'] - rel['fired']) / 1e9)
+            for error_ms in result.get('shot_errors_ms', []):
+                self.fire_error.observe(abs(error_ms) / 1000)
+
+    @staticmethod
+    def _render_counter(name: str, help_text: str, series: Dict[Labels, int]) -> List[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f"{name}{_format_labels(labels)} {n}" for labels, n in sorted(series.items())]
+        return lines
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式（text/plain; version=0.0.4）"""
+        with self._lock:
+            lines = self._render_counter(
+                "mys_exchange_runs_total", "任务运行次数（按最终结果：" + "/".join(OUTCOME_NAMES) + "）", self._runs)
+            lines += self._render_counter("mys_exchange_shots_total", "兑换请求数（按单次请求结果）", self._shots)
+            lines += self.shot_latency.render()
+            lines += self.fire_error.render()
+        gauges: Dict[str, Tuple[str, str, List[str]]] = {}
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                entry = gauges.setdefault(name, (kind, help_text, []))
+                entry[2].append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {_format_value(value)}")
+        for name, (kind, help_text, samples) in gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", *samples]
+        lines += ["# HELP mys_process_start_time_seconds 进程启动时刻（Unix 时间）",
+                  "# TYPE mys_process_start_time_seconds gauge",
+                  f"mys_process_start_time_seconds {_format_value(self.started_at)}"]
+        return "\n".join(lines) + "\n"
+
+# 全局单例
+_metrics = None
+
+def get_metrics() -> Metrics:
+    """获取指标登记表实例"""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
@@ -0,0 +1,97 @@
+"""兑换结果分类模块 - 按 HTTP 状态、retcode 和提示信息判定每次请求的结果"""
+import json
+from typing import Dict, Iterable, Optional, Tuple
+
+# 结果类别
+SUCCESS = 'success'  # 兑换成功
+SOLD_OUT = 'sold_out'  # 已售罄 / 已兑换过 / 超出限购
+RATE_LIMITED = 'rate_limited'  # 请求过于频繁
+AUTH_ERROR = 'auth_error'  # 登录失效、Cookie 错误
+RETRYABLE = 'retryable'  # 尚未开始、网络错误、服务繁忙等，后续请求仍可能成功
+
+OUTCOME_NAMES = {
+    SUCCESS: '成功',
+    SOLD_OUT: '已售罄',
+    RATE_LIMITED: '限流',
+    AUTH_ERROR: '登录失效',
+    RETRYABLE: '可重试',
+}
+
+# 出现这些结果后，剩余请求已无意义，立即取消
+TERMINAL_OUTCOMES = frozenset({SUCCESS, SOLD_OUT, AUTH_ERROR})
+
+# retcode -> 结果类别，可用 register_retcode 或任务配置 retcode_outcomes 扩展
+RETCODE_OUTCOMES: Dict[int, str] = {
+    0: SUCCESS,
+    -100: AUTH_ERROR,
+    -101: AUTH_ERROR,
+    10001: AUTH_ERROR,
+    -110: RATE_LIMITED,
+    1028: RETRYABLE,
+}
+
+# 未登记的 retcode 按提示信息中的关键字判定（按顺序匹配）
+MESSAGE_KEYWORDS: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (('登录', 'cookie', 'Cookie', 'token'), AUTH_ERROR),
+    (('频繁', '太快', 'too many', 'Too Many'), RATE_LIMITED),
+    (('库存', '售罄', '兑换完', '已抢光', '已兑换', '上限', '限购'), SOLD_OUT),
+    (('未开始', '繁忙', '稍后'), RETRYABLE),
+)
+
+def register_retcode(retcode: int, outcome: str):
+    """登记（或覆盖）一个 retcode 的分类"""
+    if outcome not in OUTCOME_NAMES:
+        raise ValueError(f"未知的结果类别: {outcome}")
+    RETCODE_OUTCOMES[int(retcode)] = outcome
+
+def classify(status_code: Optional[int], body: Optional[str],
+             overrides: Optional[Dict[int, str]] = None) -> Tuple[str, Optional[int], str]:
+    """判定一次请求的结果，返回 (结果类别, retcode, message)
+
+    status_code / body 为 None 表示请求未拿到响应（网络错误、超时）
+    """
+    if status_code is None:
+        return RETRYABLE, None, body or ''
+    if status_code == 429:
+        return RATE_LIMITED, None, 'HTTP 429'
+    if status_code in (401, 403):
+        return AUTH_ERROR, None, f'HTTP {status_code}'
+
+    try:
+        data = json.loads(body or '')
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or 'retcode' not in data:
+        return RETRYABLE, None, f'HTTP {status_code}'
+
+    try:
+        retcode = int(data.get('retcode'))
+    except (TypeError, ValueError):
+        return RETRYABLE, None, str(data.get('message', ''))
+    message = str(data.get('message', ''))
+
+    if overrides and retcode in overrides:
+        return overrides[retcode], retcode, message
+    if retcode in RETCODE_OUTCOMES:
+        return RETCODE_OUTCOMES[retcode], retcode, message
+    for keywords, outcome in MESSAGE_KEYWORDS:
+        if any(k in message for k in keywords):
+            return outcome, retcode, message
+    return RETRYABLE, retcode, message
+
+def parse_overrides(config: Optional[Dict]) -> Dict[int, str]:
+    """解析任务配置中的 retcode_outcomes（JSON 键为字符串）"""
+    overrides = {}
+    for retcode, outcome in (config or {}).items():
+        if outcome not in OUTCOME_NAMES:
+            raise ValueError(f"未知的结果类别: {outcome}")
+        overrides[int(retcode)] = outcome
+    return overrides
+
+def summarize_outcomes(outcomes: Iterable[str]) -> str:
+    """汇总一次突发的最终结果：优先级 成功 > 售罄 > 登录失效 > 限流 > 可重试"""
+    outcomes = set(outcomes)
+    for outcome in (SUCCESS, SOLD_OUT, AUTH_ERROR, RATE_LIMITED, RETRYABLE):
+        if outcome in outcomes:
+            return outcome
+    return RETRYABLE
@@ -0,0 +1,210 @@
+"""兑换连接池模块 - 在开抢前预热并复用到商城接口的连接"""
+import asyncio
+import ipaddress
+import weakref
+import httpcore
+import httpx
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from core.timebase import get_timebase
+from utils.dns_resolver import get_dns_pinner
+from utils.logger import get_logger
+
+logger = get_logger()
+
+class PinnedNetworkBackend(httpcore.AsyncNetworkBackend):
+    """按 DNS 固定结果建立 TCP 连接的网络后端
+
+    只替换连接的目标地址，TLS 的 SNI 与证书校验仍使用原域名；
+    固定地址连接失败时依次换用其余地址，最后退回系统解析。
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, pinner=None):
+        self._backend = backend
+        self.pinner = pinner or get_dns_pinner()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        targets = self.pinner.connect_order(host)
+        for address in targets:
+            try:
+                return await self._backend.connect_tcp(address, port, timeout=timeout,
+                                                       local_address=local_address,
+                                                       socket_options=socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout):
+                if address == host:
+                    raise
+                self.pinner.mark_failed(host, address)
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+class ConnectionPool:
+    """按 host 共享的持久连接池
+
+    开抢前由 warm_up 并发建立好 TCP/TLS 连接，兑换请求直接复用已建立的连接，
+    避免在目标时刻才做 DNS、握手。
+    http2=True 时整个突发作为并发流复用同一条 HTTP/2 连接，预热一条即可。
+    """
+
+    KEEPALIVE_EXPIRY = 60  # 预热后的空闲连接保留时间（秒）
+
+    def __init__(self, base_url: str, verify=True, timeout: float = 10, http2: bool = False, partition: str = ''):
+        parts = urlsplit(base_url)
+        self.base_url = f"{parts.scheme}://{parts.netloc}"
+        self.verify = verify
+        self.timeout = timeout
+        self.http2 = http2
+        self.partition = partition  # 连接分区（多账号任务中为账号名）
+        self.pinner = get_dns_pinner()
+        self.http_version = None  # 预热时实际协商到的协议版本
+        self.size = 0  # 各任务预留的连接数之和
+        self.warm_count = 0  # 最近一次预热成功建立的连接数
+        self.warmed_at = None  # 最近一次预热完成的单调时刻（秒，取自时间源）
+        self.timebase = get_timebase()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight = 0
+        self._lock = asyncio.Lock()
+
+    def reserve(self, count: int):
+        """为一次突发预留连接"""
+        self.size += count
+
+    def release(self, count: int):
+        """释放预留的连接"""
+        self.size = max(0, self.size - count)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """获取共享客户端（未打开时创建）"""
+        if self._client is None:
+            self._open()
+        return self._client
+
+    def _open(self):
+        """创建客户端
+
+        多个任务共享同一客户端，各自预留的规模随时可能变化，因此不限制连接数，
+        实际保有的连接数由 warm_up 决定，避免扩容时重建客户端丢掉已预热的连接。
+        """
+        limits = httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=None,
+            keepalive_expiry=self.KEEPALIVE_EXPIRY,
+        )
+        try:
+            transport = httpx.AsyncHTTPTransport(limits=limits, verify=self.verify, http2=self.http2)
+        except ImportError:
+            # 未安装 h2 时退回 HTTP/1.1
+            logger.warning("未安装 h2，HTTP/2 模式退回 HTTP/1.1（pip install h2）")
+            self.http2 = False
+            transport = httpx.AsyncHTTPTransport(limits=limits, verify=self.verify)
+        # httpx 没有公开网络后端参数，直接替换底层 httpcore 连接池的后端以使用 DNS 固定结果
+        transport._pool._network_backend = PinnedNetworkBackend(transport._pool._network_backend, self.pinner)
+        self._client = httpx.AsyncClient(transport=transport, timeout=self.timeout)
+
+    async def warm_up(self, count: Optional[int] = None) -> int:
+        """预热连接：并发发起轻量请求，让连接池里留下 count 条已握手的连接
+
+        域名没有有效的 DNS 固定时先解析并固定，预热的连接即建立在最快的地址上。
+        返回成功建立的连接数；HTTP/2 下只需一条连接
+        """
+        count = count or max(self.size, 1)
+        if self.http2:
+            count = 1
+        async with self._lock:
+            await self._ensure_pinned()
+            client = self.client
+
+            start = self.timebase.mono_ns() / 1e9
+            results = await asyncio.gather(
+                *(self._touch(client) for _ in range(count)), return_exceptions=True
+            )
+            self.warm_count = sum(1 for r in results if r is True)
+            self.warmed_at = self.timebase.mono_ns() / 1e9
+            logger.info(
+                f"连接池预热完成 {self.base_url} ({self.http_version}): {self.warm_count}/{count} 条，"
+                f"耗时 {(self.warmed_at - start) * 1000:.1f} ms"
+            )
+            return self.warm_count
+
+    async def _ensure_pinned(self):
+        """域名未固定或固定已过期时重新解析并固定（IP 地址无需解析）"""
+        parts = urlsplit(self.base_url)
+        try:
+            ipaddress.ip_address(parts.hostname)
+            return
+        except ValueError:
+            pass
+        if not self.pinner.candidates(parts.hostname):
+            await self.pinner.refresh(parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+
+    async def _touch(self, client: httpx.AsyncClient) -> bool:
+        """发起一次 HEAD 请求以建立连接，响应状态码无关紧要"""
+        try:
+            response = await client.head(self.base_url + "/")
+            self.http_version = response.http_version
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"预热连接失败 {self.base_url}: {e}")
+            return False
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        """在共享连接上发送 POST 请求"""
+        self._in_flight += 1
+        try:
+            return await self.client.post(url, **kwargs)
+        finally:
+            self._in_flight -= 1
+
+    async def send(self, request: httpx.Request) -> httpx.Response:
+        """在共享连接上发送预先构造好的请求"""
+        self._in_flight += 1
+        try:
+            return await self.client.send(request)
+        finally:
+            self._in_flight -= 1
+
+    async def close(self):
+        """关闭客户端"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self.warm_count = 0
+
+
+# 每个事件循环各自持有一组连接池（httpx 客户端不能跨事件循环使用）
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, ConnectionPool]]" = weakref.WeakKeyDictionary()
+
+def get_connection_pool(url: str, verify=True, http2: bool = False, partition: str = '') -> ConnectionPool:
+    """获取当前事件循环中指定 host 的共享连接池（HTTP/1.1 与 HTTP/2 各自一组）
+
+    partition 不同的任务各用一组连接（多账号任务按账号分区，各账号的连接互不复用）
+    """
+    loop = asyncio.get_running_loop()
+    pools = _pools.setdefault(loop, {})
+    parts = urlsplit(url)
+    base_url = f"{parts.scheme}://{parts.netloc}"
+    key = (base_url, http2, partition)
+    if key not in pools:
+        pools[key] = ConnectionPool(base_url, verify=verify, http2=http2, partition=partition)
+    return pools[key]
+
+def pool_stats() -> List[Dict]:
+    """所有事件循环上连接池的预热状态（只读快照，可在其他线程调用）"""
+    now = get_timebase().mono_ns() / 1e9
+    stats = []
+    for pools in list(_pools.values()):
+        for pool in list(pools.values()):
+            stats.append({
+                "base_url": pool.base_url,
+                "http2": pool.http2,
+                "partition": pool.partition,
+                "reserved": pool.size,
+                "warm": pool.warm_count,
+                "warmed_age_s": None if pool.warmed_at is None else now - pool.warmed_at,
+                "in_flight": pool._in_flight,
+            })
+    return stats
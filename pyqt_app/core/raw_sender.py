@@ -0,0 +1,159 @@
+"""末字节同步发送模块 - 预先写出请求的绝大部分，触发时只补发最后几个字节"""
+import asyncio
+import ssl
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+from utils.dns_resolver import get_dns_pinner
+from utils.logger import get_logger
+
+logger = get_logger()
+
+def build_http_request(url: str, body: bytes, headers: Dict[str, str]) -> bytes:
+    """按 HTTP/1.1 格式构造完整的 POST 请求字节"""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    lines = [f"POST {path} HTTP/1.1", f"Host: {parts.netloc}", f"Content-Length: {len(body)}"]
+    skip = {"host", "content-length", "connection", "transfer-encoding"}
+    lines += [f"{k}: {v}" for k, v in headers.items() if k.lower() not in skip]
+    lines.append("Connection: keep-alive")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + body
+
+async def read_http_response(reader: asyncio.StreamReader, timeline=None) -> Tuple[int, Dict[str, str], bytes]:
+    """读取一个 HTTP/1.1 响应，返回 (状态码, 响应头, 响应体)
+
+    timeline 为 core.timeline.ShotTimeline 时，在读完响应头时记录 first_byte
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    if timeline is not None:
+        timeline.mark('first_byte')
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = b""
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0].strip(), 16)
+            if size == 0:
+                await reader.readuntil(b"\r\n")
+                break
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read()
+    return status, headers, body
+
+class _PrimedConnection:
+    """已写出请求前缀、等待补发末尾字节的连接"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, tail: bytes):
+        self.reader = reader
+        self.writer = writer
+        self.tail = tail
+
+    def close(self):
+        self.writer.close()
+
+class RawSender:
+    """末字节同步发送器
+
+    提前建立 N 条连接，把完整请求除最后 tail_bytes 个字节外全部写出；
+    到触发时刻只需写出末尾几个字节，服务器此时才收到完整请求。
+    触发路径上没有序列化、握手和大块写入，各连接之间的到达时间更集中。
+    """
+
+    def __init__(self, url: str, verify=True, tail_bytes: int = 1, timeout: float = 10):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname
+        self.tls = parts.scheme == "https"
+        self.port = parts.port or (443 if self.tls else 80)
+        self.verify = verify
+        self.tail_bytes = max(1, tail_bytes)
+        self.timeout = timeout
+        self._primed: List[_PrimedConnection] = []
+
+    @property
+    def ready(self) -> int:
+        """已就绪（尚未补发）的连接数"""
+        return len(self._primed)
+
+    def _ssl_context(self) -> Optional[ssl.SSLContext]:
+        if not self.tls:
+            return None
+        ctx = ssl.create_default_context()
+        if not self.verify:
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+        return ctx
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """按 DNS 固定结果建立连接，固定地址失败时依次换用其余地址，最后退回系统解析"""
+        pinner = get_dns_pinner()
+        for address in pinner.connect_order(self.host):
+            try:
+                return await asyncio.wait_for(
+                    asyncio.open_connection(address, self.port, ssl=self._ssl_context(),
+                                            server_hostname=self.host if self.tls else None),
+                    self.timeout,
+                )
+            except (OSError, asyncio.TimeoutError):
+                if address == self.host:
+                    raise
+                pinner.mark_failed(self.host, address)
+
+    async def _open_one(self, request: bytes) -> _PrimedConnection:
+        reader, writer = await self._connect()
+        writer.write(request[:-self.tail_bytes])
+        await writer.drain()
+        return _PrimedConnection(reader, writer, request[-self.tail_bytes:])
+
+    async def prime(self, count: int, request: Union[bytes, Callable[[], bytes]]) -> int:
+        """建立 count 条连接并写出请求前缀，返回就绪连接数
+
+        request 可以是可调用对象，为每条连接分别生成请求字节（如逐次变化的设备指纹）
+        """
+        build = request if callable(request) else (lambda: request)
+        results = await asyncio.gather(*(self._open_one(build()) for _ in range(count)),
+                                       return_exceptions=True)
+        for r in results:
+            if isinstance(r, Exception):
+                logger.warning(f"末字节同步连接建立失败 {self.host}:{self.port}: {r}")
+            else:
+                self._primed.append(r)
+        logger.info(f"末字节同步就绪 {self.host}: {len(self._primed)}/{count} 条连接")
+        return len(self._primed)
+
+    async def send(self, timeline=None) -> Tuple[int, Dict[str, str], bytes]:
+        """补发一条连接的末尾字节并读取响应
+
+        写出末尾字节发生在第一个 await 之前，同一轮事件循环里启动的多次 send
+        会背靠背地写出；没有就绪连接时抛出 ConnectionError。
+        timeline 为 core.timeline.ShotTimeline 时记录取得连接、写完请求、首字节的时刻
+        """
+        if not self._primed:
+            raise ConnectionError("没有就绪的连接")
+        conn = self._primed.pop(0)
+        if timeline is not None:
+            timeline.mark('conn_acquired')
+        conn.writer.write(conn.tail)
+        if timeline is not None:
+            timeline.mark('written')
+        try:
+            return await asyncio.wait_for(read_http_response(conn.reader, timeline), self.timeout)
+        finally:
+            conn.close()
+
+    async def close(self):
+        """关闭所有未使用的连接"""
+        for conn in self._primed:
+            conn.close()
+        self._primed.clear()
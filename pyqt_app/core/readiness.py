@@ -0,0 +1,121 @@
+"""触发前就绪检查模块 - 在目标时刻前并行检查 DNS、连接、Cookie、地址和时钟"""
+import asyncio
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from core.goods import GoodsService
+from core.timebase import get_timebase
+from utils.dns_resolver import get_dns_pinner
+from utils.logger import get_logger
+
+logger = get_logger()
+
+STAGE_NAMES = {
+    'dns': 'DNS 固定',
+    'pool': '连接预热',
+    'cookie': 'Cookie 校验',
+    'address': '收货地址',
+    'clock': '时钟置信度',
+}
+
+@dataclass
+class StageResult:
+    """单个检查阶段的结果"""
+    stage: str
+    ok: bool
+    elapsed_ms: float
+    detail: str
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+class ReadinessCheck:
+    """触发前就绪检查
+
+    各阶段互不依赖，并行执行并各自计时；任一阶段失败不会中止任务，
+    只负责尽早把问题报告出来（Cookie 失效、地址不存在等需要人工处理）。
+    """
+
+    def __init__(self, url: str, pool, count: int, cookie: str, address_id: str, clock,
+                 max_clock_error: float = 0.05, goods_service: Optional[GoodsService] = None):
+        self.url = url
+        self.pool = pool
+        self.count = count
+        self.cookie = cookie
+        self.address_id = str(address_id or '')
+        self.clock = clock
+        self.max_clock_error = max_clock_error  # 可接受的时钟误差上限（秒）
+        self.goods_service = goods_service or GoodsService()
+        self.addresses: List[str] = []  # 固定的地址（最快的在前）
+
+    async def run(self) -> List[StageResult]:
+        """并行执行全部阶段，按固定顺序返回结果"""
+        stages: List[Tuple[str, Callable[[], Awaitable[Tuple[bool, str]]]]] = [
+            ('dns', self._check_dns),
+            ('pool', self._check_pool),
+            ('cookie', self._check_cookie),
+            ('address', self._check_address),
+            ('clock', self._check_clock),
+        ]
+        return list(await asyncio.gather(*(self._timed(name, check) for name, check in stages)))
+
+    async def _timed(self, stage: str, check: Callable[[], Awaitable[Tuple[bool, str]]]) -> StageResult:
+        timebase = get_timebase()
+        start = timebase.mono_ns()
+        try:
+            ok, detail = await check()
+        except Exception as e:
+            ok, detail = False, f"{type(e).__name__}: {e}"
+        elapsed_ms = round((timebase.mono_ns() - start) / 1e6, 3)
+        if not ok:
+            logger.warning(f"就绪检查未通过 [{STAGE_NAMES[stage]}] {detail}")
+        return StageResult(stage, ok, elapsed_ms, detail)
+
+    async def _check_dns(self) -> Tuple[bool, str]:
+        parts = urlsplit(self.url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        pin = await get_dns_pinner().refresh(parts.hostname, port)
+        if pin is None:
+            return False, '解析或测速失败，沿用系统解析'
+        self.addresses = pin.addresses
+        best = pin.addresses[0]
+        return True, f"{best}（连接 {pin.connect_ms[best]:.1f} ms，共 {len(pin.addresses)} 个地址）"
+
+    async def _check_pool(self) -> Tuple[bool, str]:
+        warmed = await self.pool.warm_up(self.count)
+        return warmed > 0, f"{warmed}/{1 if self.pool.http2 else self.count} 条连接（{self.pool.http_version}）"
+
+    async def _check_cookie(self) -> Tuple[bool, str]:
+        if not self.cookie:
+            return False, '未配置 Cookie'
+        # GoodsService 是同步接口，放到线程池执行，避免阻塞引擎事件循环
+        points = await asyncio.to_thread(self.goods_service.get_user_points, self.cookie)
+        if points is None:
+            return False, '获取米游币失败，Cookie 可能已失效'
+        return True, f"米游币 {points}"
+
+    async def _check_address(self) -> Tuple[bool, str]:
+        if not self.address_id:
+            return True, '无需地址（游戏内商品）'
+        addresses = await asyncio.to_thread(self.goods_service.get_address_list, self.cookie)
+        ids = {str(a.get('id', '')) for a in addresses or [] if a.get('id')}
+        if not ids:
+            return False, '获取地址列表失败'
+        if self.address_id not in ids:
+            return False, f"地址 {self.address_id} 不在账号的地址列表中"
+        return True, f"地址 {self.address_id} 存在"
+
+    async def _check_clock(self) -> Tuple[bool, str]:
+        if not self.clock.synced:
+            return False, '时钟尚未校准'
+        error = self.clock.error_bound
+        detail = f"误差 ±{error * 1000:.1f} ms（上限 {self.max_clock_error * 1000:.0f} ms）"
+        return error <= self.max_clock_error, detail
+
+def format_report(results: List[StageResult]) -> str:
+    """把检查结果整理为一行摘要"""
+    parts = [
+        f"{STAGE_NAMES[r.stage]}{'通过' if r.ok else '失败'} {r.elapsed_ms:.0f} ms（{r.detail}）"
+        for r in results
+    ]
+    return '；'.join(parts)
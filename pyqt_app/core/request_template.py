@@ -0,0 +1,51 @@
+"""兑换请求预编译模块 - 预热时一次性序列化请求体和请求头，触发路径上不再编码"""
+import json
+from collections import deque
+from typing import Deque, Dict, Tuple
+import httpx
+from utils.helpers import generate_random_fp
+from core.raw_sender import build_http_request
+
+DEVICE_FP_HEADER = 'x-rpc-device_fp'
+
+class PreparedExchange:
+    """预编译的兑换请求
+
+    请求体编码为不可变的 bytes，请求头编码为 (bytes, bytes) 元组；
+    prepare 按突发规模预先构造好 httpx.Request，触发时直接交给连接发送。
+    只有真正逐次变化的字段（fresh_fp 时的设备指纹）在发送时修补。
+    """
+
+    def __init__(self, url: str, payload: Dict, headers: Dict[str, str], fresh_fp: bool = False):
+        self.url = url
+        self.body = json.dumps(payload).encode('utf-8')
+        self.headers: Tuple[Tuple[bytes, bytes], ...] = tuple(
+            (k.encode('ascii'), str(v).encode('utf-8')) for k, v in headers.items()
+        )
+        self.fresh_fp = fresh_fp
+        self._header_dict = dict(headers)
+        self._requests: Deque[httpx.Request] = deque()
+
+    def prepare(self, client: httpx.AsyncClient, count: int):
+        """预先构造 count 个请求对象（合并客户端默认头、编码 URL 等都在此完成）"""
+        self._requests = deque(
+            client.build_request("POST", self.url, content=self.body, headers=self.headers)
+            for _ in range(count)
+        )
+
+    def next_request(self, client: httpx.AsyncClient) -> httpx.Request:
+        """取出一个待发送的请求，预构造的用完时现场构造"""
+        if self._requests:
+            request = self._requests.popleft()
+        else:
+            request = client.build_request("POST", self.url, content=self.body, headers=self.headers)
+        if self.fresh_fp:
+            request.headers[DEVICE_FP_HEADER] = generate_random_fp()
+        return request
+
+    def raw_bytes(self) -> bytes:
+        """完整的 HTTP/1.1 请求字节（末字节同步模式使用）"""
+        headers = self._header_dict
+        if self.fresh_fp:
+            headers = {**headers, DEVICE_FP_HEADER: generate_random_fp()}
+        return build_http_request(self.url, self.body, headers)
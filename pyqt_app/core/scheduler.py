@@ -0,0 +1,164 @@
+"""触发调度模块 - 基于单调时钟的高精度定时触发"""
+import asyncio
+import heapq
+import itertools
+import weakref
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+from core.timebase import Timebase, get_timebase
+from utils.logger import get_logger
+
+logger = get_logger()
+
+class FireScheduler:
+    """高精度触发器
+
+    所有时刻都以时间源的单调时钟（纳秒）表示，不受系统时间跳变影响。
+    等待分两段：先用 asyncio.sleep 粗睡到目标前 spin_window，再忙等到精确时刻。
+    """
+
+    def __init__(self, lead: float = 0.0, spin_window: float = 0.002, timebase: Optional[Timebase] = None):
+        self.lead_ns = int(lead * 1e9)  # 提前触发量（秒）
+        self.spin_window_ns = int(spin_window * 1e9)  # 忙等窗口（秒）
+        self.last_error_ns = None  # 最近一次触发的实际误差（正数表示偏晚）
+        self.timebase = timebase or get_timebase()
+
+    @property
+    def lead(self) -> float:
+        """当前提前触发量（秒）"""
+        return self.lead_ns / 1e9
+
+    def set_lead(self, lead: float):
+        """调整提前触发量（秒）"""
+        self.lead_ns = int(lead * 1e9)
+
+    @staticmethod
+    def now_ns() -> int:
+        """当前单调时钟读数（纳秒）"""
+        return get_timebase().mono_ns()
+
+    @classmethod
+    def deadline_after(cls, seconds: float) -> int:
+        """将“距今多少秒”换算为单调时钟上的目标时刻"""
+        return cls.now_ns() + int(seconds * 1e9)
+
+    async def wait_until(self, deadline_ns: int) -> int:
+        """等待到 deadline_ns - lead，返回触发误差（纳秒）"""
+        fire_ns = deadline_ns - self.lead_ns
+
+        # 粗睡眠：醒在目标前 spin_window 附近，事件循环可继续处理其他任务
+        remaining = fire_ns - self.spin_window_ns - self.timebase.mono_ns()
+        if remaining > 0:
+            await asyncio.sleep(remaining / 1e9)
+
+        # 忙等：最后一小段不让出 CPU，避免定时器松弛
+        now = self.timebase.spin_until(fire_ns)
+
+        self.last_error_ns = now - fire_ns
+        return self.last_error_ns
+
+    async def fire_burst(self, deadline_ns: int, offsets: Sequence[float],
+                         shot: Callable[[int], Awaitable],
+                         should_stop: Optional[Callable[[], bool]] = None
+                         ) -> Tuple[List[int], List[asyncio.Task]]:
+        """按偏移表（秒，已排序）依次在 deadline_ns + offset 发出请求
+
+        间隔小于忙等窗口的请求合并为一组，在组内第一个时刻同时发出，
+        否则忙等期间已发出的请求得不到事件循环调度。
+        shot 以请求序号（对应 offsets 中的位置）调用。
+        should_stop 返回 True 时不再发出剩余请求（结果已确定）。
+        返回 (每次请求的触发误差, 已启动的请求任务)
+        """
+        errors: List[int] = []
+        launched: List[asyncio.Task] = []
+        offsets_ns = [int(o * 1e9) for o in offsets]
+        i = 0
+        while i < len(offsets_ns):
+            j = i + 1
+            while j < len(offsets_ns) and offsets_ns[j] - offsets_ns[i] < self.spin_window_ns:
+                j += 1
+            await self.wait_until(deadline_ns + offsets_ns[i])
+            if should_stop is not None and should_stop():
+                break
+            fired_ns = self.timebase.mono_ns()
+            for k in range(i, j):
+                launched.append(asyncio.ensure_future(shot(k)))
+                errors.append(fired_ns - (deadline_ns + offsets_ns[k] - self.lead_ns))
+            i = j
+        return errors, launched
+
+
+class TimerHeap:
+    """最小堆定时器
+
+    所有任务的等待点（倒计时提示、预热、触发）按单调时刻放进同一个最小堆，
+    事件循环上始终只挂一个定时器（对应堆顶），任务数再多也只在真正有事时唤醒。
+    取消等待即取消返回的 future，立即生效。
+    """
+
+    def __init__(self, timebase: Optional[Timebase] = None):
+        self.timebase = timebase or get_timebase()
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._handle = None
+        self._armed_ns = None
+        self.wakeups = 0  # 定时器实际唤醒次数（用于统计）
+
+    @property
+    def pending(self) -> int:
+        """尚未到期且未取消的等待数"""
+        return sum(1 for _, _, fut in self._heap if not fut.done())
+
+    def sleep_until(self, when_ns: int) -> asyncio.Future:
+        """返回一个在单调时刻 when_ns 完成的 future"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if when_ns <= self.timebase.mono_ns():
+            future.set_result(None)
+            return future
+        heapq.heappush(self._heap, (when_ns, next(self._seq), future))
+        self._arm(loop)
+        return future
+
+    def _arm(self, loop: asyncio.AbstractEventLoop):
+        """让事件循环定时器对准堆顶"""
+        heap = self._heap
+        while heap and heap[0][2].done():
+            heapq.heappop(heap)  # 惰性清理已取消的等待
+        if not heap:
+            if self._handle is not None:
+                self._handle.cancel()
+                self._handle = None
+                self._armed_ns = None
+            return
+        top = heap[0][0]
+        if self._handle is not None:
+            if self._armed_ns == top:
+                return
+            self._handle.cancel()
+        self._armed_ns = top
+        delay = (top - self.timebase.mono_ns()) / 1e9
+        self._handle = loop.call_at(loop.time() + max(delay, 0), self._fire, loop)
+
+    def _fire(self, loop: asyncio.AbstractEventLoop):
+        """弹出所有到期的等待"""
+        self._handle = None
+        self._armed_ns = None
+        self.wakeups += 1
+        now = self.timebase.mono_ns()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, future = heapq.heappop(heap)
+            if not future.done():
+                future.set_result(None)
+        self._arm(loop)
+
+
+# 每个事件循环各自持有一个定时器堆
+_timer_heaps: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TimerHeap]" = weakref.WeakKeyDictionary()
+
+def get_timer_heap() -> TimerHeap:
+    """获取当前事件循环的定时器堆"""
+    loop = asyncio.get_running_loop()
+    if loop not in _timer_heaps:
+        _timer_heaps[loop] = TimerHeap()
+    return _timer_heaps[loop]
@@ -0,0 +1,130 @@
+"""服务器时钟校准模块 - 从商城接口响应推算商城后端自身的时钟偏移"""
+import json
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+import httpx
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# 响应体中可能携带服务器时间的字段（秒或毫秒时间戳）
+BODY_TIME_KEYS = ('timestamp', 'server_time', 'now', 't')
+
+@dataclass
+class OffsetBound:
+    """单个响应给出的偏移区间（服务器 Unix 时间 - 单调时钟，秒）"""
+    low: float
+    high: float
+    rtt: float
+
+class ServerClock:
+    """商城服务器时钟估计
+
+    每个响应用 RTT 中点修正：服务器打时间戳的时刻一定落在 [发送, 接收] 之间，
+    Date 头只有秒级精度，因此每个样本给出一个偏移区间，多个样本取交集逐步收窄。
+    响应体里的毫秒时间戳同理，只是区间更窄。
+    """
+
+    def __init__(self, window: int = 64):
+        self.window = window
+        self.bounds: List[OffsetBound] = []
+
+    def observe(self, response: httpx.Response, sent_ns: int, received_ns: int):
+        """记录一个响应（sent_ns / received_ns 为请求发出、响应到达时的单调时钟）"""
+        t1, t4 = sent_ns / 1e9, received_ns / 1e9
+        rtt = t4 - t1
+        server_time = self._body_time(response)
+        if server_time is not None:
+            self._add(OffsetBound(server_time - t4, server_time - t1, rtt))
+            return
+        date = response.headers.get('date')
+        if not date:
+            return
+        try:
+            stamp = parsedate_to_datetime(date).timestamp()
+        except (TypeError, ValueError):
+            return
+        # 服务器时间在 [stamp, stamp + 1) 内，且打戳时刻在 [t1, t4] 内
+        self._add(OffsetBound(stamp - t4, stamp + 1 - t1, rtt))
+
+    @staticmethod
+    def _body_time(response: httpx.Response) -> Optional[float]:
+        """尝试从 JSON 响应体中读取服务器时间戳"""
+        if 'json' not in response.headers.get('content-type', ''):
+            return None
+        try:
+            data = json.loads(response.content or b'null')
+        except ValueError:
+            return None
+        for scope in (data, data.get('data') if isinstance(data, dict) else None):
+            if not isinstance(scope, dict):
+                continue
+            for key in BODY_TIME_KEYS:
+                value = scope.get(key)
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+                # 毫秒时间戳换算为秒
+                return value / 1000 if value > 1e11 else value
+        return None
+
+    def _add(self, bound: OffsetBound):
+        self.bounds.append(bound)
+        if len(self.bounds) > self.window:
+            self.bounds.pop(0)
+
+    def estimate(self) -> Optional[Dict]:
+        """返回 {offset, uncertainty, samples}，没有可用样本时返回 None
+
+        只用 RTT 接近最小值的样本（慢样本区间宽且更可能受排队影响），
+        交集为空说明样本互相矛盾，此时退回中位数并给出较大的不确定度。
+        """
+        if not self.bounds:
+            return None
+        min_rtt = min(b.rtt for b in self.bounds)
+        chosen = [b for b in self.bounds if b.rtt <= min_rtt * 1.5 + 0.002]
+        low = max(b.low for b in chosen)
+        high = min(b.high for b in chosen)
+        if low <= high:
+            return {"offset": (low + high) / 2, "uncertainty": (high - low) / 2, "samples": len(chosen)}
+        lows = sorted(b.low for b in chosen)
+        highs = sorted(b.high for b in chosen)
+        mid = (lows[len(lows) // 2] + highs[len(highs) // 2]) / 2
+        return {"offset": mid, "uncertainty": 0.5 + (low - high) / 2, "samples": len(chosen)}
+
+    @staticmethod
+    def confidence(uncertainty: float) -> float:
+        """把不确定度换算为 0~1 的置信度（±0 为 1，±500 ms 及以上为 0）"""
+        return max(0.0, min(1.0, 1 - uncertainty / 0.5))
+
+def choose_clock(ntp_offset: float, ntp_error: float, server: Optional[Dict],
+                 min_confidence: float = 0.8) -> Dict:
+    """在 NTP 与服务器推算的时间之间选择
+
+    决定请求是否“早到”的是商城服务器自己的时钟：当服务器估计足够可信，
+    且与 NTP 的差异超出两者误差之和时（说明服务器时钟确有偏差），采用服务器时间；
+    否则 NTP 更精确，继续使用 NTP。
+    """
+    decision = {
+        "source": "ntp",
+        "offset": ntp_offset,
+        "ntp_offset": ntp_offset,
+        "ntp_error_ms": round(ntp_error * 1000, 3),
+        "server_offset": None,
+        "server_uncertainty_ms": None,
+        "confidence": None,
+    }
+    if server is None:
+        return decision
+    confidence = ServerClock.confidence(server["uncertainty"])
+    decision.update(
+        server_offset=server["offset"],
+        server_uncertainty_ms=round(server["uncertainty"] * 1000, 3),
+        confidence=round(confidence, 3),
+        server_vs_ntp_ms=round((server["offset"] - ntp_offset) * 1000, 3),
+    )
+    if confidence >= min_confidence and abs(server["offset"] - ntp_offset) > server["uncertainty"] + ntp_error:
+        decision.update(source="server", offset=server["offset"])
+    return decision
@@ -0,0 +1,276 @@
+"""多进程分片模块 - 协调进程按目标时刻把任务分给多个工作进程
+
+单进程模式下所有任务的定时、TLS 与 JSON 处理共用一个 GIL，同一秒内开抢的任务很多时会互相拖慢。
+分片模式下协调进程只负责校时与汇总：时钟估计写入共享内存，各工作进程直接读取（不各自校时）；
+工作进程各自运行一个兑换引擎，任务事件与结果经队列汇总回协调进程，再合并成一条事件流。
+"""
+import multiprocessing
+import queue
+import struct
+import threading
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence
+from core.clock_service import ClockService, set_clock_service
+from core.clock_sync import ClockEstimate, ClockSync
+from core.engine import get_engine
+from core.events import Signal
+from core.timebase import Timebase, get_timebase
+from utils.storage import get_storage
+from utils.logger import get_logger, setup_logger
+
+logger = get_logger()
+
+class SharedClockState:
+    """共享内存中的一份时钟估计
+
+    单写多读：写入方先把序号改为奇数再写内容，写完改为偶数；
+    读取方读到奇数或前后序号不一致时重读，保证拿到完整的一份。序号未变时直接返回缓存的快照。
+    """
+
+    HEADER = struct.Struct('<q')  # 序号，0 表示尚无估计
+    BODY = struct.Struct('<dqdd')  # offset, ref_ns, drift, error
+    SIZE = HEADER.size + BODY.size
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner  # 创建方负责释放共享内存
+        self._seq = 0
+        self._cached: Optional[ClockEstimate] = None
+
+    @classmethod
+    def create(cls) -> 'SharedClockState':
+        shm = shared_memory.SharedMemory(create=True, size=cls.SIZE)
+        shm.buf[:cls.SIZE] = bytes(cls.SIZE)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedClockState':
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, estimate: ClockEstimate):
+        buf = self.shm.buf
+        if buf is None:  # 已关闭
+            return
+        seq = self.HEADER.unpack_from(buf, 0)[0]
+        self.HEADER.pack_into(buf, 0, seq + 1)
+        self.BODY.pack_into(buf, self.HEADER.size, estimate.offset, estimate.ref_ns, estimate.drift, estimate.error)
+        self.HEADER.pack_into(buf, 0, seq + 2)
+
+    def read(self) -> Optional[ClockEstimate]:
+        buf = self.shm.buf
+        if buf is None:
+            return self._cached
+        while True:
+            seq = self.HEADER.unpack_from(buf, 0)[0]
+            if seq == self._seq:
+                return self._cached
+            if seq & 1:
+                continue
+            values = self.BODY.unpack_from(buf, self.HEADER.size)
+            if self.HEADER.unpack_from(buf, 0)[0] == seq:
+                break
+        self._seq = seq
+        self._cached = ClockEstimate(*values)
+        return self._cached
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class SharedClockSync(ClockSync):
+    """估计存放在共享内存中的时钟同步器
+
+    协调进程中正常采样，每次更新估计即写入共享内存；工作进程中只读取。
+    单调时钟（perf_counter）在同一台机器上各进程一致，因此估计可直接跨进程使用。
+    """
+
+    def __init__(self, shared: SharedClockState, servers: Optional[Sequence] = None, **kwargs):
+        self.shared = shared
+        super().__init__(servers, **kwargs)
+
+    @property
+    def estimate(self) -> Optional[ClockEstimate]:
+        return self.shared.read()
+
+    @estimate.setter
+    def estimate(self, value: Optional[ClockEstimate]):
+        if value is not None:
+            self.shared.write(value)
+
+class SharedClockService(ClockService):
+    """工作进程中的时钟服务：只读取协调进程发布的估计，不自行校准也不保存状态"""
+
+    def __init__(self, shared: SharedClockState, timebase: Optional[Timebase] = None):
+        timebase = timebase or get_timebase()
+        super().__init__(timebase=timebase, sync=SharedClockSync(shared, timebase=timebase))
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def _load_state(self):
+        pass
+
+    def _save_state(self):
+        pass
+
+def _request_count(config: Dict) -> int:
+    """任务在触发时刻发出的请求数：多账号任务每个账号各发 count 个"""
+    return config.get('count', 5) * max(1, len(config.get('accounts') or []))
+
+def assign_shards(configs: List[Dict], workers: int, window: float = 1.0) -> List[List[Dict]]:
+    """按目标时刻把任务配置分给各工作进程
+
+    目标时刻落在同一个 window 秒内的任务视为同一批开抢，逐个放到该批中已分得请求数最少的进程，
+    让同一瞬间的触发与响应处理由多个进程并行承担；请求数相同时优先放到总请求数少的进程。
+    请求数按 _request_count 计（多账号任务按账号数放大）。
+    """
+    shards: List[List[Dict]] = [[] for _ in range(workers)]
+    totals = [0] * workers
+    groups: Dict[int, List[Dict]] = {}
+    for config in configs:
+        key = int(datetime.fromisoformat(config['time']).timestamp() // window)
+        groups.setdefault(key, []).append(config)
+    for key in sorted(groups):
+        batch = [0] * workers
+        for config in sorted(groups[key], key=lambda c: -_request_count(c)):
+            i = min(range(workers), key=lambda w: (batch[w], totals[w]))
+            shards[i].append(config)
+            batch[i] += _request_count(config)
+            totals[i] += _request_count(config)
+    return shards
+
+def _worker_main(worker_id: int, configs: List[Dict], shm_name: str, events, stop):
+    """工作进程入口：读取共享时钟，运行分到的任务，把事件与结果送回协调进程"""
+    from core.fanout import create_task
+
+    setup_logger(f'shard-{worker_id}.log')
+    shared = SharedClockState.attach(shm_name)
+    set_clock_service(SharedClockService(shared))
+
+    def forward(task_name: str, event: str, message: str = '', **fields):
+        events.put({"worker": worker_id, "task": task_name, "event": event, "message": message, **fields})
+
+    engine = get_engine()
+    tasks = []
+    for config in configs:
+        try:
+            task = create_task(config)
+        except (KeyError, ValueError, TypeError) as e:
+            forward(config.get('name', ''), "error", f"[{config.get('name', '')}] 任务配置无效: {e}", error=str(e))
+            continue
+        task.message_signal.connect(lambda message, name=task.name: forward(name, "message", message))
+        task.completed_signal.connect(lambda name: forward(name, "completed", f"[{name}] 已结束"))
+        task.error_signal.connect(
+            lambda name, error: forward(name, "error", f"[{name}] 任务异常: {error}", error=error))
+        task.timeline_signal.connect(lambda name, records: forward(
+            name, "timeline", f"[{name}] 已记录 {len(records)} 条请求时间线", records=records))
+        tasks.append(task)
+        engine.submit(task)
+
+    try:
+        while not engine.wait(timeout=0.2):
+            if stop.is_set():
+                engine.cancel_all()
+        engine.shutdown()
+        for task in tasks:
+            forward(task.name, "result", result=task.result)
+    finally:
+        events.put({"worker": worker_id, "event": "exit"})
+        shared.close()
+
+class ShardCoordinator:
+    """分片协调器：校时并发布到共享内存，启动工作进程，汇总事件与结果"""
+
+    event_signal = Signal(dict)  # 工作进程的任务事件 {"worker", "task", "event", "message", ...}
+
+    def __init__(self, workers: int, servers: Optional[Sequence] = None, storage=None):
+        self.workers = workers
+        self.shared = SharedClockState.create()
+        storage = storage or get_storage()
+        self.clock = ClockService(storage=storage, sync=SharedClockSync(
+            self.shared, servers or storage.get_ntp_servers() or None))
+        self.results: Dict[str, Dict] = {}  # {task_name: result}
+        self.errors: Dict[str, str] = {}
+        self.assignment: Dict[str, int] = {}  # {task_name: 工作进程编号}
+        self._ctx = multiprocessing.get_context('spawn')
+        self._events = self._ctx.Queue()
+        self._stop = self._ctx.Event()
+        self._processes: List[multiprocessing.Process] = []
+        self._collector: Optional[threading.Thread] = None
+        self._tokens: List[int] = []
+        self._closed = False
+
+    def start(self, configs: List[Dict]):
+        """分配并启动工作进程（已有的时钟估计在启动前即已写入共享内存）"""
+        for target in {config['time'] for config in configs}:
+            self._tokens.append(self.clock.subscribe(datetime.fromisoformat(target)))
+        for i, shard in enumerate(assign_shards(configs, self.workers)):
+            if not shard:
+                continue
+            for config in shard:
+                self.assignment[config['name']] = i
+            process = self._ctx.Process(target=_worker_main, name=f"shard-{i}", daemon=True,
+                                        args=(i, shard, self.shared.name, self._events, self._stop))
+            process.start()
+            self._processes.append(process)
+            logger.info(f"工作进程 {i} 已启动（pid {process.pid}），分得 {len(shard)} 个任务")
+        self._collector = threading.Thread(target=self._collect, name="shard-collector", daemon=True)
+        self._collector.start()
+
+    def _collect(self):
+        """汇总线程：读取工作进程送回的事件，直到全部工作进程退出"""
+        running = len(self._processes)
+        while running:
+            try:
+                event = self._events.get(timeout=0.5)
+            except queue.Empty:
+                if not any(p.is_alive() for p in self._processes):
+                    logger.error("工作进程异常退出，未送回全部结果")
+                    break
+                continue
+            kind = event.get('event')
+            if kind == 'exit':
+                running -= 1
+            elif kind == 'result':
+                self.results[event['task']] = event['result']
+            else:
+                if kind == 'error':
+                    self.errors[event['task']] = event.get('error', '')
+                self.event_signal.emit(event)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待全部工作进程结束并送回结果，返回是否已全部结束"""
+        if self._collector is None:
+            return True
+        self._collector.join(timeout)
+        return not self._collector.is_alive()
+
+    def stop(self):
+        """通知各工作进程取消全部任务"""
+        self._stop.set()
+
+    def shutdown(self):
+        """取消任务、回收工作进程并释放共享内存（重复调用时忽略）"""
+        if self._closed:
+            return
+        self._closed = True
+        self.stop()
+        self.wait(timeout=10)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for token in self._tokens:
+            self.clock.unsubscribe(token)
+        self.clock.stop()
+        self._events.close()
+        self.shared.close()
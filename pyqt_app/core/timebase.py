@@ -0,0 +1,187 @@
+"""时间源模块 - 单调时钟、系统时间、等待与 NTP 往返的统一接口，可替换为虚拟时间
+
+引擎与校时代码只通过 get_timebase() 读取时间，不直接调用 time / ntplib。
+VirtualTimebase 让事件循环在无事可做时直接把时间拨到下一个定时器，
+数小时的倒计时、校准节奏与触发逻辑可在毫秒内确定性地跑完。
+"""
+import asyncio
+import math
+import selectors
+import threading
+import time
+from typing import Callable, Coroutine, Optional, Tuple
+import ntplib
+
+class _NtpProtocol(asyncio.DatagramProtocol):
+    """接收单个 NTP 应答"""
+
+    def __init__(self, future: asyncio.Future, timebase: "Timebase"):
+        self.future = future
+        self.timebase = timebase
+
+    def datagram_received(self, data: bytes, addr):
+        if not self.future.done():
+            self.future.set_result((data, self.timebase.mono_ns()))
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+class Timebase:
+    """真实时间源"""
+
+    virtual = False
+
+    def mono_ns(self) -> int:
+        """单调时钟读数（纳秒）"""
+        return time.perf_counter_ns()
+
+    def wall_time(self) -> float:
+        """本机系统时间（Unix 时间）"""
+        return time.time()
+
+    def spin_until(self, when_ns: int) -> int:
+        """忙等到单调时刻 when_ns，返回实际时刻"""
+        now = time.perf_counter_ns()
+        while now < when_ns:
+            now = time.perf_counter_ns()
+        return now
+
+    def new_event_loop(self) -> asyncio.AbstractEventLoop:
+        return asyncio.new_event_loop()
+
+    def start_background(self, main: Callable[[], Coroutine], name: str) -> threading.Thread:
+        """在独立线程的事件循环中运行后台服务"""
+        thread = threading.Thread(target=lambda: asyncio.run(main()), name=name, daemon=True)
+        thread.start()
+        return thread
+
+    async def ntp_roundtrip(self, host: str, port: int, request: bytes, timeout: float) -> Tuple[bytes, int, int]:
+        """发送一个 NTP 请求，返回 (应答, 发送时刻, 接收时刻)（单调时钟纳秒）"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        transport = None
+        try:
+            transport, _ = await asyncio.wait_for(
+                loop.create_datagram_endpoint(lambda: _NtpProtocol(future, self), remote_addr=(host, port)),
+                timeout,
+            )
+            t1 = self.mono_ns()
+            transport.sendto(request)
+            data, t4 = await asyncio.wait_for(future, timeout)
+            return data, t1, t4
+        finally:
+            if transport is not None:
+                transport.close()
+
+
+class _VirtualSelector:
+    """虚拟时间的选择器：没有就绪的 I/O 时不阻塞，而是把虚拟时钟拨到下一个定时器"""
+
+    def __init__(self, timebase: "VirtualTimebase"):
+        self._selector = selectors.DefaultSelector()
+        self._timebase = timebase
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+    def select(self, timeout: Optional[float] = None):
+        # 还有连接时先给真实 I/O 一个很短的机会（本地替身的应答在微秒级到达）
+        grace = self._timebase.io_grace if len(self._selector.get_map()) > 1 else 0
+        events = self._selector.select(grace if timeout is None else min(grace, timeout))
+        if events or timeout == 0:
+            return events
+        if timeout is None:
+            return self._selector.select(None)  # 没有定时器，只能等真实 I/O 或其他线程唤醒
+        self._timebase.advance(timeout)
+        return []
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """时间读数来自 VirtualTimebase 的事件循环，asyncio.sleep / wait_for / call_at 都按虚拟时间计"""
+
+    def __init__(self, timebase: "VirtualTimebase"):
+        super().__init__(_VirtualSelector(timebase))
+        self._timebase = timebase
+
+    def time(self) -> float:
+        return self._timebase.mono_ns() / 1e9
+
+class VirtualTimebase(Timebase):
+    """虚拟时间源
+
+    单调时钟从 0 起，只在事件循环空闲或忙等时前进；系统时间为 start_time 加经过的虚拟时间。
+    NTP 往返不走网络：按 ntp_offset（真实时间 - 本机系统时间）与 ntp_delay 生成应答。
+    后台服务（时钟服务）作为同一事件循环上的任务运行，所有时刻都在一条虚拟时间线上。
+    必须在 new_event_loop() / run() 创建的事件循环中使用。
+    """
+
+    virtual = True
+
+    def __init__(self, start_time: Optional[float] = None, ntp_offset: float = 0.0,
+                 ntp_delay: float = 0.02, io_grace: float = 0.0):
+        self.start_time = time.time() if start_time is None else start_time
+        self.ntp_offset = ntp_offset
+        self.ntp_delay = ntp_delay  # NTP 往返时延（秒），上下行对称
+        self.io_grace = io_grace  # 有连接时每次拨动前等待真实 I/O 的时长（秒），访问进程外的服务器时需要
+        self.ntp_queries = []  # 每次 NTP 查询的虚拟时刻（纳秒）
+        self._now_ns = 0
+        self._lock = threading.Lock()
+
+    def mono_ns(self) -> int:
+        return self._now_ns
+
+    def wall_time(self) -> float:
+        return self.start_time + self._now_ns / 1e9
+
+    def advance(self, seconds: float):
+        """把虚拟时钟向前拨 seconds 秒（向上取整到纳秒，保证到达定时器时刻）"""
+        with self._lock:
+            self._now_ns += max(math.ceil(seconds * 1e9), 0)
+
+    def spin_until(self, when_ns: int) -> int:
+        with self._lock:
+            self._now_ns = max(self._now_ns, when_ns)
+            return self._now_ns
+
+    def new_event_loop(self) -> asyncio.AbstractEventLoop:
+        return VirtualEventLoop(self)
+
+    def run(self, main: Coroutine):
+        """在虚拟时间的事件循环中运行协程"""
+        with asyncio.Runner(loop_factory=self.new_event_loop) as runner:
+            return runner.run(main)
+
+    def start_background(self, main: Callable[[], Coroutine], name: str) -> asyncio.Task:
+        return asyncio.get_running_loop().create_task(main(), name=name)
+
+    async def ntp_roundtrip(self, host: str, port: int, request: bytes, timeout: float) -> Tuple[bytes, int, int]:
+        sent = ntplib.NTPPacket()
+        sent.from_data(request)
+        t1 = self.mono_ns()
+        self.ntp_queries.append(t1)
+        await asyncio.sleep(self.ntp_delay / 2)
+        true_time = self.wall_time() + self.ntp_offset
+        reply = ntplib.NTPPacket(version=3, mode=4, tx_timestamp=ntplib.system_to_ntp_time(true_time))
+        reply.stratum = 2
+        reply.orig_timestamp = sent.tx_timestamp
+        reply.recv_timestamp = ntplib.system_to_ntp_time(true_time)
+        await asyncio.sleep(self.ntp_delay / 2)
+        return reply.to_data(), t1, self.mono_ns()
+
+# 全局单例
+_timebase = None
+
+def get_timebase() -> Timebase:
+    """获取当前时间源（默认真实时间）"""
+    global _timebase
+    if _timebase is None:
+        _timebase = Timebase()
+    return _timebase
+
+def set_timebase(timebase: Optional[Timebase]):
+    """替换当前时间源（None 恢复为真实时间）
+
+    引擎、时钟服务、调度器与任务在创建时取得时间源，须在创建它们之前调用
+    """
+    global _timebase
+    _timebase = timebase
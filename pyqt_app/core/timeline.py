@@ -0,0 +1,67 @@
+"""请求时间线模块 - 记录每次兑换请求各阶段相对目标时刻的纳秒时间戳"""
+from typing import Dict, Optional
+from core.timebase import get_timebase
+
+# 时间线上的阶段（按发生顺序）
+TIMELINE_POINTS = ('scheduled', 'fired', 'conn_acquired', 'written', 'first_byte', 'completed')
+
+TIMELINE_NAMES = {
+    'scheduled': '计划发送',
+    'fired': '实际发送',
+    'conn_acquired': '取得连接',
+    'written': '写完请求',
+    'first_byte': '首字节',
+    'completed': '完成',
+}
+
+# httpcore trace 事件 -> 时间线阶段（同一阶段取首次出现的事件）
+TRACE_EVENTS = {
+    'http11.send_request_headers.started': 'conn_acquired',
+    'http2.send_request_headers.started': 'conn_acquired',
+    'http11.send_request_body.complete': 'written',
+    'http2.send_request_body.complete': 'written',
+    'http11.receive_response_headers.complete': 'first_byte',
+    'http2.receive_response_headers.complete': 'first_byte',
+}
+
+class ShotTimeline:
+    """单次请求的时间线
+
+    时间戳为时间源的单调时钟纳秒，导出时换算为相对目标时刻的偏移（负数表示早于目标时刻）。
+    """
+
+    __slots__ = ('index', 'target_ns', 'points', 'status', 'retcode', 'outcome', 'message')
+
+    def __init__(self, index: int, target_ns: int, scheduled_ns: int):
+        self.index = index
+        self.target_ns = target_ns
+        self.points: Dict[str, int] = {'scheduled': scheduled_ns}
+        self.status: Optional[int] = None
+        self.retcode: Optional[int] = None
+        self.outcome: Optional[str] = None
+        self.message = ''
+
+    def mark(self, point: str, ns: Optional[int] = None):
+        """记录一个阶段（已记录的不覆盖）"""
+        if point not in self.points:
+            self.points[point] = ns if ns is not None else get_timebase().mono_ns()
+
+    async def trace(self, event_name: str, info: Dict):
+        """httpx 请求扩展 trace 的回调，把连接层事件映射到时间线阶段"""
+        point = TRACE_EVENTS.get(event_name)
+        if point is not None:
+            self.mark(point)
+
+    def relative_ns(self) -> Dict[str, Optional[int]]:
+        """各阶段相对目标时刻的纳秒偏移，未发生的阶段为 None"""
+        return {p: (self.points[p] - self.target_ns if p in self.points else None) for p in TIMELINE_POINTS}
+
+    def to_dict(self) -> Dict:
+        return {
+            "shot": self.index,
+            "outcome": self.outcome,
+            "status": self.status,
+            "retcode": self.retcode,
+            "message": self.message,
+            "timeline_ns": self.relative_ns(),
+        }
@@ -0,0 +1,239 @@
+"""
+米游社商品兑换助手 - 无头运行入口
+Description: 不启动界面，直接按 data/tasks.json 调度全部任务，进度输出到标准输出 / JSONL，结束时打印汇总；
+             --serve 时常驻运行，并在本机端口提供任务管理接口与 Prometheus 指标（见 core/control.py）；
+             --workers N 时按目标时刻把任务分给 N 个工作进程（见 core/sharding.py）
+
+用法（在 pyqt_app 目录下）：
+    python -m headless [--tasks data/tasks.json] [--only 任务名 ...] [--jsonl events.jsonl | --jsonl -]
+                       [--include-past] [--serve [--port 8660] | --workers N]
+"""
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+from core.engine import get_engine
+from core.exchange import ExchangeTask
+from core.fanout import create_task
+from core.clock_service import get_clock_service, set_clock_service
+from core.control import ControlServer
+from core.sharding import ShardCoordinator
+from core.outcome import OUTCOME_NAMES
+from utils.storage import get_storage
+from utils.logger import setup_logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+class EventStream:
+    """任务事件输出：文本行写到标准输出，JSONL 写到文件（或以 JSONL 代替文本输出到标准输出）"""
+
+    def __init__(self, jsonl: Optional[TextIO] = None, text: bool = True):
+        self.jsonl = jsonl
+        self.text = text
+        self._lock = threading.Lock()
+
+    def write(self, task: str, event: str, message: str = '', **fields):
+        record = {"ts": round(time.time(), 3), "task": task, "event": event, **fields}
+        if message:
+            record["message"] = message
+        with self._lock:
+            if self.text:
+                stamp = time.strftime('%H:%M:%S')
+                print(f"{stamp} {message or f'[{task}] {event}'}", flush=True)
+            if self.jsonl is not None:
+                self.jsonl.write(json.dumps(record, ensure_ascii=False) + '\n')
+                self.jsonl.flush()
+
+    def attach(self, task: ExchangeTask):
+        """订阅任务的全部信号"""
+        task.message_signal.connect(lambda message: self.write(task.name, "message", message))
+        task.completed_signal.connect(lambda name: self.write(name, "completed", f"[{name}] 已结束"))
+        task.error_signal.connect(lambda name, error: self.write(name, "error", f"[{name}] 任务异常: {error}", error=error))
+        task.timeline_signal.connect(lambda name, records: self.write(
+            name, "timeline", f"[{name}] 已记录 {len(records)} 条请求时间线", records=records))
+
+def load_tasks(path: Optional[str]) -> List[Dict]:
+    """读取任务列表（默认 data/tasks.json）"""
+    if path is None:
+        return get_storage().get_tasks()
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def select_tasks(configs: List[Dict], only: List[str], include_past: bool, stream: EventStream) -> List[ExchangeTask]:
+    """按名称与目标时刻筛选任务"""
+    now = get_clock_service().now()
+    tasks = []
+    for config in configs:
+        name = config.get('name', '')
+        if only and name not in only:
+            continue
+        try:
+            task = create_task(config)
+        except (KeyError, ValueError, TypeError) as e:
+            stream.write(name, "skipped", f"[{name}] 任务配置无效: {e}", reason="invalid")
+            continue
+        if task.target_time <= now and not include_past:
+            stream.write(name, "skipped", f"[{name}] 目标时间 {task.target_time} 已过，跳过", reason="past")
+            continue
+        tasks.append(task)
+    return tasks
+
+def summarize(tasks: List[ExchangeTask], errors: Dict[str, str]) -> Dict:
+    """汇总每个任务的结果"""
+    rows = []
+    for task in tasks:
+        result = task.result
+        rows.append({
+            "task": task.name,
+            "target_time": task.target_time.isoformat(sep=' '),
+            "outcome": result.get('outcome') or ('error' if task.name in errors else 'cancelled'),
+            "error": errors.get(task.name),
+            "fire_error_ms": result.get('fire_error_ms'),
+            "sent": task.count - result.get('skipped_shots', task.count),
+            "count": task.count,
+        })
+        if result.get('accounts'):
+            # 多账号任务附带各账号的结果
+            rows[-1]["accounts"] = result['accounts']
+    summary = {"tasks": rows}
+    if resource is not None:
+        # Linux 下 ru_maxrss 以 KB 为单位
+        summary["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return summary
+
+def _summary_line(label: str, row: Dict) -> str:
+    return (f"{label}: {OUTCOME_NAMES.get(row['outcome'], row['outcome'])}"
+            f"（已发 {row['sent']}/{row['count']}，首发误差 "
+            f"{'-' if row['fire_error_ms'] is None else format(row['fire_error_ms'], '.3f')} ms）")
+
+def write_summary(stream: EventStream, summary: Dict):
+    lines = []
+    for row in summary['tasks']:
+        lines.append(_summary_line(f"  {row['task']}", row))
+        lines += [_summary_line(f"    {account['account']}", account) for account in row.get('accounts', [])]
+    stream.write('', "summary", "汇总:\n" + "\n".join(lines), **summary)
+
+def run_sharded(coordinator: ShardCoordinator, tasks: List[ExchangeTask], stream: EventStream,
+                interrupted: threading.Event) -> int:
+    """多进程模式：任务在工作进程中运行，本进程只校时并汇总事件与结果"""
+    coordinator.event_signal.connect(lambda event: stream.write(
+        event.pop('task', ''), event.pop('event'), event.pop('message', ''), **event))
+    coordinator.start([task.config for task in tasks])
+    stream.write('', "sharded", f"已分给 {coordinator.workers} 个工作进程", assignment=coordinator.assignment)
+    while not coordinator.wait(timeout=0.5):
+        if interrupted.is_set():
+            stream.write('', "interrupted", "收到中断信号，正在取消全部任务")
+            coordinator.stop()
+            break
+    coordinator.shutdown()
+
+    for task in tasks:
+        task.result = coordinator.results.get(task.name, {})
+    write_summary(stream, summarize(tasks, coordinator.errors))
+    if interrupted.is_set():
+        return 130
+    return 1 if coordinator.errors else 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="米游社商品兑换助手（无头模式）")
+    parser.add_argument("--tasks", default=None, help="任务文件（默认 data/tasks.json）")
+    parser.add_argument("--only", nargs="*", default=[], help="只运行指定名称的任务")
+    parser.add_argument("--jsonl", default=None, help="事件另存为 JSONL 文件；为 - 时以 JSONL 代替文本输出到标准输出")
+    parser.add_argument("--include-past", action="store_true", help="目标时间已过的任务也立即执行")
+    parser.add_argument("--serve", action="store_true", help="常驻运行并开启控制接口，任务结束后不退出")
+    parser.add_argument("--host", default="127.0.0.1", help="控制接口监听地址")
+    parser.add_argument("--port", type=int, default=8660, help="控制接口端口")
+    parser.add_argument("--workers", type=int, default=0, help="分给多少个工作进程运行（0 为单进程）")
+    args = parser.parse_args(argv)
+    if args.serve and args.workers:
+        parser.error("--serve 与 --workers 不能同时使用")
+
+    setup_logger('headless.log')
+    jsonl_file = None
+    if args.jsonl == '-':
+        stream = EventStream(sys.stdout, text=False)
+    else:
+        if args.jsonl:
+            jsonl_file = open(Path(args.jsonl), 'a', encoding='utf-8')
+        stream = EventStream(jsonl_file)
+
+    control = None
+    coordinator = None
+    try:
+        if args.workers:
+            # 协调器的时钟服务是本进程唯一的时钟：筛选与创建任务都读取它，不再另起默认的时钟服务
+            coordinator = ShardCoordinator(args.workers)
+            set_clock_service(coordinator.clock)
+        tasks = select_tasks(load_tasks(args.tasks), args.only, args.include_past, stream)
+        if not tasks and not args.serve:
+            stream.write('', "summary", "没有需要运行的任务", tasks=[])
+            return 0
+
+        errors: Dict[str, str] = {}
+
+        def attach(task: ExchangeTask):
+            stream.attach(task)
+            task.error_signal.connect(lambda name, error: errors.__setitem__(name, error))
+
+        for task in tasks:
+            attach(task)
+
+        engine = get_engine()
+        interrupted = threading.Event()
+
+        def on_signal(signum, frame):
+            interrupted.set()
+        signal.signal(signal.SIGINT, on_signal)
+        if hasattr(signal, 'SIGTERM'):
+            signal.signal(signal.SIGTERM, on_signal)
+
+        if args.serve:
+            control = ControlServer(args.host, args.port)
+            # 经控制接口添加的任务只转发事件；结果与异常由登记表保存（只保留最近结束的一部分）
+            control.registry.task_added.connect(stream.attach)
+            control.start()
+            stream.write('', "serving", f"控制接口: {control.address}（/tasks、/metrics）", address=control.address)
+
+        if coordinator is not None:
+            return run_sharded(coordinator, tasks, stream, interrupted)
+
+        for task in list(tasks):
+            engine.submit(task)
+            if control is not None:
+                control.registry.track(task)
+            stream.write(task.name, "submitted", f"[{task.name}] 已加入调度，目标时间: {task.target_time}",
+                         target_time=task.target_time.isoformat(sep=' '))
+
+        # 分段等待，以便及时响应中断信号；常驻模式下一直运行到收到中断信号
+        while not interrupted.is_set():
+            if args.serve:
+                interrupted.wait(0.5)
+            elif engine.wait(timeout=0.5):
+                break
+        if interrupted.is_set():
+            stream.write('', "interrupted", "收到中断信号，正在取消全部任务")
+        engine.shutdown()
+
+        if control is not None:
+            tasks, errors = control.registry.tasks(), {**errors, **control.registry.errors()}
+        write_summary(stream, summarize(tasks, errors))
+        if interrupted.is_set() and not args.serve:
+            return 130
+        return 1 if errors else 0
+    finally:
+        if coordinator is not None:
+            coordinator.shutdown()
+        if control is not None:
+            control.stop()
+        if jsonl_file is not None:
+            jsonl_file.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""测试公共配置：以 pyqt_app 为导入根目录（与 python -m 运行时一致），数据目录指向临时目录"""
+import asyncio
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from benchmarks.common import NtpStandIn, bench_clock
+from core import clock_service
+from utils import history, storage
+from utils.storage import Storage
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_storage(tmp_path_factory):
+    """共享存储（及由它定位的兑换历史）改用临时目录，测试不改动 pyqt_app/data
+
+    会话级：模块级夹具（如 test_burst 的 runs）先于函数级夹具运行，也要用到共享存储。
+    """
+    with pytest.MonkeyPatch.context() as patch:
+        data = Storage(tmp_path_factory.mktemp("data"))
+        patch.setattr(storage, "_storage", data)
+        patch.setattr(history, "_history_store", None)
+        yield data
+
+@contextmanager
+def synced_clock():
+    """在本地 NTP 替身上校准好的共享时钟服务
+
+    替身运行在独立线程的事件循环中，测试在自己的 asyncio.run 里直接使用时钟即可；
+    退出时停止时钟服务与替身，并恢复原来的共享时钟服务。
+    """
+    previous = clock_service._clock_service
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="ntp-stand-in", daemon=True)
+    thread.start()
+    ntp = asyncio.run_coroutine_threadsafe(NtpStandIn().start(), loop).result()
+    clock = bench_clock([ntp.address])
+    try:
+        assert asyncio.run(clock.sync.sync()), "本地 NTP 替身无应答"
+        yield clock
+    finally:
+        clock.stop()
+        asyncio.run_coroutine_threadsafe(ntp.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        clock_service.set_clock_service(previous)
+
+@pytest.fixture
+def ntp_clock():
+    with synced_clock() as clock:
+        yield clock
+
+@pytest.fixture(scope="module")
+def module_ntp_clock():
+    """同 ntp_clock，供模块级夹具共用"""
+    with synced_clock() as clock:
+        yield clock
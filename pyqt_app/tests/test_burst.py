@@ -0,0 +1,60 @@
+"""突发策略：计划偏移、实际发出的请求数与替身记录的到达时刻"""
+import asyncio
+import statistics
+import pytest
+from benchmarks.bench_burst import run_strategy
+from benchmarks.common import StandInServer, sale_handler
+from core.burst import burst_offsets
+
+COUNT = 6
+FIRE_EARLY_MS = 1  # 触发早于计划的上限
+FIRE_MEDIAN_MS = 2  # 触发误差中位数上限（个别请求可能因事件循环停顿而偏晚）
+ARRIVAL_EARLY_MS = 5  # 到达早于计划偏移的上限（本机校时误差）
+# 到达晚于计划偏移的上限：替身与任务共用事件循环，同时到达的请求排队读取，负载高时可达数十毫秒；
+# 偏移算错时后段请求会明显早于计划到达，由 ARRIVAL_EARLY_MS 检出
+ARRIVAL_LATE_MS = 60
+
+# 策略 -> 计划偏移（毫秒）
+CASES = {
+    "simultaneous": ({"strategy": "simultaneous"}, [0] * COUNT),
+    "uniform": ({"strategy": "uniform", "window_ms": 100}, [0, 20, 40, 60, 80, 100]),
+    "front_loaded": ({"strategy": "front_loaded", "window_ms": 100}, [0, 4, 16, 36, 64, 100]),
+    "explicit": ({"strategy": "explicit", "offsets_ms": [80, -30, 20, 0]}, [-30, 0, 20, 80]),
+}
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_planned_offsets(name):
+    burst, planned = CASES[name]
+    assert [o * 1000 for o in burst_offsets(burst, COUNT)] == pytest.approx(planned)
+
+def test_offset_options():
+    assert burst_offsets({"strategy": "uniform", "window_ms": 100, "start_ms": -50}, 3) == pytest.approx([-0.05, 0, 0.05])
+    assert burst_offsets({"strategy": "front_loaded", "window_ms": 90, "power": 1}, 4) == pytest.approx([0, 0.03, 0.06, 0.09])
+    assert burst_offsets({"strategy": "uniform"}, 1) == [0]
+    assert burst_offsets(None, 3) == [0, 0, 0]
+    with pytest.raises(ValueError):
+        burst_offsets({"strategy": "random"}, 3)
+
+@pytest.fixture(scope="module")
+def runs(module_ntp_clock):
+    """对每种策略各运行一次真实任务（替身始终返回“未开始”，每个请求都会发出）"""
+    async def run_all():
+        async with StandInServer(handler=sale_handler()) as server:
+            return {name: await run_strategy(server, module_ntp_clock, burst, COUNT)
+                    for name, (burst, _) in CASES.items()}
+    return asyncio.run(run_all())
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_burst_against_stand_in(runs, name):
+    planned = CASES[name][1]
+    result = runs[name]
+    assert result["planned_ms"] == pytest.approx(planned)
+    errors = result["fire_error_ms"]
+    assert len(errors) == len(planned)
+    assert min(errors) >= -FIRE_EARLY_MS and max(errors) <= ARRIVAL_LATE_MS, errors
+    assert statistics.median(abs(e) for e in errors) <= FIRE_MEDIAN_MS, errors
+    # 每个计划的请求恰好到达一次，且按计划的形状分布
+    arrivals = result["arrival_ms"]
+    assert len(arrivals) == len(planned)
+    for plan, arrival in zip(planned, arrivals):
+        assert plan - ARRIVAL_EARLY_MS <= arrival <= plan + ARRIVAL_LATE_MS, (planned, arrivals)
@@ -0,0 +1,40 @@
+"""ClockSync 偏移估计：样本不足时不被高时延样本带偏"""
+import pytest
+from core.clock_sync import ClockSample, ClockSync
+from core.timebase import VirtualTimebase
+
+TRUE_OFFSET = 1.5  # 服务器时间 - 单调时钟（秒）
+
+def make_sync() -> ClockSync:
+    return ClockSync(servers=["127.0.0.1:1"], timebase=VirtualTimebase())
+
+def sample(mono_s: float, delay: float, asymmetry: float = 0.0) -> ClockSample:
+    """时延为 delay 的样本；asymmetry 为上下行不对称造成的偏移误差（最大为 delay / 2）"""
+    return ClockSample("stand-in", int(mono_s * 1e9), TRUE_OFFSET + asymmetry, delay)
+
+def test_two_samples_prefer_lowest_delay():
+    sync = make_sync()
+    sync.add_sample(sample(0.0, 0.001))
+    # 慢应答：回包在打好时间戳后才延迟发出，偏移偏小 delay / 2
+    sync.add_sample(sample(0.5, 0.043, asymmetry=-0.0214))
+    assert sync.estimate.offset == pytest.approx(TRUE_OFFSET, abs=1e-6)
+    assert sync.error_bound < 0.005
+
+def test_short_span_ignores_outlier():
+    sync = make_sync()
+    sync.add_sample(sample(0.0, 0.002, asymmetry=0.0004))
+    sync.add_sample(sample(1.0, 0.060, asymmetry=-0.03))
+    sync.add_sample(sample(2.0, 0.002, asymmetry=-0.0004))
+    sync.add_sample(sample(3.0, 0.080, asymmetry=-0.04))
+    assert sync.drift == 0.0
+    assert sync.estimate.offset == pytest.approx(TRUE_OFFSET, abs=0.001)
+
+def test_drift_fit_with_outlier():
+    sync = make_sync()
+    drift = 20e-6
+    for i in range(10):
+        t = i * 10.0
+        delay, asymmetry = (0.090, -0.045) if i == 4 else (0.002, 0.0)
+        sync.add_sample(ClockSample("stand-in", int(t * 1e9), TRUE_OFFSET + drift * t + asymmetry, delay))
+    assert sync.drift == pytest.approx(drift, rel=0.05)
+    assert sync.offset_at(int(90e9)) == pytest.approx(TRUE_OFFSET + drift * 90, abs=1e-4)
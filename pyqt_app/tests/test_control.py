@@ -0,0 +1,56 @@
+"""控制接口任务登记：提交成功后才通知订阅方，已结束的任务只保留最近一部分"""
+from datetime import datetime, timedelta
+import pytest
+from benchmarks.common import bench_task_config
+from core.control import ControlError, TaskRegistry
+
+class StubEngine:
+    """只记录提交的引擎：accept 为假时模拟同名任务已在运行"""
+
+    def __init__(self):
+        self.accept = True
+        self.running = set()
+
+    def submit(self, task) -> bool:
+        if not self.accept:
+            return False
+        self.running.add(task.name)
+        return True
+
+    def status(self, name: str) -> str:
+        return "running" if name in self.running else "idle"
+
+    def running_tasks(self):
+        return list(self.running)
+
+def body(name: str) -> dict:
+    return bench_task_config(name, datetime.now() + timedelta(hours=1))
+
+def test_rejected_submit_is_not_announced():
+    engine = StubEngine()
+    registry = TaskRegistry(engine)
+    added = []
+    registry.task_added.connect(added.append)
+    engine.accept = False
+    for _ in range(3):
+        with pytest.raises(ControlError):
+            registry.add(body("dup"))
+    assert added == [] and registry.tasks() == []
+    engine.accept = True
+    registry.add(body("dup"))
+    assert [t.name for t in added] == ["dup"] and len(registry.tasks()) == 1
+
+def test_finished_tasks_are_evicted():
+    engine = StubEngine()
+    registry = TaskRegistry(engine)
+    registry.MAX_FINISHED = 5
+    registry.add(body("long"))
+    for i in range(20):
+        registry.add(body(f"t{i}"))
+        engine.running.discard(f"t{i}")  # 运行结束
+        registry.tasks()[-1].error_signal.emit(f"t{i}", "boom")
+    names = [t.name for t in registry.tasks()]
+    # 仍在运行的任务不清理；已结束的保留最近 5 个（下一次登记时清理）
+    assert "long" in names and len(names) <= 1 + 5 + 1
+    assert "t0" not in names and "t19" in names
+    assert set(registry.errors()) <= set(names)
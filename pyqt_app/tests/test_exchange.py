@@ -0,0 +1,55 @@
+"""ExchangeTask：重复运行时结果从零开始，触发前空走发送路径，stop() 通过引擎取消任务"""
+import asyncio
+import time
+from datetime import timedelta
+from benchmarks.common import StandInServer, bench_task_config, sale_handler
+from core.engine import get_engine
+from core.exchange import ExchangeTask
+
+COUNT = 3
+
+def test_rerun_starts_from_empty_result(ntp_clock):
+    async def run():
+        async with StandInServer(handler=sale_handler()) as server:
+            task = ExchangeTask(bench_task_config("rerun", ntp_clock.now(), server.base_url, count=COUNT,
+                                                  warmup_lead=0.5, latency_compensation=False))
+            runs = []
+            for _ in range(2):
+                task.target_time = ntp_clock.now() + timedelta(seconds=1)
+                await task.run()
+                runs.append((len(task.timelines), len(task.result['shots']), task.result['outcome']))
+            return runs
+    assert asyncio.run(run()) == [(COUNT, COUNT, "retryable")] * 2
+
+def test_pretouch_sends_head_before_burst(ntp_clock):
+    async def run():
+        async with StandInServer(handler=sale_handler()) as server:
+            target = ntp_clock.now() + timedelta(seconds=1.5)
+            task = ExchangeTask(bench_task_config("pretouch", target, server.base_url, count=COUNT,
+                                                  warmup_lead=1.2, latency_compensation=False))
+            await task.run()
+            target_ns = ntp_clock.mono_ns_for(target)
+            return [(r.method, (r.arrived_ns - target_ns) / 1e9) for r in server.requests], task
+    requests, task = asyncio.run(run())
+    # 时延探测在触发前 PROBE_STOP 秒停止，之后到达的 HEAD 只能来自空发
+    late_heads = [t for method, t in requests if method == "HEAD" and t > -task.PROBE_STOP]
+    posts = [t for method, t in requests if method == "POST"]
+    assert len(late_heads) == 1 and len(posts) == COUNT
+    assert late_heads[0] < min(posts)
+    assert len(task.result['shots']) == COUNT
+
+def test_stop_cancels_through_engine(ntp_clock):
+    engine = get_engine()
+    task = ExchangeTask(bench_task_config("stop", ntp_clock.now() + timedelta(minutes=5), "http://127.0.0.1:9"))
+    assert engine.submit(task)
+    time.sleep(0.2)
+    assert engine.status(task.name) == "running"
+    assert task.stop()
+    assert engine.wait(timeout=5)
+    assert engine.status(task.name) == "idle"
+    # 取消在引擎线程中完成清理
+    deadline = time.monotonic() + 2
+    while task.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not task.running
+    assert not task.stop()
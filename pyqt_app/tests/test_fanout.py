@@ -0,0 +1,50 @@
+"""多账号任务：按账号拆分子任务配置（不改动存储），各账号的请求合并成一次突发发出"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+from benchmarks.common import StandInServer, bench_task_config, sale_handler
+from core.fanout import FanOutTask, expand_accounts
+from utils.storage import Storage
+
+def make_storage(tmp_path) -> Storage:
+    storage = Storage(tmp_path)
+    storage.save_account("alice", {"account_id": "101", "cookie_token": "a"}, "device-a")
+    storage.save_account("bob", {"account_id": "202", "cookie_token": "b"}, "")
+    return storage
+
+def test_expand_accounts(tmp_path):
+    storage = make_storage(tmp_path)
+    config = dict(bench_task_config("task", datetime.now()), accounts=["alice", "bob"],
+                  account_addresses={"bob": "addr-b"})
+    before = storage.config_file.read_bytes()
+    first = expand_accounts(config, storage)
+    second = expand_accounts(config, storage)
+    assert storage.config_file.read_bytes() == before
+    assert [c["name"] for c in first] == ["task@alice", "task@bob"]
+    assert [c["payload"]["uid"] for c in first] == ["101", "202"]
+    assert [c["payload"].get("address_id") for c in first] == [config["payload"].get("address_id"), "addr-b"]
+    assert first[0]["headers"]["x-rpc-device_id"] == "device-a"
+    # 没有设备 ID 的账号每次拆分得到同一个派生 ID
+    assert first[1]["headers"]["x-rpc-device_id"] == second[1]["headers"]["x-rpc-device_id"] != "device-a"
+    assert "cookie_token=b" in first[1]["headers"]["Cookie"]
+    assert all("accounts" not in c and "account_addresses" not in c for c in first)
+
+def test_fan_out_against_stand_in(tmp_path, ntp_clock):
+    storage = make_storage(tmp_path)
+
+    async def run():
+        async with StandInServer(handler=sale_handler()) as server:
+            config = dict(bench_task_config("fan", ntp_clock.now() + timedelta(seconds=1.5), server.base_url,
+                                            count=2, warmup_lead=1.2, latency_compensation=False),
+                          accounts=["alice", "bob"])
+            task = FanOutTask(config, storage)
+            await task.run()
+            return task, [json.loads(r.body)["uid"] for r in server.requests if r.method == "POST"]
+    task, uids = asyncio.run(run())
+    assert sorted(uids) == ["101", "101", "202", "202"]
+    assert task.result["outcome"] == "retryable"
+    assert [(row["account"], row["sent"], row["count"]) for row in task.result["accounts"]] == [
+        ("alice", 2, 2), ("bob", 2, 2)]
+    assert len(task.result["shot_errors_ms"]) == 4
+    # 各账号使用同一个触发时刻与提前量
+    assert len({child.result["lead_ms"] for child in task.children}) == 1
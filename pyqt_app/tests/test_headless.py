@@ -0,0 +1,16 @@
+"""无头模式任务筛选：配置无效的任务被跳过，不中断其余任务"""
+import io
+import json
+from datetime import datetime
+from benchmarks.common import bench_task_config
+from headless import EventStream, select_tasks
+
+def test_invalid_time_is_skipped():
+    valid = bench_task_config("valid", datetime.now())
+    configs = [{"name": "missing"}] + [dict(valid, name=name, time=time) for name, time in
+                                       (("null", None), ("number", 1700000000), ("garbled", "tomorrow noon"))]
+    out = io.StringIO()
+    assert select_tasks(configs, [], include_past=True, stream=EventStream(out, text=False)) == []
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(e["task"], e["event"], e["reason"]) for e in events] == [
+        (c["name"], "skipped", "invalid") for c in configs]
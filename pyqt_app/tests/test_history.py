@@ -0,0 +1,25 @@
+"""兑换历史：建库在写入线程完成，登记与构造都不碰磁盘"""
+import sqlite3
+import threading
+from utils import history
+from utils.history import HistoryStore
+
+def test_schema_is_created_on_writer_thread(tmp_path, monkeypatch):
+    threads, real_connect = [], sqlite3.connect
+    def connect(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return real_connect(*args, **kwargs)
+    monkeypatch.setattr(history.sqlite3, "connect", connect)
+
+    store = HistoryStore(tmp_path / "history.db")
+    assert threads == [] and not (tmp_path / "history.db").exists()
+    store.start()
+    store.record_run("t", {"time": "2030-01-01 00:00:00", "headers": {"Cookie": "x"}},
+                     {"outcome": "success", "shots": [{"shot": 0, "outcome": "success"}]})
+    assert store.flush()
+    assert threads == ["history-writer"]
+
+    runs = store.runs(task="t")
+    store.close()
+    assert [r["outcome"] for r in runs] == ["success"]
+    assert "Cookie" not in str(store.run_detail(runs[0]["id"])["config"])
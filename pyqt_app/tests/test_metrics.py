@@ -0,0 +1,30 @@
+"""运行指标：时间序列数不随任务数增长"""
+from core.metrics import Metrics
+
+def shot(outcome: str, fired_ns: int, completed_ns: int) -> dict:
+    return {"outcome": outcome, "timeline_ns": {"fired": fired_ns, "completed": completed_ns}}
+
+def series(text: str) -> set:
+    """全部样本行的指标名与标签（不含值）"""
+    return {line.rsplit(' ', 1)[0] for line in text.splitlines()
+            if line and not line.startswith('#') and not line.startswith('mys_process_')}
+
+def record(metrics: Metrics, tasks: range):
+    for i in tasks:
+        metrics.record_run({"outcome": "success" if i % 2 else "sold_out",
+                            "shots": [shot("retryable", 0, 20_000_000), shot("success", 0, 30_000_000)],
+                            "shot_errors_ms": [0.3, 0.4]}, send_mode="http2" if i % 3 else "pooled")
+
+def test_series_do_not_grow_with_tasks():
+    metrics = Metrics()
+    record(metrics, range(10))
+    before = series(metrics.render())
+    record(metrics, range(10, 60))
+    text = metrics.render()
+    assert series(text) == before
+    assert not any('task=' in s for s in before)
+    assert 'mys_exchange_shot_latency_seconds_count 120' in text
+    assert 'mys_exchange_fire_error_seconds_count 120' in text
+    runs = [line for line in text.splitlines() if line.startswith('mys_exchange_runs_total{')]
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in runs) == 60
+    assert len(runs) == 4  # 2 种结果 × 2 种发送模式
@@ -0,0 +1,29 @@
+"""提前终止：各场景下的结果类别、服务器实际收到的请求数与取消的进行中请求数"""
+import asyncio
+import pytest
+from benchmarks.bench_outcome import SCENARIOS, run_scenario
+
+COUNT = 10
+WINDOW_MS = 400  # 相邻请求约 44 ms，远大于替身 10 ms 的往返时延，结果确定后不会再有请求发出
+
+# 场景 -> (结果类别, 服务器收到的兑换请求数, 取消的进行中请求数)
+EXPECTED = {
+    "success_on_3rd": ("success", 3, 0),
+    "sold_out_on_2nd": ("sold_out", 2, 0),
+    "auth_error": ("auth_error", 1, 0),
+    "rate_limited": ("rate_limited", COUNT, 0),
+    "all_retryable": ("retryable", COUNT, 0),
+    "success_with_2_in_flight": ("success", 3, 2),
+}
+
+def test_every_scenario_has_expectation():
+    assert set(EXPECTED) == set(SCENARIOS)
+
+@pytest.mark.parametrize("name", list(EXPECTED))
+def test_scenario(ntp_clock, name):
+    outcome, received, cancelled = EXPECTED[name]
+    result = asyncio.run(run_scenario(name, SCENARIOS[name], ntp_clock, COUNT, WINDOW_MS))
+    assert result["outcome"] == outcome
+    assert result["server_received"] == received
+    assert result["cancelled_in_flight"] == cancelled
+    assert result["skipped"] == COUNT - received
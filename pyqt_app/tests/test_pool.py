@@ -0,0 +1,18 @@
+"""连接池预热：域名没有有效的 DNS 固定时先解析并固定"""
+import asyncio
+from benchmarks.common import StandInServer
+from core.pool import ConnectionPool
+
+def test_warm_up_pins_host():
+    async def run():
+        async with StandInServer() as server:
+            pool = ConnectionPool(f"http://localhost:{server.port}")
+            pool.pinner.unpin("localhost")
+            try:
+                warmed = await pool.warm_up(2)
+            finally:
+                await pool.close()
+            return warmed, pool.pinner.candidates("localhost")
+    warmed, addresses = asyncio.run(run())
+    assert warmed == 2
+    assert addresses and addresses[0] in ("127.0.0.1", "::1")
@@ -0,0 +1,57 @@
+"""多进程分片：按请求数（含多账号）分配，无效配置只报告错误，协调进程只使用协调器自己的时钟服务"""
+import json
+import queue
+import threading
+from datetime import datetime
+import pytest
+import headless
+from benchmarks.common import bench_task_config
+from core import clock_service, sharding
+from core.sharding import SharedClockState, _worker_main, assign_shards
+
+@pytest.fixture(autouse=True)
+def no_log_files(monkeypatch):
+    """入口函数会调用 setup_logger 在 pyqt_app/logs 下建日志文件，测试中跳过"""
+    monkeypatch.setattr(sharding, "setup_logger", lambda *args, **kwargs: None)
+    monkeypatch.setattr(headless, "setup_logger", lambda *args, **kwargs: None)
+
+def test_multi_account_tasks_weigh_by_account_count():
+    """同一批中 3 账号 × 5 个请求的任务独占一个进程，其余单账号任务都分到另一个进程"""
+    target = datetime(2030, 1, 1, 20, 0)
+    configs = [bench_task_config(f"single-{i}", target, count=5) for i in range(2)]
+    configs.append(dict(bench_task_config("multi", target, count=5), accounts=["a", "b", "c"]))
+    shards = assign_shards(configs, 2)
+    assert sorted(sorted(c["name"] for c in shard) for shard in shards) == [["multi"], ["single-0", "single-1"]]
+
+def test_worker_reports_invalid_time():
+    config = dict(bench_task_config("null", datetime.now()), time=None)
+    shared = SharedClockState.create()
+    events = queue.Queue()
+    previous = clock_service._clock_service
+    try:
+        _worker_main(0, [config], shared.name, events, threading.Event())
+    finally:
+        clock_service.set_clock_service(previous)
+        shared.close()
+    received = [events.get_nowait() for _ in range(events.qsize())]
+    assert [(e["task"], e["event"]) for e in received if e["event"] != "exit"] == [("null", "error")]
+    assert received[-1]["event"] == "exit"
+
+def test_coordinator_clock_is_the_only_clock(tmp_path, monkeypatch):
+    coordinators = []
+
+    class RecordingCoordinator(headless.ShardCoordinator):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            coordinators.append(self)
+
+    def no_default_clock():
+        raise AssertionError("分片模式下不应创建默认的时钟服务")
+
+    monkeypatch.setattr(headless, "ShardCoordinator", RecordingCoordinator)
+    monkeypatch.setattr(clock_service, "ClockService", lambda *args, **kwargs: no_default_clock())
+    monkeypatch.setattr(clock_service, "_clock_service", None)
+    tasks_file = tmp_path / "tasks.json"
+    tasks_file.write_text(json.dumps([{"name": "past", "time": "2000-01-01 00:00:00"}]), encoding="utf-8")
+    assert headless.main(["--tasks", str(tasks_file), "--workers", "1", "--jsonl", "-"]) == 0
+    assert clock_service.get_clock_service() is coordinators[0].clock
@@ -0,0 +1,16 @@
+"""接口地址重定向：缓存读取结果，config.json 变化后重新加载"""
+from unittest import mock
+from utils.storage import Storage
+
+def test_api_overrides_cached_until_config_changes(tmp_path):
+    storage = Storage(tmp_path)
+    storage.save_config({'api_overrides': {'https://mall.example': 'http://127.0.0.1:1'}})
+    assert storage.get_api_overrides() == {'https://mall.example': 'http://127.0.0.1:1'}
+    with mock.patch.object(storage, 'get_config', wraps=storage.get_config) as get_config:
+        for _ in range(5):
+            storage.get_api_overrides()
+        assert get_config.call_count == 0
+    storage.save_config({'api_overrides': {'https://mall.example': 'http://127.0.0.1:22'}})
+    assert storage.get_api_overrides() == {'https://mall.example': 'http://127.0.0.1:22'}
+    storage.save_config({})
+    assert storage.get_api_overrides() == {}
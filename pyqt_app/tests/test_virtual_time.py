@@ -0,0 +1,144 @@
+"""虚拟时间：定时器堆的唤醒点、时钟服务的校准节奏、数小时任务的倒计时与触发误差"""
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from benchmarks.common import bench_clock, bench_task_config
+from benchmarks.mock_mall import MockMall
+from core import clock_service as clock_service_module
+from core import timebase as timebase_module
+from core.clock_service import ClockService, set_clock_service
+from core.clock_sync import BEIJING_TZ
+from core.exchange import ExchangeTask
+from core.scheduler import get_timer_heap
+from core.timebase import VirtualTimebase, set_timebase
+
+@pytest.fixture
+def tb():
+    previous = timebase_module._timebase
+    tb = VirtualTimebase()
+    set_timebase(tb)
+    yield tb
+    set_timebase(previous)
+
+@pytest.fixture
+def clock(tb):
+    """虚拟 NTP 上的时钟服务（设为共享时钟服务，结束后恢复原来的）"""
+    previous = clock_service_module._clock_service
+    clock = bench_clock(["ntp-a", "ntp-b", "ntp-c"], timebase=tb)
+    yield clock
+    set_clock_service(previous)
+
+def calibration_rounds(tb):
+    """各轮校准的虚拟时刻（纳秒），同一轮向多个服务器的查询只取第一个"""
+    queries = sorted(tb.ntp_queries)
+    return [t for i, t in enumerate(queries) if i == 0 or t - queries[i - 1] > 1e8]
+
+class StepClock:
+    """偏移可随时修改的时钟估计（模拟重新校准或系统休眠后的修正）"""
+
+    def __init__(self, offset: float):
+        self.offset = offset  # 北京时间（Unix 秒）- 单调时钟（秒）
+
+    def mono_ns_for(self, target: datetime) -> int:
+        return int((target.replace(tzinfo=BEIJING_TZ).timestamp() - self.offset) * 1e9)
+
+def test_far_wait_follows_clock_updates(tb):
+    """目标在 6 小时后；1 小时后估计修正 10 分钟，等待按修正后的时刻结束，且每次挂起不超过 WAIT_SLICE"""
+    clock = StepClock(offset=tb.start_time)
+    target = datetime.fromtimestamp(tb.start_time, BEIJING_TZ).replace(tzinfo=None) + timedelta(hours=6)
+    task = ExchangeTask(bench_task_config("far", target))
+    task.clock = clock
+
+    async def run():
+        async def shift():
+            await asyncio.sleep(3600)
+            clock.offset += 600  # 休眠 10 分钟：真实时间比单调时钟多走了 600 秒
+        shifting = asyncio.ensure_future(shift())
+        await task._wait_until_before(0)
+        await shifting
+        return tb.mono_ns(), get_timer_heap().wakeups
+
+    woke_ns, wakeups = tb.run(run())
+    assert 0 <= woke_ns - clock.mono_ns_for(target) < 1000  # 事件循环定时器按浮点秒换算，允许纳秒级舍入
+    assert woke_ns == pytest.approx((6 * 3600 - 600) * 1e9, abs=1e6)
+    assert wakeups <= (6 * 3600 - 600) / task.WAIT_SLICE + 2
+
+def test_timer_heap_wakes_once_per_point(tb):
+    """3 小时内 100 个时刻、每个时刻 10 个等待：每个等待恰在自己的时刻醒来，定时器只唤醒 100 次"""
+    points = [int(i * 108e9) + 7 for i in range(1, 101)]
+
+    async def run():
+        heap = get_timer_heap()
+        woke = {}
+        async def wait(key, when_ns):
+            await heap.sleep_until(when_ns)
+            woke[key] = tb.mono_ns()
+        cancelled = asyncio.ensure_future(wait("cancelled", points[50] + 1))
+        waits = [asyncio.ensure_future(wait((p, k), p)) for p in points for k in range(10)]
+        await asyncio.sleep(points[10] / 1e9)
+        cancelled.cancel()
+        await asyncio.gather(*waits)
+        return woke, heap.wakeups, heap.pending
+
+    woke, wakeups, pending = tb.run(run())
+    assert "cancelled" not in woke
+    assert all(0 <= woke[(p, k)] - p < 1000 for p in points for k in range(10))
+    assert wakeups == len(points)
+    assert pending == 0
+
+def test_calibration_cadence(tb, clock):
+    """无订阅每 300 秒、目标在 5 分钟外每 30 秒、5 分钟内每 5 秒校准一次，取消订阅后回到 300 秒"""
+    async def run():
+        clock.start()
+        await clock.wait_synced()
+        await asyncio.sleep(1800)
+        subscribed_ns = tb.mono_ns()
+        target = clock.now() + timedelta(hours=1)
+        token = clock.subscribe(target)
+        deadline_ns = clock.mono_ns_for(target)
+        await asyncio.sleep((deadline_ns - tb.mono_ns()) / 1e9)
+        clock.unsubscribe(token)
+        unsubscribed_ns = tb.mono_ns()
+        await asyncio.sleep(1800)
+        clock.stop()
+        return subscribed_ns, deadline_ns, unsubscribed_ns
+
+    subscribed_ns, deadline_ns, unsubscribed_ns = tb.run(run())
+    rounds = calibration_rounds(tb)
+    gaps = [((b - a) / 1e9, a) for a, b in zip(rounds, rounds[1:])]
+    idle = [g for g, at in gaps if at < subscribed_ns - ClockService.IDLE_INTERVAL * 1e9
+            or at > unsubscribed_ns + ClockService.NEAR_INTERVAL * 1e9]
+    far = [g for g, at in gaps if subscribed_ns <= at < deadline_ns - (ClockService.NEAR_WINDOW + ClockService.FAR_INTERVAL) * 1e9]
+    near = [g for g, at in gaps if deadline_ns - ClockService.NEAR_WINDOW * 1e9 < at < unsubscribed_ns]
+    assert idle and all(g == pytest.approx(ClockService.IDLE_INTERVAL, abs=1) for g in idle), idle
+    assert len(far) > 100 and all(g == pytest.approx(ClockService.FAR_INTERVAL, abs=1) for g in far), far
+    assert len(near) >= 55 and all(g == pytest.approx(ClockService.NEAR_INTERVAL, abs=1) for g in near), near
+
+def test_multi_hour_run_fires_on_time(tb, clock):
+    """3 小时后的任务跑完整个倒计时：虚拟时间恰好走到目标时刻，各次请求零触发误差，第一发抢到"""
+    hours = 3
+
+    async def run():
+        clock.start()
+        await clock.wait_synced()
+        sale_time = clock.unix_time() + hours * 3600
+        mall = MockMall(sale_time=sale_time - 0.001)
+        server = mall.make_server(latency=0.03, clock_skew=tb.ntp_offset)
+        await server.start()
+        try:
+            target = clock.now() + timedelta(hours=hours)
+            task = ExchangeTask(bench_task_config("virtual", target, server.base_url, count=3, clock_source="ntp"))
+            start_ns = tb.mono_ns()
+            await task.run()
+            return task, clock.mono_ns_for(task.target_time) - start_ns, tb.mono_ns() - start_ns, mall
+        finally:
+            clock.stop()
+            await server.stop()
+
+    task, until_target_ns, elapsed_ns, mall = tb.run(run())
+    assert until_target_ns == pytest.approx(hours * 3600e9, abs=1e6)
+    assert until_target_ns <= elapsed_ns < until_target_ns + 1e9
+    assert task.result["shot_errors_ms"] == pytest.approx([0, 0, 0], abs=0.001)
+    assert task.result["outcome"] == "success"
+    assert [e["retcode"] for e in mall.exchanges][0] == 0
+    assert len(calibration_rounds(tb)) >= hours * 3600 / ClockService.FAR_INTERVAL
@@ -5,17 +5,49 @@ import subprocess
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QLabel, QTableWidget, QTableWidgetItem, QHeaderView,
                              QDialog, QFormLayout, QLineEdit, QComboBox,
-                             QSpinBox, QDateTimeEdit, QMessageBox, QTextEdit)
-from PyQt6.QtCore import Qt, QDateTime
+                             QSpinBox, QDateTimeEdit, QMessageBox, QTextEdit,
+                             QListWidget, QListWidgetItem)
+from PyQt6.QtCore import Qt, QDateTime, QObject, pyqtSignal
 from core.goods import GoodsService
-from core.exchange import ExchangeTask, ExchangeWorker
+from core.exchange import ExchangeTask
+from core.fanout import create_task
+from core.engine import get_engine
+from core.burst import BURST_STRATEGY_NAMES
+from core.outcome import OUTCOME_NAMES
+from core.timeline import TIMELINE_POINTS, TIMELINE_NAMES
 from core.auth import AuthService
 from utils.storage import get_storage
+from utils.history import get_history_store
 from utils.helpers import build_task_config
 from utils.logger import get_logger
 
 logger = get_logger()
 
+class TaskSignalBridge(QObject):
+    """把任务的回调信号（在引擎线程中发出）转成 Qt 信号，槽函数在界面线程中执行"""
+    
+    message_signal = pyqtSignal(str)
+    completed_signal = pyqtSignal(str)
+    error_signal = pyqtSignal(str, str)
+    timeline_signal = pyqtSignal(str, list)
+    
+    def __init__(self, task: ExchangeTask, parent=None):
+        super().__init__(parent)
+        self._links = [
+            (task.message_signal, self.message_signal.emit),
+            (task.completed_signal, self.completed_signal.emit),
+            (task.error_signal, self.error_signal.emit),
+            (task.timeline_signal, self.timeline_signal.emit),
+        ]
+        for source, target in self._links:
+            source.connect(target)
+    
+    def detach(self):
+        """断开与任务的连接（之后任务发出的信号不再转发）"""
+        for source, target in self._links:
+            source.disconnect(target)
+        self._links = []
+
 class CreateTaskDialog(QDialog):
     """创建任务对话框"""
     
@@ -63,9 +95,28 @@ class CreateTaskDialog(QDialog):
         self.count_spin.setValue(5)
         layout.addRow("请求次数：", self.count_spin)
         
+        # 突发策略（自定义偏移请在任务文件中填写 burst.offsets_ms）
+        self.burst_combo = QComboBox()
+        for key, label in BURST_STRATEGY_NAMES.items():
+            if key != 'explicit':
+                self.burst_combo.addItem(label, key)
+        layout.addRow("发送策略：", self.burst_combo)
+        
+        self.window_spin = QSpinBox()
+        self.window_spin.setRange(0, 2000)
+        self.window_spin.setValue(100)
+        self.window_spin.setSuffix(" ms")
+        layout.addRow("分布窗口：", self.window_spin)
+        
+        # 参与的账号（勾选多个时按账号拆成子任务，统一触发）
+        self.account_list = QListWidget()
+        self.account_list.setMaximumHeight(100)
+        layout.addRow("账号：", self.account_list)
+        
         # 加载数据 - 在所有控件创建完成后
         self.load_wishlist()
         self.load_addresses()
+        self.load_accounts()
         
         # 按钮
         button_layout = QHBoxLayout()
@@ -112,6 +163,21 @@ class CreateTaskDialog(QDialog):
                 display_text = addr.get('addr_ext', '未知地址')
                 self.address_combo.addItem(display_text, addr.get('id', ''))
     
+    def load_accounts(self):
+        """加载账号列表，默认只勾选当前登录的账号"""
+        current = str(self.storage.get_cookies().get('account_id', ''))
+        self.account_list.clear()
+        for account in self.storage.get_accounts():
+            item = QListWidgetItem(account['name'])
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if account['name'] == current else Qt.CheckState.Unchecked)
+            self.account_list.addItem(item)
+    
+    def selected_accounts(self) -> list:
+        """勾选的账号名称"""
+        items = (self.account_list.item(i) for i in range(self.account_list.count()))
+        return [item.text() for item in items if item.checkState() == Qt.CheckState.Checked]
+    
     def on_goods_changed(self, index):
         """商品切换事件"""
         goods = self.goods_combo.currentData()
@@ -143,7 +209,20 @@ class CreateTaskDialog(QDialog):
         device_id = self.storage.get_device_id()
         uid = cookies.get('account_id', '')
         
+        # 只勾选当前登录账号时与单账号任务相同
+        accounts = self.selected_accounts()
+        if self.account_list.count() and not accounts:
+            QMessageBox.warning(self, "提示", "请至少勾选一个账号")
+            return
+        if accounts == [str(uid)]:
+            accounts = None
+        
         # 构建任务配置
+        strategy = self.burst_combo.currentData()
+        burst = None
+        if strategy != 'simultaneous':
+            burst = {"strategy": strategy, "window_ms": self.window_spin.value()}
+        
         task_config = build_task_config(
             name=name,
             goods_id=goods['id'],
@@ -153,7 +232,9 @@ class CreateTaskDialog(QDialog):
             device_id=device_id,
             cookie=cookie_str,
             time=self.time_edit.dateTime().toString("yyyy-MM-dd HH:mm:ss"),
-            count=self.count_spin.value()
+            count=self.count_spin.value(),
+            burst=burst,
+            accounts=accounts
         )
         
         # 保存任务
@@ -163,13 +244,125 @@ class CreateTaskDialog(QDialog):
         self.accept()
 
 
+class TimelineDialog(QDialog):
+    """请求时间线对话框：各阶段相对目标时刻的偏移（毫秒）"""
+    
+    def __init__(self, task_name: str, records: list, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"请求时间线 - {task_name}")
+        self.setMinimumSize(900, 300)
+        
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("各阶段相对目标时刻的偏移（ms，负数表示早于目标时刻）"))
+        
+        # 多账号任务的记录带有账号
+        by_account = any('account' in record for record in records)
+        columns = (["账号"] if by_account else []) + ["序号", "结果", "HTTP", "retcode"]
+        columns += [TIMELINE_NAMES[p] for p in TIMELINE_POINTS]
+        table = QTableWidget(len(records), len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        
+        for row, record in enumerate(records):
+            outcome = record.get('outcome')
+            values = [
+                str(record['shot'] + 1),
+                OUTCOME_NAMES.get(outcome, record.get('message') or '-'),
+                str(record.get('status') or '-'),
+                str(record.get('retcode') if record.get('retcode') is not None else '-'),
+            ]
+            if by_account:
+                values.insert(0, record.get('account', ''))
+            for point in TIMELINE_POINTS:
+                ns = record['timeline_ns'].get(point)
+                values.append('-' if ns is None else f"{ns / 1e6:+.3f}")
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                table.setItem(row, col, item)
+        layout.addWidget(table)
+        
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        layout.addWidget(close_btn, alignment=Qt.AlignmentFlag.AlignRight)
+
+
+class HistoryDialog(QDialog):
+    """兑换历史统计对话框：各策略成功率与到达偏移、各突发规模的限流频率、最近的运行"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("兑换历史统计")
+        self.setMinimumSize(800, 500)
+        
+        store = get_history_store()
+        store.flush(timeout=2)
+        summary = store.summary()
+        arrivals = summary['arrival_offset_ms']
+        
+        layout = QVBoxLayout(self)
+        
+        layout.addWidget(QLabel("按突发策略（到达偏移为估计的服务器到达时刻相对目标时刻，ms）"))
+        strategy_rows = []
+        for strategy, stats in summary['success_by_strategy'].items():
+            arrival = arrivals.get(strategy, {})
+            strategy_rows.append([
+                BURST_STRATEGY_NAMES.get(strategy, strategy), str(stats['runs']),
+                f"{stats['success_rate'] * 100:.1f}%",
+                self._fmt(arrival.get('p10')), self._fmt(arrival.get('p50')), self._fmt(arrival.get('p90')),
+            ])
+        layout.addWidget(self._table(["策略", "运行次数", "成功率", "到达 p10", "到达 p50", "到达 p90"], strategy_rows))
+        
+        layout.addWidget(QLabel("按突发规模"))
+        size_rows = [
+            [str(size), str(stats['shots']), str(stats['rate_limited']), f"{stats['frequency'] * 100:.1f}%"]
+            for size, stats in summary['rate_limit_by_burst_size'].items()
+        ]
+        layout.addWidget(self._table(["请求次数", "请求总数", "被限流", "限流频率"], size_rows))
+        
+        layout.addWidget(QLabel("最近的运行"))
+        run_rows = [
+            [run['task'], run['target_time'] or '-', BURST_STRATEGY_NAMES.get(run['strategy'], run['strategy']),
+             str(run['count']), run['send_mode'] or '-', self._fmt(run['lead_ms']), self._fmt(run['fire_error_ms']),
+             OUTCOME_NAMES.get(run['outcome'], run['outcome'] or '-')]
+            for run in store.runs(limit=50)
+        ]
+        layout.addWidget(self._table(
+            ["任务", "目标时间", "策略", "次数", "发送模式", "提前量", "触发误差", "结果"], run_rows))
+        
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        layout.addWidget(close_btn, alignment=Qt.AlignmentFlag.AlignRight)
+    
+    @staticmethod
+    def _fmt(value) -> str:
+        return '-' if value is None else f"{value:.2f}"
+    
+    @staticmethod
+    def _table(columns: list, rows: list) -> QTableWidget:
+        table = QTableWidget(len(rows), len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        for row, values in enumerate(rows):
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                table.setItem(row, col, item)
+        return table
+
+
 class TaskWidget(QWidget):
     """任务管理界面"""
     
     def __init__(self):
         super().__init__()
         self.storage = get_storage()
-        self.running_tasks = {}  # {task_name: ExchangeWorker}
+        self.engine = get_engine()
+        self.running_tasks = {}  # {task_name: ExchangeTask}
+        self.bridges = {}  # {task_name: TaskSignalBridge}
+        self.timelines = {}  # {task_name: 最近一次运行的请求时间线}
         self.init_ui()
     
     def init_ui(self):
@@ -195,6 +388,10 @@ class TaskWidget(QWidget):
         open_file_btn.clicked.connect(self.open_task_file)
         top_layout.addWidget(open_file_btn)
         
+        history_btn = QPushButton("历史统计")
+        history_btn.clicked.connect(self.show_history)
+        top_layout.addWidget(history_btn)
+        
         top_layout.addStretch()
         
         layout.addLayout(top_layout)
@@ -215,7 +412,7 @@ class TaskWidget(QWidget):
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.Fixed)  # 状态固定
         self.task_table.setColumnWidth(3, 80)
         header.setSectionResizeMode(4, QHeaderView.ResizeMode.Fixed)  # 操作固定
-        self.task_table.setColumnWidth(4, 180)  # 足够容纳两个按钮
+        self.task_table.setColumnWidth(4, 260)  # 足够容纳三个按钮
         
         # 设置行高 - 重要！
         self.task_table.verticalHeader().setDefaultSectionSize(80)
@@ -255,7 +452,10 @@ class TaskWidget(QWidget):
             self.task_table.setItem(row, 1, QTableWidgetItem(task['time']))
             
             # 请求次数
-            self.task_table.setItem(row, 2, QTableWidgetItem(str(task.get('count', 5))))
+            count = str(task.get('count', 5))
+            if task.get('accounts'):
+                count += f" × {len(task['accounts'])} 账号"
+            self.task_table.setItem(row, 2, QTableWidgetItem(count))
             
             # 状态
             status = "运行中" if task['name'] in self.running_tasks else "未运行"
@@ -322,6 +522,24 @@ class TaskWidget(QWidget):
                 delete_btn.clicked.connect(lambda checked, t=task: self.delete_task(t))
                 button_layout.addWidget(delete_btn)
                 
+                if task['name'] in self.timelines:
+                    timeline_btn = QPushButton("时间线")
+                    timeline_btn.setStyleSheet("""
+                        QPushButton {
+                            background-color: #6c757d;
+                            color: #ffffff;
+                            border: none;
+                            padding: 6px 12px;
+                            border-radius: 4px;
+                            font-size: 13px;
+                        }
+                        QPushButton:hover {
+                            background-color: #5a6268;
+                        }
+                    """)
+                    timeline_btn.clicked.connect(lambda checked, t=task: self.show_timeline(t))
+                    button_layout.addWidget(timeline_btn)
+                
                 self.task_table.setCellWidget(row, 4, button_container)
     
     def start_task(self, task_config: dict):
@@ -333,15 +551,25 @@ class TaskWidget(QWidget):
             return
         
         # 创建任务
-        task = ExchangeTask(task_config)
-        task.message_signal.connect(self.on_task_message)
-        task.completed_signal.connect(self.on_task_completed)
-        
-        # 创建工作线程
-        worker = ExchangeWorker(task)
-        worker.start()
+        try:
+            task = create_task(task_config)
+        except ValueError as e:
+            QMessageBox.warning(self, "提示", f"任务配置无效: {e}")
+            return
+        bridge = TaskSignalBridge(task, self)
+        bridge.message_signal.connect(self.on_task_message)
+        bridge.completed_signal.connect(self.on_task_completed)
+        bridge.error_signal.connect(self.on_task_error)
+        bridge.timeline_signal.connect(self.on_task_timeline)
+        
+        # 提交到共享的兑换引擎
+        if not self.engine.submit(task):
+            bridge.deleteLater()
+            QMessageBox.warning(self, "提示", "任务已在运行中")
+            return
         
-        self.running_tasks[task_name] = worker
+        self.running_tasks[task_name] = task
+        self.bridges[task_name] = bridge
         self.load_tasks()
         
         logger.info(f"启动任务: {task_name}")
@@ -354,9 +582,9 @@ class TaskWidget(QWidget):
         if task_name not in self.running_tasks:
             return
         
-        worker = self.running_tasks[task_name]
-        worker.stop()
+        self.engine.cancel(task_name)
         del self.running_tasks[task_name]
+        self._release_bridge(task_name)
         
         self.load_tasks()
         logger.info(f"停止任务: {task_name}")
@@ -413,6 +641,10 @@ class TaskWidget(QWidget):
         except Exception as e:
             QMessageBox.warning(self, "错误", f"打开文件失败: {e}")
     
+    def show_history(self):
+        """查看兑换历史统计"""
+        HistoryDialog(self).exec()
+    
     def on_task_message(self, message: str):
         """任务消息回调"""
         self.log_text.append(message)
@@ -425,10 +657,37 @@ class TaskWidget(QWidget):
         """任务完成回调"""
         if task_name in self.running_tasks:
             del self.running_tasks[task_name]
+        self._release_bridge(task_name)
         self.load_tasks()
     
+    def _release_bridge(self, task_name: str):
+        """任务结束后释放信号转发对象"""
+        bridge = self.bridges.pop(task_name, None)
+        if bridge is not None:
+            bridge.detach()
+            bridge.deleteLater()
+    
+    def on_task_timeline(self, task_name: str, records: list):
+        """任务时间线回调：保存在内存中，可在任务列表中查看"""
+        self.timelines[task_name] = records
+        self.log_text.append(f"[{task_name}] 已记录 {len(records)} 条请求时间线，可点击“时间线”查看")
+    
+    def show_timeline(self, task_config: dict):
+        """查看任务最近一次运行的请求时间线"""
+        records = self.timelines.get(task_config['name'])
+        if not records:
+            QMessageBox.information(self, "提示", "该任务还没有时间线记录")
+            return
+        TimelineDialog(task_config['name'], records, self).exec()
+    
+    def on_task_error(self, task_name: str, error: str):
+        """任务异常回调"""
+        self.log_text.append(f"[{task_name}] 任务异常: {error}")
+        self.on_task_completed(task_name)
+    
     def stop_all_tasks(self):
         """停止所有任务"""
-        for worker in self.running_tasks.values():
-            worker.stop()
+        self.engine.shutdown()
         self.running_tasks.clear()
+        for name in list(self.bridges):
+            self._release_bridge(name)
@@ -0,0 +1,146 @@
+"""DNS 预解析与固定模块 - 提前解析商城域名、选出连接最快的地址并在触发窗口内固定使用"""
+import asyncio
+import socket
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from core.timebase import Timebase, get_timebase
+from utils.logger import get_logger
+
+logger = get_logger()
+
+class SystemResolver:
+    """系统 DNS 解析（同时返回 A 与 AAAA 记录）
+
+    自定义解析器只需实现同样的 resolve 协程，例如测试用的固定结果解析器
+    """
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, port, family=socket.AF_UNSPEC, type=socket.SOCK_STREAM
+        )
+        addresses = []
+        for info in infos:
+            if info[4][0] not in addresses:
+                addresses.append(info[4][0])
+        return addresses
+
+@dataclass
+class PinnedHost:
+    """一个域名的固定结果：按 TCP 连接耗时从快到慢排列的地址"""
+    host: str
+    port: int
+    addresses: List[str]
+    connect_ms: Dict[str, float] = field(default_factory=dict)
+    pinned_at: float = 0.0  # 固定时的单调时刻（秒，取自时间源）
+
+class DnsPinner:
+    """DNS 预解析与地址固定
+
+    refresh 解析域名的全部地址，并发测量到每个地址的 TCP 连接耗时，按快慢排序后固定；
+    固定在 ttl 秒内有效，过期或全部失败时退回系统解析。
+    连接某地址失败时调用 mark_failed，把它移到候选列表末尾，下次连接自动换用下一个地址。
+    HttpClient（requests）与兑换连接（httpx / 末字节发送）共用同一份固定结果。
+    """
+
+    def __init__(self, resolver=None, connect_timeout: float = 1.0, ttl: float = 600,
+                 timebase: Optional[Timebase] = None):
+        self.resolver = resolver or SystemResolver()
+        self.connect_timeout = connect_timeout
+        self.ttl = ttl
+        self._timebase = timebase  # None 时每次读取当前时间源（全局实例可能先于 set_timebase 创建）
+        self._pins: Dict[str, PinnedHost] = {}
+        self._lock = threading.Lock()  # 固定结果会被界面线程（requests）读取
+
+    async def refresh(self, host: str, port: int = 443) -> Optional[PinnedHost]:
+        """解析并测速，固定最快的地址；没有可连接的地址时返回 None（保留原有固定）"""
+        try:
+            addresses = await self.resolver.resolve(host, port)
+        except OSError as e:
+            logger.warning(f"DNS 解析失败 {host}: {e}")
+            return None
+        timings = await asyncio.gather(*(self._measure(addr, port) for addr in addresses))
+        reachable = sorted(
+            ((ms, addr) for ms, addr in zip(timings, addresses) if ms is not None)
+        )
+        if not reachable:
+            logger.warning(f"DNS 固定失败 {host}: {len(addresses)} 个地址均无法连接")
+            return None
+        pin = PinnedHost(
+            host=host,
+            port=port,
+            addresses=[addr for _, addr in reachable],
+            connect_ms={addr: round(ms, 3) for ms, addr in reachable},
+            pinned_at=self._now(),
+        )
+        with self._lock:
+            self._pins[host] = pin
+        logger.info(f"DNS 已固定 {host} -> {pin.addresses[0]}（{reachable[0][0]:.1f} ms，共 {len(addresses)} 个地址）")
+        return pin
+
+    def _now(self) -> float:
+        """单调时刻（秒）"""
+        return (self._timebase or get_timebase()).mono_ns() / 1e9
+
+    async def _measure(self, address: str, port: int) -> Optional[float]:
+        """测量到一个地址的 TCP 连接耗时（毫秒），失败返回 None"""
+        start = self._now()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), self.connect_timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        elapsed = (self._now() - start) * 1000
+        writer.close()
+        return elapsed
+
+    def candidates(self, host: str) -> List[str]:
+        """返回域名当前的候选地址（最快的在前），未固定或已过期时返回空列表"""
+        with self._lock:
+            pin = self._pins.get(host)
+            if pin is None:
+                return []
+            if self._now() - pin.pinned_at > self.ttl:
+                del self._pins[host]
+                return []
+            return list(pin.addresses)
+
+    def pinned(self, host: str) -> Optional[str]:
+        """当前固定的地址"""
+        addresses = self.candidates(host)
+        return addresses[0] if addresses else None
+
+    def connect_order(self, host: str) -> List[str]:
+        """建立连接时依次尝试的目标：固定的地址（最快的在前），最后是域名本身（系统解析兜底）"""
+        return self.candidates(host) + [host]
+
+    def mark_failed(self, host: str, address: str):
+        """连接失败的地址移到候选列表末尾"""
+        with self._lock:
+            pin = self._pins.get(host)
+            if pin is not None and address in pin.addresses and pin.addresses[0] == address:
+                pin.addresses.remove(address)
+                pin.addresses.append(address)
+                logger.warning(f"DNS 固定地址 {address} 连接失败，{host} 改用 {pin.addresses[0]}")
+
+    def unpin(self, host: str):
+        with self._lock:
+            self._pins.pop(host, None)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """导出当前全部固定结果"""
+        with self._lock:
+            return {
+                host: {"addresses": list(pin.addresses), "connect_ms": dict(pin.connect_ms),
+                       "age": round(self._now() - pin.pinned_at, 1)}
+                for host, pin in self._pins.items()
+            }
+
+# 全局单例
+_dns_pinner = None
+
+def get_dns_pinner() -> DnsPinner:
+    """获取 DNS 固定器实例"""
+    global _dns_pinner
+    if _dns_pinner is None:
+        _dns_pinner = DnsPinner()
+    return _dns_pinner
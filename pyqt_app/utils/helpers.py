@@ -1,7 +1,7 @@
 """辅助工具函数"""
 import random
 from string import hexdigits
-from typing import Dict
+from typing import Dict, List, Optional
 
 try:
     from utils.ext_utils import get_f as _x
@@ -54,9 +54,17 @@ def build_task_config(
     device_id: str,
     cookie: str,
     time: str,
-    count: int = 5
+    count: int = 5,
+    burst: Optional[Dict] = None,
+    accounts: Optional[List[str]] = None
 ) -> Dict:
-    """构建任务配置"""
+    """构建任务配置
+
+    burst 为突发策略，如 {"strategy": "uniform", "window_ms": 100}，
+    可选策略见 core.burst.BURST_STRATEGIES；
+    accounts 为账号名称列表（见 Storage.get_accounts），运行时按账号拆成多个子任务，
+    cookie、uid 与设备 ID 以各账号为准
+    """
     region = get_region_by_game_biz(game_biz)
     
     payload = {
@@ -74,10 +82,15 @@ def build_task_config(
     
     headers = build_exchange_headers(cookie, device_id)
     
-    return {
+    config = {
         "name": name,
         "payload": payload,
         "headers": headers,
         "time": time,
         "count": count
     }
+    if burst:
+        config["burst"] = burst
+    if accounts:
+        config["accounts"] = list(accounts)
+    return config
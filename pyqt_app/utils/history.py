@@ -0,0 +1,273 @@
+"""兑换历史模块 - 用 SQLite 记录每次任务运行及其请求时间线，提供查询与统计"""
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional
+from utils.logger import get_logger
+
+logger = get_logger()
+
+TIMELINE_COLUMNS = ('scheduled_ns', 'fired_ns', 'conn_acquired_ns', 'written_ns', 'first_byte_ns', 'completed_ns')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    task TEXT NOT NULL,
+    target_time TEXT,
+    recorded_at REAL,
+    strategy TEXT,
+    count INTEGER,
+    send_mode TEXT,
+    lead_ms REAL,
+    clock_source TEXT,
+    clock_offset_ms REAL,
+    fire_error_ms REAL,
+    outcome TEXT,
+    config TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_task ON runs (task, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_runs_strategy ON runs (strategy);
+CREATE TABLE IF NOT EXISTS shots (
+    run_id TEXT NOT NULL REFERENCES runs (id),
+    shot INTEGER,
+    outcome TEXT,
+    status INTEGER,
+    retcode INTEGER,
+    message TEXT,
+    scheduled_ns INTEGER,
+    fired_ns INTEGER,
+    conn_acquired_ns INTEGER,
+    written_ns INTEGER,
+    first_byte_ns INTEGER,
+    completed_ns INTEGER,
+    arrival_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_shots_run ON shots (run_id);
+CREATE INDEX IF NOT EXISTS idx_shots_outcome ON shots (outcome);
+"""
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+class HistoryStore:
+    """兑换历史存储（data/history.db）
+
+    record_run 只把记录放进队列，由后台线程攒批后在一个事务里写入，
+    建库（连接、WAL、建表）也在后台线程完成，构造与登记都不碰磁盘；
+    查询使用各自的连接，可在界面线程调用。
+    """
+
+    BATCH_SIZE = 50  # 攒够多少次运行写一次
+    FLUSH_INTERVAL = 1.0  # 最长多久写一次（秒）
+
+    def __init__(self, path: Optional[Path] = None):
+        if path is None:
+            from utils.storage import get_storage
+            path = get_storage().data_dir / 'history.db'
+        self.path = Path(path)
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        with self._schema_lock:
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+        return conn
+
+    # 写入
+    def record_run(self, task_name: str, config: Dict, result: Dict) -> str:
+        """登记一次任务运行（非阻塞），返回运行 id
+
+        请求头（含 Cookie）不写入历史
+        """
+        run_id = uuid.uuid4().hex
+        config = {k: v for k, v in config.items() if k != 'headers'}
+        self._queue.put({"id": run_id, "task": task_name, "config": config, "result": result,
+                         "recorded_at": time.time()})
+        self.start()
+        return run_id
+
+    def start(self):
+        """启动后台写入线程（由它建库），任务在 open 时调用，之后登记记录只需入队"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._writer, name="history-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _writer(self):
+        """后台写入线程：攒批写入，收到 None 时写完剩余记录后退出"""
+        conn = self._connect()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.FLUSH_INTERVAL
+                while len(batch) < self.BATCH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                stop = None in batch
+                self._write(conn, [r for r in batch if r is not None])
+                for _ in batch:
+                    self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, records: List[Dict]):
+        if not records:
+            return
+        runs, shots = [], []
+        for r in records:
+            config, result = r["config"], r["result"]
+            burst = config.get('burst') or {}
+            runs.append((
+                r["id"], r["task"], config.get('time'), r["recorded_at"],
+                burst.get('strategy', 'simultaneous'), len(result.get('offsets_ms') or []) or config.get('count'),
+                config.get('send_mode', 'pooled'), result.get('lead_ms'),
+                (result.get('clock') or {}).get('source'), result.get('clock_offset_ms'),
+                result.get('fire_error_ms'), result.get('outcome'),
+                json.dumps(config, ensure_ascii=False), json.dumps(result, ensure_ascii=False),
+            ))
+            for shot in result.get('shots', []):
+                tl = shot.get('timeline_ns') or {}
+                points = [tl.get(c[:-3]) for c in TIMELINE_COLUMNS]
+                written, first_byte = tl.get('written'), tl.get('first_byte')
+                # 估计的服务器到达时刻：写完请求与收到首字节的中点（假设上下行对称）
+                arrival = (written + first_byte) // 2 if written is not None and first_byte is not None else None
+                shots.append((r["id"], shot.get('shot'), shot.get('outcome'), shot.get('status'),
+                              shot.get('retcode'), shot.get('message'), *points, arrival))
+        try:
+            with conn:
+                conn.executemany(f"INSERT INTO runs VALUES ({','.join('?' * 14)})", runs)
+                conn.executemany(f"INSERT INTO shots VALUES ({','.join('?' * 13)})", shots)
+        except sqlite3.Error as e:
+            logger.error(f"写入兑换历史失败: {e}")
+
+    def flush(self, timeout: float = 10) -> bool:
+        """等待队列中的记录全部写入"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def close(self):
+        """写完剩余记录后停止后台线程"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    # 查询
+    def runs(self, task: Optional[str] = None, strategy: Optional[str] = None,
+             since: Optional[float] = None, limit: int = 100) -> List[Dict]:
+        """按条件查询运行记录（最新的在前），since 为 Unix 时间"""
+        where, args = self._filters(task, strategy, since)
+        sql = (f"SELECT id, task, target_time, recorded_at, strategy, count, send_mode, lead_ms, "
+               f"clock_source, clock_offset_ms, fire_error_ms, outcome FROM runs{where} "
+               f"ORDER BY recorded_at DESC LIMIT ?")
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute(sql, (*args, limit))]
+
+    def run_detail(self, run_id: str) -> Optional[Dict]:
+        """查询一次运行的完整记录（含配置、结果与各次请求）"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            detail = dict(row)
+            detail['config'] = json.loads(detail['config'])
+            detail['result'] = json.loads(detail['result'])
+            detail['shots'] = [dict(s) for s in conn.execute(
+                "SELECT * FROM shots WHERE run_id = ? ORDER BY shot", (run_id,))]
+            return detail
+
+    def summary(self, task: Optional[str] = None, since: Optional[float] = None) -> Dict:
+        """统计：各策略成功率、到达偏移分位数、各突发规模的限流频率"""
+        where, args = self._filters(task, None, since)
+        with closing(self._connect()) as conn:
+            by_strategy = {
+                row['strategy']: {"runs": row['runs'], "successes": row['successes'],
+                                  "success_rate": round(row['successes'] / row['runs'], 4)}
+                for row in conn.execute(
+                    f"SELECT strategy, COUNT(*) AS runs, SUM(outcome = 'success') AS successes "
+                    f"FROM runs{where} GROUP BY strategy", args)
+            }
+            arrivals: Dict[str, List[float]] = {}
+            for row in conn.execute(
+                    f"SELECT runs.strategy, shots.arrival_ns FROM shots JOIN runs ON runs.id = shots.run_id"
+                    f"{where} {'AND' if where else 'WHERE'} shots.arrival_ns IS NOT NULL", args):
+                arrivals.setdefault(row['strategy'], []).append(row['arrival_ns'] / 1e6)
+            by_size = {
+                row['count']: {"shots": row['shots'], "rate_limited": row['limited'],
+                               "frequency": round(row['limited'] / row['shots'], 4)}
+                for row in conn.execute(
+                    f"SELECT runs.count, COUNT(*) AS shots, SUM(shots.outcome = 'rate_limited') AS limited "
+                    f"FROM shots JOIN runs ON runs.id = shots.run_id{where} "
+                    f"GROUP BY runs.count ORDER BY runs.count", args)
+            }
+        every = [a for values in arrivals.values() for a in values]
+        return {
+            "success_by_strategy": by_strategy,
+            "arrival_offset_ms": {
+                "all": self._percentiles(every),
+                **{strategy: self._percentiles(values) for strategy, values in arrivals.items()},
+            },
+            "rate_limit_by_burst_size": by_size,
+        }
+
+    @staticmethod
+    def _percentiles(values: List[float]) -> Dict:
+        result = {"n": len(values)}
+        for pct in (10, 50, 90, 99):
+            v = _percentile(values, pct)
+            result[f"p{pct}"] = round(v, 3) if v is not None else None
+        return result
+
+    @staticmethod
+    def _filters(task, strategy, since):
+        clauses, args = [], []
+        if task is not None:
+            clauses.append("runs.task = ?")
+            args.append(task)
+        if strategy is not None:
+            clauses.append("runs.strategy = ?")
+            args.append(strategy)
+        if since is not None:
+            clauses.append("runs.recorded_at >= ?")
+            args.append(since)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(args)
+
+# 全局单例
+_history_store = None
+
+def get_history_store() -> HistoryStore:
+    """获取兑换历史存储实例"""
+    global _history_store
+    if _history_store is None:
+        _history_store = HistoryStore()
+    return _history_store
@@ -1,21 +1,76 @@
 """HTTP 客户端工具"""
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, Optional
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from utils.dns_resolver import get_dns_pinner
 from utils.logger import get_logger
 
 logger = get_logger()
 
+class _PinnedConnectionMixin:
+    """按 DNS 固定结果建立连接：只替换连接地址，TLS 仍按原域名校验"""
+
+    def _new_conn(self):
+        pinner = get_dns_pinner()
+        host = self._dns_host
+        try:
+            for address in pinner.connect_order(self.host)[:-1]:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError):
+                    pinner.mark_failed(self.host, address)
+        finally:
+            self._dns_host = host
+        return super()._new_conn()
+
+class _PinnedHTTPConnection(_PinnedConnectionMixin, HTTPConnection):
+    pass
+
+class _PinnedHTTPSConnection(_PinnedConnectionMixin, HTTPSConnection):
+    pass
+
+class _PinnedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _PinnedHTTPConnection
+
+class _PinnedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _PinnedHTTPSConnection
+
+class PinnedAdapter(HTTPAdapter):
+    """使用 DNS 固定结果的 requests 适配器"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _PinnedHTTPConnectionPool,
+            "https": _PinnedHTTPSConnectionPool,
+        }
+
+def override_url(url: str) -> str:
+    """按配置 api_overrides 把接口地址的 scheme://host 前缀替换为本地替身地址（配置由 Storage 缓存）"""
+    from utils.storage import get_storage
+    for origin, target in get_storage().get_api_overrides().items():
+        if url == origin or url.startswith(origin.rstrip('/') + '/'):
+            return target.rstrip('/') + url[len(origin.rstrip('/')):]
+    return url
+
 class HttpClient:
     """统一的 HTTP 客户端"""
     
     def __init__(self):
         self.session = requests.Session()
+        adapter = PinnedAdapter()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.timeout = 10
     
     def get(self, url: str, headers: Optional[Dict] = None, params: Optional[Dict] = None) -> Optional[Dict]:
         """GET 请求"""
         try:
-            response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+            response = self.session.get(override_url(url), headers=headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -25,7 +80,7 @@ class HttpClient:
     def post(self, url: str, headers: Optional[Dict] = None, data: Optional[Dict] = None, json_data: Optional[Dict] = None) -> Optional[Dict]:
         """POST 请求"""
         try:
-            response = self.session.post(url, headers=headers, data=data, json=json_data, timeout=self.timeout)
+            response = self.session.post(override_url(url), headers=headers, data=data, json=json_data, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -35,7 +90,7 @@ class HttpClient:
     def get_raw_response(self, url: str, headers: Optional[Dict] = None, json_data: Optional[Dict] = None):
         """获取原始响应（用于获取 headers）"""
         try:
-            response = self.session.post(url, headers=headers, json=json_data, timeout=self.timeout)
+            response = self.session.post(override_url(url), headers=headers, json=json_data, timeout=self.timeout)
             return response
         except requests.RequestException as e:
             logger.error(f"请求失败 {url}: {e}")
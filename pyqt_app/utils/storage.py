@@ -10,15 +10,20 @@ logger = get_logger()
 class Storage:
     """统一的数据存储管理"""
     
-    def __init__(self):
-        # 数据保存在程序所在目录的 data 文件夹
-        app_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        self.data_dir = app_dir / 'data'
+    def __init__(self, data_dir: Optional[Path] = None):
+        # 数据默认保存在程序所在目录的 data 文件夹
+        if data_dir is None:
+            app_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            data_dir = app_dir / 'data'
+        self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         
         self.config_file = self.data_dir / 'config.json'
         self.tasks_file = self.data_dir / 'tasks.json'
         self.wishlist_file = self.data_dir / 'wishlist.json'
+        self.clock_file = self.data_dir / 'clock.json'
+        self.timelines_dir = self.data_dir / 'timelines'
+        self._overrides_cache = (None, {})  # (config.json 的 mtime 与大小, api_overrides)
         
         self._ensure_files()
     
@@ -68,17 +73,99 @@ class Storage:
         return config.get('cookies', {})
     
     def save_cookies(self, cookies: Dict, device_id: str):
-        """保存 cookies"""
+        """保存 cookies（同时存入账号列表，供多账号任务选用）"""
         config = self.get_config()
         config['cookies'] = cookies
         config['device_id'] = device_id
         self.save_config(config)
+        if cookies.get('account_id'):
+            self.save_account(str(cookies['account_id']), cookies, device_id)
     
     def get_device_id(self) -> str:
         """获取设备 ID"""
         config = self.get_config()
         return config.get('device_id', '')
     
+    # Account 相关
+    def get_accounts(self) -> List[Dict]:
+        """获取账号列表 [{"name", "cookies", "device_id"}]
+
+        当前登录的账号不在列表中时（旧版本保存的配置）也作为一个账号返回，名称为其 account_id
+        """
+        config = self.get_config()
+        accounts = list(config.get('accounts', []))
+        cookies = config.get('cookies', {})
+        account_id = str(cookies.get('account_id', ''))
+        if account_id and all(a.get('name') != account_id for a in accounts):
+            accounts.insert(0, {'name': account_id, 'cookies': cookies, 'device_id': config.get('device_id', '')})
+        return accounts
+    
+    def get_account(self, name: str) -> Optional[Dict]:
+        """按名称获取账号"""
+        for account in self.get_accounts():
+            if account.get('name') == name:
+                return account
+        return None
+    
+    def save_account(self, name: str, cookies: Dict, device_id: str):
+        """保存账号（同名账号覆盖）"""
+        config = self.get_config()
+        accounts = [a for a in config.get('accounts', []) if a.get('name') != name]
+        accounts.append({'name': name, 'cookies': cookies, 'device_id': device_id})
+        config['accounts'] = accounts
+        self.save_config(config)
+    
+    def remove_account(self, name: str):
+        """删除账号"""
+        config = self.get_config()
+        config['accounts'] = [a for a in config.get('accounts', []) if a.get('name') != name]
+        self.save_config(config)
+    
+    def get_ntp_servers(self) -> List[str]:
+        """获取自定义 NTP 服务器列表（为空时使用默认列表）"""
+        config = self.get_config()
+        return config.get('ntp_servers', [])
+    
+    def get_api_overrides(self) -> Dict[str, str]:
+        """获取接口地址重定向（如 {"https://api-takumi.miyoushe.com": "http://127.0.0.1:8650"}，用于本地替身）
+
+        每个接口请求都会查询，因此缓存读取结果，只在 config.json 变化（保存或手动修改）后重新加载
+        """
+        try:
+            stat = self.config_file.stat()
+            version = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            version = None
+        cached_version, overrides = self._overrides_cache
+        if version is None or version != cached_version:
+            overrides = self.get_config().get('api_overrides', {})
+            self._overrides_cache = (version, overrides)
+        return overrides
+    
+    # Clock 相关
+    def get_clock_state(self) -> Dict:
+        """获取上次保存的时钟偏移估计"""
+        if not self.clock_file.exists():
+            return {}
+        return self._load_json(self.clock_file) or {}
+    
+    def save_clock_state(self, state: Dict):
+        """保存时钟偏移估计"""
+        self._save_json(self.clock_file, state)
+    
+    # Timeline 相关
+    def append_timelines(self, task_name: str, records: List[Dict]):
+        """把一次运行的请求时间线追加到 data/timelines/<任务名>.jsonl（每行一条）"""
+        self.timelines_dir.mkdir(exist_ok=True)
+        safe_name = ''.join('_' if c in '\\/:*?"<>|' else c for c in task_name)
+        file_path = self.timelines_dir / f'{safe_name}.jsonl'
+        try:
+            with open(file_path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except Exception as e:
+            logger.error(f"保存时间线失败 {file_path}: {e}")
+    
     # Tasks 相关
     def get_tasks(self) -> List[Dict]:
         """获取任务列表"""